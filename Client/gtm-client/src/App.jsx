@@ -1,4 +1,4 @@
-import React, { useState } from "react";
+import React, { useEffect, useState } from "react";
 import { Card, CardContent } from "@/components/ui/card";
 import {
   BarChart,
@@ -76,11 +76,13 @@ export default function AIDashboard() {
   const [popupMessage, setPopupMessage] = useState("");
   const [error, setError] = useState(null);
   const [trendSummary, setTrendSummary] = useState(DEFAULT_TREND_SUMMARY);
+  const [query, setQuery] = useState("");
 
   // 🎯 Fetch weekly report
   async function fetchWeeklyReport() {
     try {
-      const res = await fetch("http://127.0.0.1:8000/gtm_week",{ method: "POST" });
+      // Cached on the server; the browser revalidates with If-None-Match and gets 304s
+      const res = await fetch("http://127.0.0.1:8000/api/weekly_report");
       if (!res.ok) throw new Error(`Server responded with ${res.status}`);
       const data = await res.json();
       if (!data) throw new Error("Empty data from server");
@@ -134,7 +136,7 @@ export default function AIDashboard() {
   // 🟠 Fetch posts
   async function fetchPosts() {
     try {
-      const res = await fetch("http://localhost:4000/api/posts");
+      const res = await fetch("http://127.0.0.1:8000/api/posts?limit=1000");
       if (!res.ok) throw new Error(`Server responded with ${res.status}`);
       const data = await res.json();
       const docs = Array.isArray(data) ? data : data.result || data.documents || [];
@@ -146,6 +148,50 @@ export default function AIDashboard() {
     }
   }
 
+  // 🔴 Live posts: load the collection once, then merge posts pushed by the server
+  useEffect(() => {
+    fetchPosts();
+    const source = new EventSource("http://127.0.0.1:8000/api/posts/stream");
+    source.addEventListener("post", (event) => {
+      const post = JSON.parse(event.data);
+      setPosts((prev) => [post, ...prev.filter((p) => (p._key || p.post_id) !== post._key)]);
+    });
+    return () => source.close();
+  }, []);
+
+  // 🟣 Full-text search on the server; an empty query goes back to the full list
+  async function searchPosts(event) {
+    event.preventDefault();
+    if (!query.trim()) {
+      fetchPosts();
+      return;
+    }
+    try {
+      const params = new URLSearchParams({ q: query.trim(), limit: "100" });
+      const res = await fetch(`http://127.0.0.1:8000/api/posts/search?${params}`);
+      if (!res.ok) throw new Error(`Server responded with ${res.status}`);
+      const data = await res.json();
+      setPosts(data.results || []);
+    } catch (err) {
+      console.error("Error searching posts:", err);
+      setError(err.message);
+    }
+  }
+
+  // 🟤 Drafts of posts stored as "pending" are written by the server on first request
+  async function loadDraft(postId) {
+    try {
+      const res = await fetch(`http://127.0.0.1:8000/api/posts/${postId}/draft`);
+      if (!res.ok) throw new Error(`Server responded with ${res.status}`);
+      const draft = await res.json();
+      setPosts((prev) =>
+        prev.map((p) => ((p._key || p.post_id) === postId ? { ...p, ...draft } : p))
+      );
+    } catch (err) {
+      console.error("Error loading draft:", err);
+    }
+  }
+
   // 🔵 Handle main start (runs everything)
   async function handleStart() {
     try {
@@ -155,9 +201,7 @@ export default function AIDashboard() {
       const res = await fetch("http://127.0.0.1:8000/gtm", { method: "POST" });
       if (!res.ok) throw new Error("Failed to start workflow");
 
-      setPopupMessage("Loading posts...");
-      await fetchPosts();
-
+      // New posts arrive over the event stream; no need to re-fetch the collection
       setPopupMessage("Updating weekly report...");
       await handleWeekStart();
 
@@ -257,6 +301,18 @@ export default function AIDashboard() {
         </CardContent>
       </Card>
 
+      <form onSubmit={searchPosts} className="flex gap-2 mb-6">
+        <input
+          value={query}
+          onChange={(e) => setQuery(e.target.value)}
+          placeholder="Search posts..."
+          className="flex-1 px-3 py-2 rounded-lg border border-gray-300 text-black"
+        />
+        <button type="submit" className="bg-gray-800 text-white px-4 py-2 rounded-lg">
+          Search
+        </button>
+      </form>
+
       {loading && posts.length === 0 ? (
         <div className="flex grid-cols-1 md:grid-cols-3 gap-6">Loading data...</div>
       ) : (
@@ -268,7 +324,16 @@ export default function AIDashboard() {
                 <p className="text-gray-700 mb-4">{post.post_summary}</p>
 
                 <h2 className="text-lg text-black font-semibold mb-2">Engagement Comment</h2>
-                <p className="text-gray-700 mb-4">{post.engagement_comment}</p>
+                {post.draft_status === "pending" ? (
+                  <button
+                    onClick={() => loadDraft(post._key || post.post_id)}
+                    className="mb-4 px-3 py-1 bg-gray-800 text-white rounded-sm text-sm"
+                  >
+                    Write draft
+                  </button>
+                ) : (
+                  <p className="text-gray-700 mb-4">{post.engagement_comment}</p>
+                )}
 
                 <h2 className="text-lg text-black font-semibold mb-2">Engagement Strategy</h2>
                 <p className="text-gray-700 mb-4">{post.engagement_strategy}</p>
@@ -1,9 +1,21 @@
-from typing import List, Dict
+import time
+from typing import List, Dict, Optional
 from config import Config
+from models import AnalysisResult
 
 UserArango = None
 
 from arango import ArangoClient
+from arango.exceptions import DocumentInsertError, DocumentRevisionError
+from arango.http import DefaultHTTPClient
+from arango_writer import BufferedArangoWriter
+from read_cache import read_cache
+
+
+# Fields of a search hit: what a dashboard card shows, without drafts' DM text or reasoning
+SEARCH_RESULT_FIELDS = ('_key', 'post_id', 'post_title', 'post_link', 'post_summary', 'author',
+                        'subreddit', 'intent', 'priority', 'sentiment', 'relevance_score', 'timestamp',
+                        'engagement_comment', 'engagement_strategy', 'draft_status', 'campaigns')
 
 
 class ArangoManager:
@@ -24,7 +36,14 @@ class ArangoManager:
         # else:
         #     # Fallback to direct python-arango client
 
-        root = ArangoClient(hosts=Config.ARANGO_HOST)
+        # Pool sized for the parallel chunk imports of BufferedArangoWriter
+        root = ArangoClient(
+            hosts=Config.ARANGO_HOST,
+            http_client=DefaultHTTPClient(
+                pool_connections=Config.ARANGO_POOL_SIZE,
+                pool_maxsize=Config.ARANGO_POOL_SIZE,
+            ),
+        )
         self.db = root.db(
             Config.ARANGO_DB,
             username=Config.ARANGO_USERNAME,
@@ -38,47 +57,148 @@ class ArangoManager:
         if not self.db.has_collection(self.collection_name):
             self.db.create_collection(self.collection_name)
         self.col = self.db.collection(self.collection_name)
+        # For readers tailing new writes (server-sent events) and newest-first pages;
+        # adding an index that already exists is a no-op
+        self.col.add_persistent_index(fields=['written_at'], sparse=True)
+        self.col.add_persistent_index(fields=['timestamp'])
+        # Posts of one campaign (see campaigns.py); docs from before campaigns have no entry
+        self.col.add_persistent_index(fields=['campaigns[*]'], sparse=True)
 
-    def add_results(self, results: List[Dict]):
-        """Insert results into ArangoDB collection"""
-        if not results:
-            return
-        docs = []
-        for result in results:
-            post = result.get('post_data', {})
-            sentiment = result.get('sentiment', {})
-            classification = result.get('classification', {})
-            engagement = result.get('engagement', {})
-            doc = {
-                'post_id': post.get('post_id'),
-                'post_link': post.get('link'),
-                'post_title': post.get('title'),
-                'post_summary': result.get('summary', ''),
-                'author': post.get('author'),
-                'subreddit': post.get('subreddit'),
-                'timestamp': post.get('timestamp'),
-                'relevance_score': classification.get('relevance_score', 0.0),
-                'is_relevant': classification.get('is_relevant', False),
-                'intent': classification.get('intent', ''),
-                'intent_score': classification.get('intent_score', 0.0),
-                'sentiment': sentiment.get('sentiment', ''),
-                'sentiment_score': sentiment.get('sentiment_level', 0.0),
-                'ai_reasoning': classification.get('reasoning', ''),
-                'engagement_comment': engagement.get('comment_draft', ''),
-                'engagement_dm': engagement.get('dm_draft', ''),
-                'engagement_strategy': engagement.get('strategy', ''),
-                'priority': engagement.get('priority', ''),
-            }
-            # Use post_id as _key for dedupe safety
-            if doc['post_id']:
-                doc['_key'] = doc['post_id']
-            docs.append(doc)
+    def _ensure_comment_collections(self):
+        """Create the comment document collection and the post -> comment edge collection"""
+        self.comments_collection_name = Config.ARANGO_COMMENTS_COLLECTION
+        self.comment_edges_collection_name = Config.ARANGO_COMMENT_EDGES_COLLECTION
+        if not self.db.has_collection(self.comments_collection_name):
+            self.db.create_collection(self.comments_collection_name)
+        if not self.db.has_collection(self.comment_edges_collection_name):
+            self.db.create_collection(self.comment_edges_collection_name, edge=True)
+        self.comments_col = self.db.collection(self.comments_collection_name)
+        self.comment_edges_col = self.db.collection(self.comment_edges_collection_name)
+
+    def _ensure_coordination_collection(self):
+        """Create the worker coordination collection; a TTL index drops expired entries"""
+        self.coordination_collection_name = Config.ARANGO_COORDINATION_COLLECTION
+        if not self.db.has_collection(self.coordination_collection_name):
+            self.db.create_collection(self.coordination_collection_name)
+            self.db.collection(self.coordination_collection_name).add_ttl_index(
+                fields=['expires_at'], expiry_time=0)
+        self.coordination_col = self.db.collection(self.coordination_collection_name)
+
+    def _ensure_search_view(self):
+        """
+        Create the ArangoSearch view over the posts collection, or update its links
+
+        Text fields are indexed with ARANGO_SEARCH_ANALYZER (and norms, for BM25);
+        facet fields with the identity analyzer. Arango keeps the view in sync
+        with the collection as posts are written.
+        """
+        self.search_view_name = Config.ARANGO_SEARCH_VIEW
+        text = {'analyzers': [Config.ARANGO_SEARCH_ANALYZER]}
+        properties = {
+            'links': {
+                self.collection_name: {
+                    'includeAllFields': False,
+                    'analyzers': ['identity'],
+                    'features': ['frequency', 'norm', 'position'],
+                    'fields': {
+                        'post_title': text,
+                        'post_summary': text,
+                        'ai_reasoning': text,
+                        'subreddit': {},
+                        'intent': {},
+                        'priority': {},
+                        'campaigns': {},
+                        'timestamp': {},
+                    },
+                },
+            },
+        }
+        if any(view['name'] == self.search_view_name for view in self.db.views()):
+            self.db.update_arangosearch_view(self.search_view_name, properties)
+        else:
+            # Stored newest first, so unranked (filter-only) pages stop after `limit` docs;
+            # the primary sort can only be set when the view is created
+            properties['primarySort'] = [{'field': 'timestamp', 'direction': 'desc'}]
+            self.db.create_arangosearch_view(self.search_view_name, properties)
+
+    def search_posts(self, query: str = '', subreddits: Optional[List[str]] = None,
+                     intents: Optional[List[str]] = None, priorities: Optional[List[str]] = None,
+                     start: Optional[str] = None, end: Optional[str] = None,
+                     limit: int = 20, offset: int = 0, campaigns: Optional[List[str]] = None) -> Dict:
+        """
+        Full-text search over post titles, summaries and AI reasoning, ranked by BM25
+
+        Args:
+            query: Search text; without it matches are returned newest first
+            subreddits, intents, priorities, campaigns: Facet values to keep (any of)
+            start, end: ISO timestamp range of the posts (start inclusive)
+            limit, offset: Page
 
+        Returns:
+            Dictionary with the total number of matches and the page of results
+        """
+        if not hasattr(self, 'search_view_name'):
+            self._ensure_search_view()
+        conditions = []
+        bind_vars = {'@view': self.search_view_name, 'offset': offset, 'limit': limit}
+        if query:
+            conditions.append(
+                "ANALYZER(d.post_title IN TOKENS(@query, @analyzer) OR "
+                "d.post_summary IN TOKENS(@query, @analyzer) OR "
+                "d.ai_reasoning IN TOKENS(@query, @analyzer), @analyzer)")
+            bind_vars.update(query=query, analyzer=Config.ARANGO_SEARCH_ANALYZER)
+        for field, values in (('subreddit', subreddits), ('intent', intents), ('priority', priorities),
+                              ('campaigns', campaigns)):
+            if values:
+                # Array fields (campaigns) match when any element is in the list
+                conditions.append(f"d.{field} IN @{field}")
+                bind_vars[field] = list(values)
+        if start:
+            conditions.append("d.timestamp >= @start")
+            bind_vars['start'] = start
+        if end:
+            conditions.append("d.timestamp < @end")
+            bind_vars['end'] = end
+
+        search = f"SEARCH {' AND '.join(conditions)}" if conditions else ""
+        fields = ', '.join(f"'{f}'" for f in SEARCH_RESULT_FIELDS)
+        order = "BM25(d) DESC" if query else "d.timestamp DESC"
         try:
-            self.col.import_bulk(docs, on_duplicate='update')
-            print(f"Inserted/updated {len(docs)} docs into Arango collection '{self.collection_name}'")
+            cursor = self.db.aql.execute(
+                f"""
+                FOR d IN @@view
+                  {search}
+                  SORT {order}
+                  LIMIT @offset, @limit
+                  RETURN MERGE(KEEP(d, {fields}),
+                               {{score: {'BM25(d)' if query else 0}}})
+                """,
+                bind_vars=bind_vars,
+                full_count=True,
+            )
+            results = list(cursor)
+            total = (cursor.statistics() or {}).get('fullCount', len(results))
+            return {'total': total, 'results': results}
         except Exception as e:
-            print(f"Error inserting into Arango: {str(e)}")
+            print(f"Error searching posts in Arango: {str(e)}")
+            return {'error': str(e), 'total': 0, 'results': []}
+
+    def writer(self, collection=None, **kwargs) -> BufferedArangoWriter:
+        """Return a write-behind writer for the posts collection (or another collection)"""
+        if collection is None:
+            # Post docs get written_at so the event stream can tail them
+            return BufferedArangoWriter(self.col, stamp='written_at',
+                                        on_flush=lambda: read_cache.invalidate('posts'), **kwargs)
+        return BufferedArangoWriter(collection, **kwargs)
+
+    def add_results(self, results: List[AnalysisResult]):
+        """Insert results into ArangoDB collection"""
+        if not results:
+            return
+        with self.writer() as writer:
+            writer.add_many([result.to_document() for result in results])
+        print(f"Inserted/updated {writer.stats['written']} docs into Arango collection "
+              f"'{self.collection_name}' ({writer.stats['failed']} failed)")
 
     def get_existing_post_ids(self, limit: int = 5000) -> set:
         """Return set of existing post_ids from the collection"""
@@ -96,6 +216,22 @@ class ArangoManager:
             print(f"Error reading existing post ids from Arango: {str(e)}")
             return set()
 
+    def get_stored_post_ids(self, post_ids: List[str]) -> set:
+        """Return which of post_ids are already stored (primary index lookups)"""
+        try:
+            cursor = self.db.aql.execute(
+                f"""
+                FOR d IN {self.collection_name}
+                  FILTER d._key IN @keys
+                  RETURN d._key
+                """,
+                bind_vars={'keys': list(post_ids)}
+            )
+            return set(cursor)
+        except Exception as e:
+            print(f"Error reading stored post ids from Arango: {str(e)}")
+            return set()
+
     def get_existing_posts(self, limit: int = 5000) -> list:
         """Return set of existing post_ids from the collection"""
         try:
@@ -114,16 +250,504 @@ class ArangoManager:
 
 
 
+    def iter_post_rows(self, fields: List[str], since: Optional[str] = None,
+                       batch_size: int = 5000):
+        """
+        Stream posts as value lists in `fields` order, projected server-side
+
+        The field 'timestamp_ms' is the post timestamp parsed by Arango to epoch
+        milliseconds. Rows are fetched batch_size at a time.
+
+        Args:
+            fields: Document fields (or 'timestamp_ms') per row
+            since: Only posts with timestamp >= this ISO string (uses the timestamp index)
+        """
+        columns = ', '.join('DATE_TIMESTAMP(d.timestamp)' if f == 'timestamp_ms' else f'd.`{f}`'
+                            for f in fields)
+        cursor = self.db.aql.execute(
+            f"""
+            FOR d IN {self.collection_name}
+              FILTER @since == null OR d.timestamp >= @since
+              RETURN [{columns}]
+            """,
+            bind_vars={'since': since},
+            batch_size=batch_size,
+            stream=True,
+        )
+        for row in cursor:
+            yield row
+
+    def get_posts_page(self, limit: int = 100, offset: int = 0, campaign: Optional[str] = None) -> list:
+        """Return one page of posts, newest first (only those relevant for `campaign` when given)"""
+        try:
+            bind_vars = {'offset': offset, 'limit': limit}
+            if campaign:
+                bind_vars['campaign'] = campaign
+            cursor = self.db.aql.execute(
+                f"""
+                FOR d IN {self.collection_name}
+                  {'FILTER @campaign IN d.campaigns' if campaign else ''}
+                  SORT d.timestamp DESC
+                  LIMIT @offset, @limit
+                  RETURN d
+                """,
+                bind_vars=bind_vars
+            )
+            return list(cursor)
+        except Exception as e:
+            print(f"Error reading posts from Arango: {str(e)}")
+            return []
+
+    def get_posts_written_since(self, since: float, after_key: Optional[str] = None,
+                                limit: int = 500) -> list:
+        """
+        Return posts in (written_at, _key) order, starting at an epoch time
+
+        Args:
+            since: Earliest written_at to return
+            after_key: When set, posts written exactly at `since` must sort after this key
+            limit: Page size
+        """
+        try:
+            cursor = self.db.aql.execute(
+                f"""
+                FOR d IN {self.collection_name}
+                  FILTER d.written_at > @since OR (d.written_at == @since AND d._key > @after_key)
+                  SORT d.written_at ASC, d._key ASC
+                  LIMIT @limit
+                  RETURN d
+                """,
+                bind_vars={'since': since, 'after_key': after_key or '', 'limit': limit}
+            )
+            return list(cursor)
+        except Exception as e:
+            print(f"Error reading new posts from Arango: {str(e)}")
+            return []
+
+    def iter_posts_written_between(self, since: float, after_key: Optional[str], until: float,
+                                   batch_size: int = 5000):
+        """
+        Stream posts in (written_at, _key) order from a cursor, batch_size at a time
+
+        Args:
+            since: Start after this written_at ...
+            after_key: ... or at it, for keys after this one
+            until: Last written_at to include
+        """
+        cursor = self.db.aql.execute(
+            f"""
+            FOR d IN {self.collection_name}
+              FILTER d.written_at <= @until
+              FILTER d.written_at > @since OR (d.written_at == @since AND d._key > @after_key)
+              SORT d.written_at ASC, d._key ASC
+              RETURN d
+            """,
+            bind_vars={'since': since, 'after_key': after_key or '', 'until': until},
+            batch_size=batch_size,
+            stream=True,
+        )
+        for doc in cursor:
+            yield doc
+
+    def iter_unstamped_posts(self, batch_size: int = 5000):
+        """Stream posts stored before writes stamped written_at (a full scan; written_at is a sparse index)"""
+        cursor = self.db.aql.execute(
+            f"""
+            FOR d IN {self.collection_name}
+              FILTER d.written_at == null
+              SORT d._key ASC
+              RETURN d
+            """,
+            batch_size=batch_size,
+            stream=True,
+        )
+        for doc in cursor:
+            yield doc
+
+    def get_post(self, post_id: str) -> Optional[Dict]:
+        """Return one stored post, or None"""
+        try:
+            return self.col.get(post_id)
+        except Exception as e:
+            print(f"Error reading post {post_id} from Arango: {str(e)}")
+            return None
+
+    def save_draft(self, post_id: str, fields: Dict) -> Optional[Dict]:
+        """
+        Store the engagement drafts of a post that is still draft pending
+
+        written_at is re-stamped so the post event feed pushes the drafted doc, and
+        post_body (kept only to write the draft) is removed.
+
+        Returns:
+            The updated doc, or None when the post was already drafted (or missing)
+        """
+        try:
+            cursor = self.db.aql.execute(
+                f"""
+                FOR d IN {self.collection_name}
+                  FILTER d._key == @key AND d.draft_status == 'pending'
+                  REPLACE d WITH MERGE(UNSET(d, 'post_body'), @fields) IN {self.collection_name}
+                  RETURN NEW
+                """,
+                bind_vars={'key': post_id, 'fields': dict(fields, written_at=time.time())}
+            )
+            updated = list(cursor)
+            if updated:
+                read_cache.invalidate('posts')
+            return updated[0] if updated else None
+        except Exception as e:
+            print(f"Error saving draft for {post_id}: {str(e)}")
+            return None
+
+    def get_comment_markers(self, post_ids: List[str]) -> Dict[str, float]:
+        """Return {post_id: created_utc of newest stored comment} for the given posts"""
+        if not post_ids:
+            return {}
+        try:
+            cursor = self.db.aql.execute(
+                f"""
+                FOR d IN {self.collection_name}
+                  FILTER d._key IN @keys AND d.comments_last_utc != null
+                  RETURN [d._key, d.comments_last_utc]
+                """,
+                bind_vars={'keys': list(post_ids)}
+            )
+            return {key: marker for key, marker in cursor}
+        except Exception as e:
+            print(f"Error reading comment markers from Arango: {str(e)}")
+            return {}
+
+    def add_comments(self, post_id: str, comments: List[Dict]):
+        """Store comments for a post, link them with edges and advance its marker"""
+        if not comments:
+            return
+        if not hasattr(self, 'comments_col'):
+            self._ensure_comment_collections()
+
+        docs = []
+        edges = []
+        for comment in comments:
+            doc = dict(comment)
+            doc['_key'] = comment['comment_id']
+            docs.append(doc)
+            edges.append({
+                '_key': comment['comment_id'],
+                '_from': f"{self.collection_name}/{post_id}",
+                '_to': f"{self.comments_collection_name}/{comment['comment_id']}",
+            })
+
+        try:
+            self.comments_col.import_bulk(docs, on_duplicate='update')
+            self.comment_edges_col.import_bulk(edges, on_duplicate='ignore')
+            self.db.aql.execute(
+                f"""
+                LET count = LENGTH(
+                  FOR e IN {self.comment_edges_collection_name}
+                    FILTER e._from == @start
+                    RETURN 1
+                )
+                UPDATE @key WITH {{
+                  comments_last_utc: @marker,
+                  comments_fetched_at: DATE_ISO8601(DATE_NOW()),
+                  comment_count: count
+                }} IN {self.collection_name} OPTIONS {{ ignoreErrors: true }}
+                """,
+                bind_vars={
+                    'key': post_id,
+                    'start': f"{self.collection_name}/{post_id}",
+                    'marker': max(c['created_utc'] for c in comments),
+                }
+            )
+            read_cache.invalidate('posts')
+        except Exception as e:
+            print(f"Error inserting comments into Arango: {str(e)}")
+
+    def get_post_comments(self, post_id: str) -> list:
+        """Return stored comments for a post via the edge collection, newest first"""
+        if not hasattr(self, 'comments_col'):
+            self._ensure_comment_collections()
+        try:
+            cursor = self.db.aql.execute(
+                f"""
+                FOR c IN 1..1 OUTBOUND @start {self.comment_edges_collection_name}
+                  SORT c.created_utc DESC
+                  RETURN c
+                """,
+                bind_vars={'start': f"{self.collection_name}/{post_id}"}
+            )
+            return list(cursor)
+        except Exception as e:
+            print(f"Error reading comments from Arango: {str(e)}")
+            return []
+
+    def try_lease(self, key: str, owner: str, ttl: float, **fields) -> bool:
+        """
+        Take or renew a lease in the coordination collection
+
+        A lease held by another owner can only be taken once it has expired (and,
+        for post claims, is not done). The takeover is a compare-and-swap on _rev,
+        so exactly one worker wins a contested lease.
+
+        Args:
+            key: Lease document key, e.g. 'lease:marketing' or 'claim:abc123'
+            owner: Worker id
+            ttl: Seconds until the lease expires unless renewed
+            **fields: Extra attributes stored on the lease document
+
+        Returns:
+            True if owner holds the lease now
+        """
+        if not hasattr(self, 'coordination_col'):
+            self._ensure_coordination_collection()
+        now = time.time()
+        doc = dict(fields, _key=key, owner=owner, expires_at=now + ttl)
+        try:
+            self.coordination_col.insert(doc)
+            return True
+        except DocumentInsertError:
+            pass  # Already exists; try to renew or steal it below
+        except Exception as e:
+            print(f"Error taking lease {key}: {str(e)}")
+            return False
+
+        try:
+            current = self.coordination_col.get(key)
+            if current is None:
+                return False
+            if current.get('owner') != owner and (current.get('done') or current.get('expires_at', 0) > now):
+                return False
+            self.coordination_col.update(dict(doc, _rev=current['_rev']), check_rev=True)
+            return True
+        except DocumentRevisionError:
+            return False  # Another worker changed it first
+        except Exception as e:
+            print(f"Error taking lease {key}: {str(e)}")
+            return False
+
+    def release_lease(self, key: str, owner: str):
+        """Drop a lease if owner still holds it"""
+        if not hasattr(self, 'coordination_col'):
+            self._ensure_coordination_collection()
+        try:
+            self.db.aql.execute(
+                f"""
+                FOR d IN {self.coordination_collection_name}
+                  FILTER d._key == @key AND d.owner == @owner
+                  REMOVE d IN {self.coordination_collection_name}
+                """,
+                bind_vars={'key': key, 'owner': owner}
+            )
+        except Exception as e:
+            print(f"Error releasing lease {key}: {str(e)}")
+
+    def heartbeat(self, worker_id: str, ttl: float):
+        """Record that a worker is alive for the next ttl seconds"""
+        if not hasattr(self, 'coordination_col'):
+            self._ensure_coordination_collection()
+        try:
+            self.coordination_col.insert({
+                '_key': f"worker:{worker_id}",
+                'kind': 'worker',
+                'owner': worker_id,
+                'expires_at': time.time() + ttl,
+            }, overwrite=True)
+        except Exception as e:
+            print(f"Error writing worker heartbeat: {str(e)}")
+
+    def live_workers(self) -> List[str]:
+        """Ids of workers whose heartbeat has not expired"""
+        return [d['owner'] for d in self._coordination_docs('worker')]
+
+    def get_leases(self) -> Dict[str, str]:
+        """Return {shard: owner} for unexpired subreddit leases"""
+        return {d['shard']: d['owner'] for d in self._coordination_docs('lease')}
+
+    def _coordination_docs(self, kind: str) -> list:
+        if not hasattr(self, 'coordination_col'):
+            self._ensure_coordination_collection()
+        try:
+            cursor = self.db.aql.execute(
+                f"""
+                FOR d IN {self.coordination_collection_name}
+                  FILTER d.kind == @kind AND d.expires_at > @now
+                  RETURN d
+                """,
+                bind_vars={'kind': kind, 'now': time.time()}
+            )
+            return list(cursor)
+        except Exception as e:
+            print(f"Error reading coordination state from Arango: {str(e)}")
+            return []
+
+    def claim_posts(self, post_ids: List[str], owner: str, ttl: float) -> List[str]:
+        """
+        Claim posts before scoring them
+
+        Returns:
+            The post ids this owner may score (unclaimed, or claimed by a worker
+            whose claim expired before it finished)
+        """
+        if not post_ids:
+            return []
+        if not hasattr(self, 'coordination_col'):
+            self._ensure_coordination_collection()
+        expires_at = time.time() + ttl
+        docs = [{'_key': f"claim:{pid}", 'kind': 'claim', 'post_id': pid, 'owner': owner,
+                 'done': False, 'expires_at': expires_at} for pid in post_ids]
+        try:
+            outcomes = self.coordination_col.insert_many(docs)
+        except Exception as e:
+            print(f"Error claiming posts: {str(e)}")
+            return []
+
+        claimed = []
+        for pid, outcome in zip(post_ids, outcomes):
+            # Conflicts come back as exception objects; fall back to a per-post takeover
+            if not isinstance(outcome, Exception) or \
+                    self.try_lease(f"claim:{pid}", owner, ttl, kind='claim', post_id=pid, done=False):
+                claimed.append(pid)
+        return claimed
+
+    def complete_claims(self, post_ids: List[str], owner: str):
+        """Mark claimed posts as done so no other worker scores them again"""
+        if not post_ids:
+            return
+        if not hasattr(self, 'coordination_col'):
+            self._ensure_coordination_collection()
+        try:
+            self.db.aql.execute(
+                f"""
+                FOR d IN {self.coordination_collection_name}
+                  FILTER d._key IN @keys AND d.owner == @owner
+                  UPDATE d WITH {{ done: true, expires_at: @expires_at }} IN {self.coordination_collection_name}
+                """,
+                bind_vars={
+                    'keys': [f"claim:{pid}" for pid in post_ids],
+                    'owner': owner,
+                    'expires_at': time.time() + Config.WORKER_CLAIM_RETENTION_HOURS * 3600,
+                }
+            )
+        except Exception as e:
+            print(f"Error completing claims: {str(e)}")
+
+    def get_checkpoint(self, name: str) -> Optional[str]:
+        """Return a stored resume point (e.g. the submission stream cursor)"""
+        if not hasattr(self, 'coordination_col'):
+            self._ensure_coordination_collection()
+        try:
+            doc = self.coordination_col.get(f"checkpoint:{name}")
+            return doc.get('value') if doc else None
+        except Exception as e:
+            print(f"Error reading checkpoint {name}: {str(e)}")
+            return None
+
+    def save_checkpoint(self, name: str, value: str):
+        """Store a resume point; checkpoints have no expires_at, so the TTL index keeps them"""
+        if not hasattr(self, 'coordination_col'):
+            self._ensure_coordination_collection()
+        try:
+            self.coordination_col.insert({
+                '_key': f"checkpoint:{name}",
+                'kind': 'checkpoint',
+                'value': value,
+                'updated_at': time.time(),
+            }, overwrite=True)
+        except Exception as e:
+            print(f"Error saving checkpoint {name}: {str(e)}")
+
+    def _ensure_feedback_collection(self):
+        """Create the engagement feedback collection, indexed by post"""
+        self.feedback_collection_name = f"{self.collection_name}_feedback"
+        if not self.db.has_collection(self.feedback_collection_name):
+            self.db.create_collection(self.feedback_collection_name)
+        self.feedback_col = self.db.collection(self.feedback_collection_name)
+        self.feedback_col.add_persistent_index(fields=['post_id'])
+
     def add_feedback(self, post_id: str, success: bool, notes: str = ""):
         """Store engagement feedback outcome"""
-        feedback_col = f"{self.collection_name}_feedback"
-        if not self.db.has_collection(feedback_col):
-            self.db.create_collection(feedback_col)
-        col = self.db.collection(feedback_col)
+        self.add_feedback_bulk([{'post_id': post_id, 'success': success, 'notes': notes}])
+
+    def add_feedback_bulk(self, items: List[Dict]) -> Dict:
+        """
+        Store many feedback outcomes with one import
+
+        Args:
+            items: Dicts with post_id, success and optional notes / ts (epoch
+                seconds, defaults to now)
+
+        Returns:
+            Dictionary with created and error counts
+        """
+        if not items:
+            return {'created': 0, 'errors': 0}
+        if not hasattr(self, 'feedback_col'):
+            self._ensure_feedback_collection()
+        now = time.time()
+        docs = [{
+            'post_id': str(item['post_id']),
+            'success': bool(item['success']),
+            'notes': item.get('notes') or '',
+            'ts': item.get('ts') or now,
+        } for item in items]
         try:
-            col.insert({'post_id': post_id, 'success': success, 'notes': notes, 'ts': None})
+            result = self.feedback_col.import_bulk(docs, halt_on_error=False)
+            return {'created': result.get('created', 0), 'errors': result.get('errors', 0)}
         except Exception as e:
             print(f"Error writing feedback: {str(e)}")
+            return {'created': 0, 'errors': len(docs)}
+
+    def get_feedback_outcomes(self, since: float = 0.0) -> list:
+        """
+        Join feedback with the scored posts it is about
+
+        Returns:
+            One dict per post with feedback since `since`: post_id, success (its
+            latest outcome), relevance_score, intent and priority
+        """
+        if not hasattr(self, 'feedback_col'):
+            self._ensure_feedback_collection()
+        try:
+            cursor = self.db.aql.execute(
+                f"""
+                FOR f IN {self.feedback_collection_name}
+                  FILTER f.ts >= @since
+                  COLLECT post_id = f.post_id INTO outcomes = {{ts: f.ts, success: f.success}}
+                  LET p = DOCUMENT({self.collection_name}, post_id)
+                  FILTER p != null
+                  RETURN {{
+                    post_id: post_id,
+                    success: FIRST(FOR o IN outcomes SORT o.ts DESC LIMIT 1 RETURN o.success),
+                    relevance_score: p.relevance_score,
+                    intent: p.intent,
+                    priority: p.priority
+                  }}
+                """,
+                bind_vars={'since': since}
+            )
+            return list(cursor)
+        except Exception as e:
+            print(f"Error reading feedback outcomes: {str(e)}")
+            return []
+
+    def get_calibration(self) -> Optional[Dict]:
+        """Return the stored threshold calibration (see calibration.py), or None"""
+        if not hasattr(self, 'coordination_col'):
+            self._ensure_coordination_collection()
+        try:
+            return self.coordination_col.get("calibration:thresholds")
+        except Exception as e:
+            print(f"Error reading calibration: {str(e)}")
+            return None
+
+    def save_calibration(self, doc: Dict):
+        if not hasattr(self, 'coordination_col'):
+            self._ensure_coordination_collection()
+        try:
+            self.coordination_col.insert(dict(doc, _key="calibration:thresholds", kind='calibration',
+                                              updated_at=time.time()), overwrite=True)
+        except Exception as e:
+            print(f"Error saving calibration: {str(e)}")
 
     # def weekly_trends(self, weeks: int = 4):
     #     """Return weekly counts and average scores by intent and sentiment"""
@@ -146,23 +770,154 @@ class ArangoManager:
     #     except Exception as e:
     #         print(f"Error computing trends: {str(e)}")
     #         return []
-    def insert_weekly_trends(self,doc):
-        self.collection_name_week="gmt_weekly_analysis"
+    def _ensure_weekly_collection(self):
+        self.collection_name_week = "gmt_weekly_analysis"
+        if not self.db.has_collection(self.collection_name_week):
+            self.db.create_collection(self.collection_name_week)
         self.coll = self.db.collection(self.collection_name_week)
+        # Latest/range reads and downsampling walk this index instead of sorting the collection
+        self.coll.add_persistent_index(fields=['resolution', 'ts'])
+        self.coll.add_persistent_index(fields=['ts'])
+        try:
+            # Snapshots stored before ts/resolution existed
+            self.db.aql.execute(
+                f"""
+                FOR doc IN {self.collection_name_week}
+                  FILTER doc.ts == null
+                  UPDATE doc WITH {{ts: DATE_TIMESTAMP(doc.timestamp) / 1000, resolution: 'snapshot'}}
+                  IN {self.collection_name_week}
+                """
+            )
+        except Exception as e:
+            print(f"Error migrating weekly analysis docs: {str(e)}")
+
+    def insert_weekly_trends(self, doc: Dict) -> List[Dict]:
+        """
+        Store one analysis snapshot
+
+        Returns:
+            [stored doc], or [] when the insert failed
+        """
+        if not hasattr(self, 'coll'):
+            self._ensure_weekly_collection()
+        try:
+            doc = dict(doc, ts=doc.get('ts') or time.time(), resolution='snapshot')
+            result = self.coll.insert(doc, return_new=True)
+            read_cache.invalidate('weekly')
+            print(f"Inserted weekly analysis into Arango collection '{self.collection_name_week}'")
+            # The new doc is the latest one; no need to read it back
+            return [result['new']]
+        except Exception as e:
+            print(f"Error inserting into Arango: {str(e)}")
+            return []
+
+    def get_latest_weekly_trends(self) -> Optional[Dict]:
+        """Return the most recent weekly analysis (one seek on the ts index)"""
+        if not hasattr(self, 'coll'):
+            self._ensure_weekly_collection()
         try:
-            self.coll.insert(doc)
             cursor = self.db.aql.execute(
                 f"""
-            FOR doc IN {self.collection_name_week}
-                SORT doc.timestamp DESC
-                LIMIT 1
-                RETURN doc
-            """,
-                bind_vars={}
+                FOR doc IN {self.collection_name_week}
+                  SORT doc.ts DESC
+                  LIMIT 1
+                  RETURN doc
+                """
             )
+            latest = list(cursor)
+            return latest[0] if latest else None
+        except Exception as e:
+            print(f"Error reading weekly analysis from Arango: {str(e)}")
+            return None
 
-            print(f"Inserted/updated {len(doc)} docs into Arango collection '{self.collection_name}'")
+    def get_weekly_trends_range(self, start: float = 0.0, end: Optional[float] = None,
+                                resolution: Optional[str] = None, limit: int = 1000) -> list:
+        """
+        Return analysis snapshots with start <= ts < end, oldest first
+
+        Args:
+            start: Epoch seconds
+            end: Epoch seconds (defaults to now)
+            resolution: Only 'snapshot', 'daily', 'weekly' or 'monthly' docs (default: all)
+            limit: Max docs returned
+        """
+        if not hasattr(self, 'coll'):
+            self._ensure_weekly_collection()
+        resolution_filter = "FILTER doc.resolution == @resolution" if resolution else ""
+        bind_vars = {'start': start, 'end': end or time.time(), 'limit': limit}
+        if resolution:
+            bind_vars['resolution'] = resolution
+        try:
+            cursor = self.db.aql.execute(
+                f"""
+                FOR doc IN {self.collection_name_week}
+                  {resolution_filter}
+                  FILTER doc.ts >= @start AND doc.ts < @end
+                  SORT doc.ts ASC
+                  LIMIT @limit
+                  RETURN doc
+                """,
+                bind_vars=bind_vars
+            )
             return list(cursor)
         except Exception as e:
-            print(f"Error inserting into Arango: {str(e)}")
-            return e
\ No newline at end of file
+            print(f"Error reading weekly analysis history from Arango: {str(e)}")
+            return []
+
+    def downsample_weekly_trends(self, now: Optional[float] = None) -> Dict[str, int]:
+        """
+        Roll old snapshots up to coarser resolutions, keeping the last doc per bucket
+
+        Only buckets that end before the age cutoff are rolled up, so a bucket is
+        never split between two runs (which would leave two docs in it).
+
+        Returns:
+            Resolution -> number of docs rolled up into it
+        """
+        if not hasattr(self, 'coll'):
+            self._ensure_weekly_collection()
+        now = now or time.time()
+        rolled = {}
+        for source, target, bucket_seconds, max_age_days in snapshot_rollups():
+            try:
+                groups = list(self.db.aql.execute(
+                    f"""
+                    FOR doc IN {self.collection_name_week}
+                      FILTER doc.resolution == @source
+                      FILTER FLOOR(doc.ts / @width) * @width + @width <= @before
+                      COLLECT bucket = FLOOR(doc.ts / @width) INTO docs = {{_key: doc._key, ts: doc.ts}}
+                      RETURN docs
+                    """,
+                    bind_vars={'source': source, 'before': now - max_age_days * 86400,
+                               'width': bucket_seconds}
+                ))
+                keep, drop = rollup_buckets(groups)
+                if drop:
+                    self.coll.delete_many([{'_key': key} for key in drop])
+                if keep:
+                    self.coll.update_many([{'_key': key, 'resolution': target} for key in keep])
+                rolled[target] = len(keep)
+            except Exception as e:
+                print(f"Error downsampling weekly analysis ({source} -> {target}): {str(e)}")
+        if any(rolled.values()):
+            read_cache.invalidate('weekly')
+        return rolled
+
+
+def snapshot_rollups() -> List[tuple]:
+    """(resolution, next resolution, bucket seconds, age in days before rolling up)"""
+    return [
+        ('snapshot', 'daily', 86400, Config.SNAPSHOT_RAW_DAYS),
+        ('daily', 'weekly', 7 * 86400, Config.SNAPSHOT_DAILY_DAYS),
+        ('weekly', 'monthly', 30 * 86400, Config.SNAPSHOT_WEEKLY_DAYS),
+    ]
+
+
+def rollup_buckets(groups: List[List[Dict]]) -> tuple:
+    """Split bucketed {_key, ts} docs into (keys kept, newest per bucket) and (keys dropped)"""
+    keep, drop = [], []
+    for docs in groups:
+        docs = sorted(docs, key=lambda d: d['ts'])
+        keep.append(docs[-1]['_key'])
+        drop.extend(d['_key'] for d in docs[:-1])
+    return keep, drop
@@ -0,0 +1,166 @@
+"""
+Write-behind buffered writer for ArangoDB bulk imports
+"""
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import Callable, Dict, List, Optional
+from config import Config
+from profiling import span
+
+_POSITION = re.compile(r"at position (\d+)")
+
+
+class BufferedArangoWriter:
+    """Buffer documents and import them in size/time-bounded chunks on a worker pool"""
+
+    def __init__(self, collection, chunk_size: Optional[int] = None,
+                 flush_interval: Optional[float] = None, workers: Optional[int] = None,
+                 retries: Optional[int] = None, on_duplicate: str = 'update',
+                 stamp: Optional[str] = None, on_flush: Optional[Callable[[], None]] = None):
+        """
+        Args:
+            collection: python-arango collection (or anything with import_bulk)
+            chunk_size: Docs per import_bulk call (defaults to config value)
+            flush_interval: Max seconds a doc waits in the buffer (defaults to config value)
+            workers: Parallel import_bulk calls (defaults to config value)
+            retries: Extra attempts for the docs of a chunk that failed (defaults to config value)
+            on_duplicate: import_bulk on_duplicate policy
+            stamp: Attribute set to the import time (epoch seconds) on every doc,
+                e.g. 'written_at' for readers that tail the collection
+            on_flush: Called after a chunk stored at least one doc (e.g. cache invalidation)
+        """
+        self.col = collection
+        self.chunk_size = chunk_size or Config.ARANGO_WRITE_CHUNK_SIZE
+        self.flush_interval = flush_interval or Config.ARANGO_FLUSH_SECONDS
+        self.retries = Config.ARANGO_WRITE_RETRIES if retries is None else retries
+        self.on_duplicate = on_duplicate
+        self.stamp = stamp
+        self.on_flush = on_flush
+        self.stats = {'written': 0, 'failed': 0, 'retried': 0, 'chunks': 0}
+        self.errors = []
+        # _key of every doc that may not have been stored
+        self.failed_keys = set()
+
+        self._buffer = []
+        self._oldest = None
+        self._lock = threading.Lock()
+        self._pending = set()
+        self._pool = ThreadPoolExecutor(max_workers=workers or Config.ARANGO_WRITE_WORKERS)
+        self._closed = threading.Event()
+        self._timer = threading.Thread(target=self._flush_loop, daemon=True)
+        self._timer.start()
+
+    def __enter__(self) -> 'BufferedArangoWriter':
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def add(self, doc: Dict):
+        """Buffer one document; a full buffer is handed to the pool immediately"""
+        self.add_many([doc])
+
+    def add_many(self, docs: List[Dict]):
+        chunks = []
+        with self._lock:
+            for doc in docs:
+                if self._oldest is None:
+                    self._oldest = time.monotonic()
+                self._buffer.append(doc)
+                if len(self._buffer) >= self.chunk_size:
+                    chunks.append(self._take())
+        for chunk in chunks:
+            self._submit(chunk)
+
+    def flush(self, wait_for_writes: bool = True):
+        """Send whatever is buffered; optionally block until every chunk has landed"""
+        with self._lock:
+            chunk = self._take()
+        if chunk:
+            self._submit(chunk)
+        if wait_for_writes:
+            with self._lock:
+                pending = list(self._pending)
+            wait(pending)
+
+    def close(self):
+        """Flush everything and stop the pool; call on shutdown"""
+        if self._closed.is_set():
+            return
+        self._closed.set()
+        self._timer.join()
+        self.flush()
+        self._pool.shutdown(wait=True)
+
+    def _take(self) -> List[Dict]:
+        # Caller holds self._lock
+        chunk, self._buffer, self._oldest = self._buffer, [], None
+        return chunk
+
+    def _submit(self, chunk: List[Dict]):
+        future = self._pool.submit(self._import_chunk, chunk)
+        with self._lock:
+            self._pending.add(future)
+        future.add_done_callback(self._done)
+
+    def _done(self, future):
+        with self._lock:
+            self._pending.discard(future)
+
+    def _flush_loop(self):
+        while not self._closed.wait(min(1.0, self.flush_interval / 2)):
+            with self._lock:
+                due = self._oldest is not None and time.monotonic() - self._oldest >= self.flush_interval
+                chunk = self._take() if due else None
+            if chunk:
+                self._submit(chunk)
+
+    def _import_chunk(self, docs: List[Dict]):
+        """Import one chunk, retrying only the documents reported as failed"""
+        attempt = 0
+        while docs:
+            if self.stamp:
+                written_at = time.time()
+                for doc in docs:
+                    doc[self.stamp] = written_at
+            try:
+                with span('arango.import', docs=len(docs)):
+                    result = self.col.import_bulk(docs, on_duplicate=self.on_duplicate,
+                                                  halt_on_error=False, details=True)
+                details = result.get('details') or []
+                positions = sorted({int(m.group(1)) for d in details for m in [_POSITION.search(d)] if m})
+                failed = [docs[i] for i in positions if i < len(docs)]
+                unplaced = max(0, result.get('errors', 0) - len(failed))
+            except Exception as e:
+                details = [str(e)]
+                failed = docs
+                unplaced = 0
+
+            written = len(docs) - len(failed) - unplaced
+            with self._lock:
+                self.stats['chunks'] += 1
+                self.stats['written'] += written
+                self.stats['failed'] += unplaced
+                if unplaced:
+                    # Errors without a position: any doc of the chunk may be the one
+                    self.failed_keys.update(doc.get('_key') for doc in docs)
+            if written and self.on_flush is not None:
+                self.on_flush()
+
+            if not failed:
+                return
+            if attempt >= self.retries:
+                with self._lock:
+                    self.stats['failed'] += len(failed)
+                    self.errors.extend(details[:10])
+                    self.failed_keys.update(doc.get('_key') for doc in failed)
+                print(f"Error importing {len(failed)} docs into Arango: {details[:3]}")
+                return
+
+            attempt += 1
+            with self._lock:
+                self.stats['retried'] += len(failed)
+            time.sleep(0.5 * 2 ** (attempt - 1))
+            docs = failed
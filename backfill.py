@@ -0,0 +1,295 @@
+"""
+Backfill gtm_posts from local Reddit archive dumps
+
+The dumps are zstd-compressed NDJSON with one submission per line (monthly
+RS_YYYY-MM.zst files or per-subreddit <name>_submissions.zst files). Each file
+is decompressed as a stream in this process. Blocks of lines go to a pool of
+worker processes, which parse them and filter by subreddit, keyword and date.
+Matching posts are then scored and stored by the same steps as a live run
+(GTMAutomationWorkflow.process_posts).
+
+A zstd stream can't be split, so decompression stays in one process. JSON
+parsing and matching, which cost the most, are what scale with cores.
+
+Progress is checkpointed per file as the decompressed byte offset up to which
+matches are stored. A restart skips to that offset: the bytes before it are
+decompressed again but not parsed.
+
+Usage:
+    python backfill.py dumps/RS_2024-0*.zst
+    python backfill.py dumps/startups_submissions.zst --subreddits startups --after 2024-01-01
+"""
+import json
+import os
+import time
+from collections import deque
+from datetime import datetime
+from multiprocessing import Pool
+from typing import Dict, Iterator, List, Optional, Tuple
+from config import Config
+from models import Post
+
+# Filters of a pool process, set by _init_worker
+_filters = {}
+
+
+def _init_worker(subreddits: List[str], keywords: List[str],
+                 after: Optional[float], before: Optional[float]):
+    keywords = [k.lower() for k in keywords]
+    _filters.update(
+        subreddits=set(s.lower() for s in subreddits),
+        keywords=keywords,
+        after=after,
+        before=before,
+        # Raw-line prechecks: a matching record must contain these bytes before JSON decoding.
+        # Only usable when JSON escaping can't change how a keyword appears in the line.
+        raw_subreddits=[s.lower().encode() for s in subreddits],
+        raw_keywords=([k.encode() for k in keywords]
+                      if all(k.isascii() and not set(k) & set('"\\/') for k in keywords) else None),
+    )
+
+
+def filter_block(block: bytes) -> Tuple[int, List[Post]]:
+    """
+    Parse one block of whole dump lines in a pool process
+
+    Returns:
+        Number of lines read and the posts that matched
+    """
+    subreddits, keywords = _filters['subreddits'], _filters['keywords']
+    raw_subreddits, raw_keywords = _filters['raw_subreddits'], _filters['raw_keywords']
+    after, before = _filters['after'], _filters['before']
+    matches = []
+    lines = block.splitlines()
+    for line in lines:
+        lowered = line.lower()
+        if raw_subreddits and not any(s in lowered for s in raw_subreddits):
+            continue
+        if raw_keywords is not None and not any(k in lowered for k in raw_keywords):
+            continue
+        try:
+            data = json.loads(line)
+            if subreddits and (data.get('subreddit') or '').lower() not in subreddits:
+                continue
+            created = float(data['created_utc'])
+            if (after is not None and created < after) or (before is not None and created >= before):
+                continue
+            text = f"{data.get('title') or ''} {data.get('selftext') or ''}".lower()
+            if not any(keyword in text for keyword in keywords):
+                continue
+            matches.append(Post.from_archive(data))
+        except (KeyError, TypeError, ValueError):
+            # Truncated lines, comment records or other non-submission data
+            continue
+    return len(lines), matches
+
+
+def read_blocks(path: str, skip: int = 0, block_bytes: Optional[int] = None) -> Iterator[bytes]:
+    """
+    Stream a dump file as blocks of whole lines (split on the worker, not here)
+
+    Args:
+        path: .zst dump (any other file is read as plain NDJSON)
+        skip: Decompressed bytes to skip from the start (already checkpointed)
+        block_bytes: Approximate bytes per block (defaults to config value)
+    """
+    block_bytes = block_bytes or Config.BACKFILL_BLOCK_BYTES
+    with open(path, 'rb') as fh:
+        if path.endswith('.zst'):
+            import zstandard
+            # The archive dumps are compressed with a long window (up to 2 GB)
+            reader = zstandard.ZstdDecompressor(max_window_size=2 ** 31).stream_reader(fh)
+        else:
+            reader = fh
+        while skip > 0:
+            data = reader.read(min(skip, block_bytes))
+            if not data:
+                return
+            skip -= len(data)
+        tail = b''
+        while True:
+            data = reader.read(block_bytes)
+            if not data:
+                if tail:
+                    yield tail
+                return
+            data = tail + data
+            cut = data.rfind(b'\n') + 1
+            tail = data[cut:]
+            if cut:
+                yield data[:cut]
+
+
+class ArchiveBackfill:
+    """Score matching posts from archive dumps through a workflow, with per-file checkpoints"""
+
+    def __init__(self, workflow, subreddits: Optional[List[str]] = None,
+                 keywords: Optional[List[str]] = None, after: Optional[datetime] = None,
+                 before: Optional[datetime] = None, workers: Optional[int] = None,
+                 block_bytes: Optional[int] = None, batch_size: Optional[int] = None,
+                 dry_run: bool = False, notify: bool = False, comments: bool = False):
+        """
+        Args:
+            workflow: GTMAutomationWorkflow whose scoring and storage steps are used
+            subreddits: Subreddits to keep (defaults to those of all campaigns; empty keeps all)
+            keywords: Keywords to match (defaults to those of all campaigns)
+            after: Keep posts created at or after this time
+            before: Keep posts created before this time
+            workers: Pool processes (defaults to config value)
+            block_bytes: Decompressed bytes per pool task (defaults to config value)
+            batch_size: Posts per workflow pass and checkpoint (defaults to config value)
+            dry_run: Passed to workflow.process_posts; checkpoints are not stored
+            notify: Send Slack alerts for high-priority historical posts
+            comments: Fetch comment threads of relevant posts from Reddit
+        """
+        self.workflow = workflow
+        self.subreddits = workflow.monitor.subreddits if subreddits is None else subreddits
+        self.keywords = workflow.monitor.keywords if keywords is None else keywords
+        self.after = after.timestamp() if after else None
+        self.before = before.timestamp() if before else None
+        self.workers = workers or Config.BACKFILL_WORKERS
+        self.block_bytes = block_bytes or Config.BACKFILL_BLOCK_BYTES
+        self.batch_size = batch_size or Config.BACKFILL_BATCH_SIZE
+        self.dry_run = dry_run
+        self.stats = {'files': 0, 'lines': 0, 'matched': 0, 'duplicates': 0,
+                      'processed': 0, 'relevant': 0, 'high_priority': 0,
+                      'scan_s': 0.0, 'score_s': 0.0}
+
+        # Alerts about old posts are noise, and comment fetching spends the live Reddit budget
+        if not notify:
+            workflow.slack = None
+        if not comments:
+            workflow.comments = None
+
+    def _arango(self):
+        return None if self.dry_run else getattr(self.workflow, 'arango', None)
+
+    def run(self, paths: List[str]) -> Dict:
+        """Backfill every file in order; returns the stats with throughput"""
+        start = time.monotonic()
+        with Pool(self.workers, initializer=_init_worker,
+                  initargs=(self.subreddits, self.keywords, self.after, self.before)) as pool:
+            for path in paths:
+                self.backfill_file(pool, path)
+        return self.report(time.monotonic() - start)
+
+    def backfill_file(self, pool, path: str):
+        """Scan one dump from its checkpoint, scoring matches every batch_size posts"""
+        arango = self._arango()
+        checkpoint = f"backfill:{os.path.basename(path)}"
+        resume = arango.get_checkpoint(checkpoint) if arango is not None else None
+        if resume == 'done':
+            print(f"[backfill] {path}: already done")
+            return
+        offset = int(resume or 0)
+        print(f"[backfill] {path}: starting at byte {offset}")
+
+        pending = []
+        inflight = deque()
+        scan_start = time.monotonic()
+
+        def collect(size, result):
+            nonlocal offset, pending
+            count, posts = result
+            offset += size
+            self.stats['lines'] += count
+            self.stats['matched'] += len(posts)
+            pending.extend(posts)
+            if len(pending) >= self.batch_size:
+                self._score(pending)
+                pending = []
+                if arango is not None:
+                    arango.save_checkpoint(checkpoint, str(offset))
+                self._progress(path, offset)
+
+        # Results are taken in order, so a checkpoint never skips an unscored block.
+        # At most two blocks per worker are read ahead.
+        for block in read_blocks(path, offset, self.block_bytes):
+            inflight.append((len(block), pool.apply_async(filter_block, (block,))))
+            if len(inflight) >= self.workers * 2:
+                size, result = inflight.popleft()
+                collect(size, result.get())
+        while inflight:
+            size, result = inflight.popleft()
+            collect(size, result.get())
+        if pending:
+            self._score(pending)
+        if arango is not None:
+            arango.save_checkpoint(checkpoint, 'done')
+        self.stats['files'] += 1
+        self.stats['scan_s'] += time.monotonic() - scan_start
+        self._progress(path, offset)
+
+    def _score(self, posts: List[Post]):
+        start = time.monotonic()
+        arango = self._arango()
+        if arango is not None:
+            # Dumps overlap (monthly and per-subreddit files), and live runs may have stored a post already
+            ids = [p.post_id for p in posts]
+            stored = arango.get_stored_post_ids(ids)
+            self.workflow.processed_post_ids |= stored
+            self.stats['duplicates'] += sum(1 for i in ids if i in self.workflow.processed_post_ids)
+        summary = self.workflow.process_posts(posts, dry_run=self.dry_run)
+        self.stats['processed'] += summary.get('processed', 0)
+        self.stats['relevant'] += summary.get('relevant_posts', 0)
+        self.stats['high_priority'] += summary.get('high_priority', 0)
+        self.stats['score_s'] += time.monotonic() - start
+
+    def _progress(self, path: str, offset: int):
+        print(f"[backfill] {os.path.basename(path)}: {offset / 2 ** 20:.0f} MB read, "
+              f"{self.stats['lines']} posts scanned, {self.stats['matched']} matched, "
+              f"{self.stats['processed']} scored")
+
+    def report(self, wall_s: float) -> Dict:
+        """Stats plus throughput: scan rate (dump posts/sec) and scoring rate (matched posts/sec)"""
+        # Scoring runs between scan blocks, so scan time excludes it
+        scan_s = max(self.stats['scan_s'] - self.stats['score_s'], 1e-9)
+        return dict(
+            self.stats,
+            wall_s=wall_s,
+            workers=self.workers,
+            scanned_posts_per_s=self.stats['lines'] / scan_s,
+            scored_posts_per_s=self.stats['matched'] / self.stats['score_s'] if self.stats['score_s'] else 0.0,
+        )
+
+
+def main():
+    """Main entry point"""
+    import argparse
+    from workflow import GTMAutomationWorkflow
+
+    parser = argparse.ArgumentParser(description='GTM backfill from Reddit archive dumps')
+    parser.add_argument('paths', nargs='+', help='zstd NDJSON submission dumps, processed in order')
+    parser.add_argument('--subreddits', help='Comma-separated subreddits (defaults to SUBREDDITS)')
+    parser.add_argument('--any-subreddit', action='store_true', help='Do not filter by subreddit')
+    parser.add_argument('--keywords', help='Comma-separated keywords (defaults to KEYWORDS)')
+    parser.add_argument('--after', type=datetime.fromisoformat, help='Keep posts created on/after this date')
+    parser.add_argument('--before', type=datetime.fromisoformat, help='Keep posts created before this date')
+    parser.add_argument('--workers', type=int, help='Pool processes (defaults to BACKFILL_WORKERS)')
+    parser.add_argument('--notify', action='store_true', help='Send Slack alerts for high-priority posts')
+    parser.add_argument('--comments', action='store_true', help='Fetch comment threads of relevant posts')
+    parser.add_argument('--dry-run', action='store_true',
+                        help='Run without writing to ArangoDB or sending notifications')
+    args = parser.parse_args()
+
+    subreddits = [s.strip() for s in args.subreddits.split(',')] if args.subreddits else None
+    if args.any_subreddit:
+        subreddits = []
+    keywords = [k.strip() for k in args.keywords.split(',') if k.strip()] if args.keywords else None
+
+    workflow = GTMAutomationWorkflow(dry_run=args.dry_run)
+    backfill = ArchiveBackfill(workflow, subreddits=subreddits, keywords=keywords,
+                               after=args.after, before=args.before, workers=args.workers,
+                               dry_run=args.dry_run, notify=args.notify, comments=args.comments)
+    try:
+        report = backfill.run(args.paths)
+    except KeyboardInterrupt:
+        print("\nStopping backfill (resumes from the last checkpoint)...")
+        return
+    print(f"\nBackfill: {report['lines']} dump posts scanned at {report['scanned_posts_per_s']:.0f} posts/s "
+          f"({report['workers']} workers), {report['matched']} matched, {report['processed']} scored "
+          f"at {report['scored_posts_per_s']:.1f} posts/s, {report['duplicates']} already stored")
+
+
+if __name__ == "__main__":
+    main()
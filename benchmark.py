@@ -0,0 +1,323 @@
+"""
+Offline throughput benchmark for GTMAutomationWorkflow.run
+
+Usage:
+    python benchmark.py record --out fixtures/run1
+    python benchmark.py replay --fixtures fixtures/run1 --latency-ms 400 --error-rate 0.02
+    python benchmark.py trends --posts 200000
+"""
+import argparse
+import contextlib
+import io
+import json
+import random
+import statistics
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+from config import Config
+from reddit_monitor import RedditMonitor
+from ai_scorer import AIScorer
+from engagement_generator import EngagementGenerator
+from llm_router import LLMRouter, GeminiProvider
+from workflow import GTMAutomationWorkflow
+from trends_analyzer import load_posts_frame
+from replay import (
+    InMemoryArango, RecordingReddit, RecordingGenAI, FaultInjector,
+    build_replay_workflow, load_fixtures, save_fixtures, synthetic_fixtures
+)
+
+# Stage name -> (workflow attribute, method name)
+STAGES = [
+    ('fetch', 'monitor', 'search_posts'),
+    ('classify', 'scorer', 'classify_and_score'),
+    ('summary', 'scorer', 'generate_summary'),
+    ('sentiment', 'scorer', 'generate_sentiment'),
+    ('engagement', 'engagement_gen', 'generate_suggestion'),
+    ('comments', 'comments', 'ingest'),
+    ('notify', 'slack', 'notify_high_priority_post'),
+]
+
+
+def _serial(workflow: GTMAutomationWorkflow):
+    workflow.comments.max_workers = 1
+
+
+def _concurrent(workflow: GTMAutomationWorkflow):
+    workflow.comments.max_workers = Config.COMMENT_FETCH_WORKERS
+
+
+def _hedged(workflow: GTMAutomationWorkflow):
+    _concurrent(workflow)
+    workflow.scorer.client.hedge = True
+
+
+def _lazy_drafts(workflow: GTMAutomationWorkflow):
+    _concurrent(workflow)
+    workflow.lazy_drafts = True
+
+
+# Variant name -> function that configures a freshly built workflow
+VARIANTS = {
+    'serial': _serial,
+    'concurrent': _concurrent,
+    'hedged': _hedged,
+    'lazy_drafts': _lazy_drafts,
+}
+
+
+class StageTimer:
+    """Record wall-clock time of instance methods by wrapping them in place"""
+
+    def __init__(self):
+        self.samples = {}
+
+    def wrap(self, obj, method_name: str, stage: str):
+        original = getattr(obj, method_name, None)
+        if original is None:
+            return
+        samples = self.samples.setdefault(stage, [])
+
+        def timed(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return original(*args, **kwargs)
+            finally:
+                samples.append(time.perf_counter() - start)
+
+        setattr(obj, method_name, timed)
+
+    def report(self) -> Dict:
+        report = {}
+        for stage, samples in self.samples.items():
+            if not samples:
+                continue
+            ordered = sorted(samples)
+            report[stage] = {
+                'calls': len(samples),
+                'mean_ms': statistics.mean(samples) * 1000,
+                'p50_ms': ordered[len(ordered) // 2] * 1000,
+                'p95_ms': ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))] * 1000,
+                'total_s': sum(samples),
+            }
+        return report
+
+
+def record(out_dir: str):
+    """Run the workflow against live Reddit/Gemini in dry-run mode and save fixtures"""
+    monitor = RedditMonitor()
+    reddit = RecordingReddit(monitor.reddit)
+    monitor.reddit = reddit
+
+    from google import genai
+    # Fixtures hold Gemini responses, so recording routes every call to Gemini
+    llm = RecordingGenAI(genai.Client(api_key=Config.GEMINI_API_KEY))
+    router = LLMRouter({'gemini': GeminiProvider(llm)})
+    scorer = AIScorer(router=router)
+    engagement_gen = EngagementGenerator(router=router)
+
+    workflow = GTMAutomationWorkflow(dry_run=True, monitor=monitor, scorer=scorer,
+                                     engagement_gen=engagement_gen)
+    workflow.run(dry_run=True)
+    reddit.record_comments(reddit.post_ids())
+    save_fixtures(out_dir, reddit, llm)
+    print(f"Recorded {len(reddit.post_ids())} posts and {len(llm.calls)} LLM responses to {out_dir}")
+
+
+def replay(fixtures: Dict, variant: str, latency_ms: float, jitter_ms: float,
+           error_rate: float, seed: Optional[int], verbose: bool = False) -> Dict:
+    """Replay fixtures through the workflow once and return throughput numbers"""
+    faults = FaultInjector(latency_ms, jitter_ms, error_rate, seed)
+    quiet = contextlib.nullcontext if verbose else lambda: contextlib.redirect_stdout(io.StringIO())
+    with quiet():
+        workflow, reddit, llm = build_replay_workflow(fixtures, faults)
+    VARIANTS[variant](workflow)
+
+    timer = StageTimer()
+    for stage, attr, method_name in STAGES:
+        component = getattr(workflow, attr, None)
+        if component is not None:
+            timer.wrap(component, method_name, stage)
+
+    start = time.perf_counter()
+    with quiet():
+        summary = workflow.run(dry_run=False)
+    wall = time.perf_counter() - start
+
+    posts = summary.get('new_posts', 0)
+    return {
+        'variant': variant,
+        'posts': posts,
+        'relevant_posts': summary.get('relevant_posts', 0),
+        'wall_s': wall,
+        'posts_per_s': posts / wall if wall else 0.0,
+        'llm_calls': llm.calls,
+        'llm_calls_per_post': llm.calls / posts if posts else 0.0,
+        'llm_fixture_misses': llm.misses,
+        'input_tokens_per_post': sum(u['input_tokens'] for u in summary.get('token_usage', {}).values()) / posts
+        if posts else 0.0,
+        'reddit_calls': reddit.calls,
+        'injected_errors': faults.injected_errors,
+        'llm_hedging': summary.get('llm_hedging', {}),
+        'stages': timer.report(),
+    }
+
+
+def print_report(results: List[Dict]):
+    print("\n" + "=" * 72)
+    print("REPLAY BENCHMARK")
+    print("=" * 72)
+    print(f"{'variant':<12}{'posts':>7}{'wall_s':>10}{'posts/s':>10}{'llm/post':>10}{'tok/post':>10}{'errors':>8}"
+          f"{'misses':>8}")
+    for r in results:
+        print(f"{r['variant']:<12}{r['posts']:>7}{r['wall_s']:>10.2f}{r['posts_per_s']:>10.2f}"
+              f"{r['llm_calls_per_post']:>10.2f}{r['input_tokens_per_post']:>10.0f}{r['injected_errors']:>8}"
+              f"{r['llm_fixture_misses']:>8}")
+    misses = sum(r['llm_fixture_misses'] for r in results)
+    if misses:
+        print(f"\nWARNING: {misses} LLM calls had no recorded response; the fixtures were recorded with "
+              f"other prompts or models. Those calls failed, so scores and timings are not comparable. "
+              f"Re-record the fixtures.")
+
+    for r in results:
+        print(f"\n--- Stages ({r['variant']}) ---")
+        print(f"{'stage':<12}{'calls':>7}{'mean_ms':>10}{'p50_ms':>10}{'p95_ms':>10}{'total_s':>10}")
+        for stage, s in r['stages'].items():
+            print(f"{stage:<12}{s['calls']:>7}{s['mean_ms']:>10.1f}{s['p50_ms']:>10.1f}"
+                  f"{s['p95_ms']:>10.1f}{s['total_s']:>10.2f}")
+        hedging = r.get('llm_hedging') or {}
+        if hedging.get('hedged'):
+            print(f"hedged {hedging['hedge_rate']:.1%} of LLM calls, {hedging['hedge_wins']} hedges won, "
+                  f"{hedging['saved_ms_per_win']:.1f} ms saved per win")
+    print("=" * 72)
+
+
+def synthetic_posts(n: int, seed: int = 1) -> InMemoryArango:
+    """InMemoryArango holding n stored posts with full-size text fields, spread over 8 weeks"""
+    rng = random.Random(seed)
+    arango = InMemoryArango()
+    now = datetime.now()
+    filler = 'lorem ipsum dolor sit amet ' * 40
+    docs = []
+    for i in range(n):
+        docs.append({
+            '_key': f"p{i}",
+            'post_id': f"p{i}",
+            'post_link': f"https://reddit.com/r/x/comments/p{i}",
+            'post_title': f"Post {i} {filler[:80]}",
+            'post_summary': filler[:300],
+            'author': f"user{i % 997}",
+            'subreddit': f"sub{i % 12}",
+            'timestamp': (now - timedelta(seconds=rng.randrange(8 * 7 * 86400))).isoformat(),
+            'relevance_score': round(rng.random(), 3),
+            'is_relevant': True,
+            'intent': rng.choice(['vendor_search', 'advice_seeking', 'complaint', 'discussion']),
+            'intent_score': round(rng.random(), 3),
+            'sentiment': rng.choice(['positive', 'neutral', 'negative']),
+            'sentiment_score': round(rng.random(), 3),
+            'ai_reasoning': filler[:400],
+            'engagement_comment': filler,
+            'engagement_dm': filler[:600],
+            'engagement_strategy': filler[:200],
+            'priority': rng.choice(['high', 'medium', 'low']),
+            'draft_status': 'ready',
+        })
+    arango.col.import_bulk(docs)
+    return arango
+
+
+def _measure(load) -> Dict:
+    tracemalloc.start()
+    start = time.perf_counter()
+    df = load()
+    wall = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {'rows': len(df), 'wall_s': wall, 'peak_mb': peak / 2 ** 20,
+            'frame_mb': df.memory_usage(deep=True).sum() / 2 ** 20}
+
+
+def trends(n: int, weeks: int = 4, seed: int = 1) -> List[Dict]:
+    """Load n posts for the weekly job the old way (all fields, all posts) and through load_posts_frame"""
+    import pandas as pd
+    arango = synthetic_posts(n, seed)
+    cutoff = datetime.now() - timedelta(weeks=weeks)
+
+    def legacy():
+        df = pd.DataFrame(arango.get_existing_posts(limit=n))
+        df['timestamp'] = pd.to_datetime(df['timestamp'])
+        return df[df['timestamp'] >= cutoff]
+
+    return [dict(_measure(legacy), loader='dict_rows'),
+            dict(_measure(lambda: load_posts_frame(arango, since=cutoff)), loader='columnar')]
+
+
+def print_trends_report(n: int, results: List[Dict]):
+    print("\n" + "=" * 72)
+    print(f"TRENDS LOADER BENCHMARK ({n} stored posts)")
+    print("=" * 72)
+    print(f"{'loader':<12}{'rows':>9}{'wall_s':>10}{'peak_mb':>10}{'frame_mb':>10}")
+    for r in results:
+        print(f"{r['loader']:<12}{r['rows']:>9}{r['wall_s']:>10.2f}{r['peak_mb']:>10.1f}{r['frame_mb']:>10.1f}")
+    print("=" * 72)
+
+
+def main():
+    """Main entry point"""
+    parser = argparse.ArgumentParser(description='GTM workflow record/replay benchmark')
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    rec = sub.add_parser('record', help='Record live Reddit listings and Gemini responses')
+    rec.add_argument('--out', required=True, help='Fixture directory to write')
+
+    rep = sub.add_parser('replay', help='Replay fixtures through fake clients and time the run')
+    source = rep.add_mutually_exclusive_group(required=True)
+    source.add_argument('--fixtures', help='Fixture directory to read')
+    source.add_argument('--synthetic', type=int, metavar='N',
+                        help='Use generated fixtures with N posts per subreddit')
+    rep.add_argument('--variants', default=','.join(VARIANTS),
+                     help=f"Comma-separated variants to compare ({', '.join(VARIANTS)})")
+    rep.add_argument('--latency-ms', type=float, default=0.0, help='Mean injected latency per external call')
+    rep.add_argument('--jitter-ms', type=float, default=0.0, help='Std-dev of injected latency')
+    rep.add_argument('--error-rate', type=float, default=0.0, help='Fraction of external calls that fail')
+    rep.add_argument('--seed', type=int, default=1)
+    rep.add_argument('--request-delay', type=float, default=0.0,
+                     help='Override Config.REQUEST_DELAY_SECONDS during replay')
+    rep.add_argument('--json', help='Also write the report to this file')
+    rep.add_argument('--verbose', action='store_true', help='Show workflow output')
+    rep.add_argument('--allow-misses', action='store_true',
+                     help='Exit 0 even when LLM calls had no recorded response')
+
+    tr = sub.add_parser('trends', help='Compare weekly-trends DataFrame loaders on time and peak memory')
+    tr.add_argument('--posts', type=int, default=100000, help='Stored posts to generate')
+    tr.add_argument('--weeks', type=int, default=4, help='Weeks the weekly job reads')
+    tr.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    if args.command == 'trends':
+        print_trends_report(args.posts, trends(args.posts, args.weeks, args.seed))
+        return
+
+    if args.command == 'record':
+        record(args.out)
+        return
+
+    Config.REQUEST_DELAY_SECONDS = args.request_delay
+    fixtures = load_fixtures(args.fixtures) if args.fixtures else synthetic_fixtures(args.synthetic, seed=args.seed)
+    results = [
+        replay(fixtures, variant.strip(), args.latency_ms, args.jitter_ms,
+               args.error_rate, args.seed, args.verbose)
+        for variant in args.variants.split(',') if variant.strip()
+    ]
+    print_report(results)
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+    if not args.allow_misses and any(r['llm_fixture_misses'] for r in results):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+"""
+Fit the relevance and alert thresholds to engagement feedback
+
+The job joins stored feedback (POST /api/feedback) with the scored posts,
+picks new cutoffs and stores them in the coordination collection. Workflows
+apply the stored cutoffs when they start (Config.USE_CALIBRATED_THRESHOLDS).
+
+Once calibrated, a post is relevant only when its relevance_score reaches the
+cut; the model's own is_relevant flag no longer lets it through.
+
+Feedback only exists for posts that already passed a cut, so nothing can be
+learned about lower scores: cuts only ever tighten from their configured
+values, and only as far as the converted posts allow.
+
+Usage:
+    python calibration.py              # recalibrate every CALIBRATION_INTERVAL_HOURS
+    python calibration.py --once --dry-run
+"""
+import time
+from typing import Dict, List
+from config import Config
+
+THRESHOLDS = ('RELEVANCE_THRESHOLD', 'HIGH_RELEVANCE_THRESHOLD', 'ALERT_RELEVANCE_THRESHOLD')
+# Configured values, before any calibration is applied to Config
+DEFAULTS = {name: getattr(Config, name) for name in THRESHOLDS}
+# Candidate cutoffs
+GRID = [round(i * 0.05, 2) for i in range(1, 20)]
+
+
+def _tighten(cut: float, successes: List[float]) -> float:
+    """Highest grid cut >= cut that keeps CALIBRATION_MIN_RECALL of the converted posts above cut"""
+    kept = [score for score in successes if score >= cut]
+    if not kept:
+        return cut
+    for candidate in GRID:
+        if candidate <= cut:
+            continue
+        if sum(1 for score in kept if score >= candidate) / len(kept) < Config.CALIBRATION_MIN_RECALL:
+            break
+        cut = candidate
+    return cut
+
+
+def fit_thresholds(outcomes: List[Dict]) -> Dict:
+    """
+    Choose cutoffs from (relevance_score, success) outcomes
+
+    Each cut is raised as far as it can go while CALIBRATION_MIN_RECALL of
+    the converted posts it currently lets through stay above it. The alert cut
+    moves only once CALIBRATION_MIN_ALERT_SAMPLES converted posts are above it,
+    and never below the relevance cut. The same goes for the Slack floor
+    (HIGH_RELEVANCE_THRESHOLD).
+
+    Returns:
+        Dictionary with the thresholds, the sample counts, the recall kept and
+        the share of feedback posts the new relevance cut would have dropped
+    """
+    scored = [(float(o['relevance_score']), bool(o['success']))
+              for o in outcomes if o.get('relevance_score') is not None]
+    successes = [score for score, ok in scored if ok]
+    fit = dict(DEFAULTS, samples=len(scored), successes=len(successes),
+               recall=1.0, filtered_share=0.0, calibrated=False)
+    if len(scored) < Config.CALIBRATION_MIN_FEEDBACK or not successes:
+        return fit
+
+    relevance = _tighten(DEFAULTS['RELEVANCE_THRESHOLD'], successes)
+    alert = max(DEFAULTS['ALERT_RELEVANCE_THRESHOLD'], relevance)
+    if sum(1 for score in successes if score >= alert) >= Config.CALIBRATION_MIN_ALERT_SAMPLES:
+        alert = _tighten(alert, successes)
+
+    fit.update(
+        RELEVANCE_THRESHOLD=relevance,
+        HIGH_RELEVANCE_THRESHOLD=max(DEFAULTS['HIGH_RELEVANCE_THRESHOLD'], relevance),
+        ALERT_RELEVANCE_THRESHOLD=alert,
+        recall=sum(1 for score in successes if score >= relevance) / len(successes),
+        filtered_share=sum(1 for score, _ in scored if score < relevance) / len(scored),
+        calibrated=True,
+    )
+    return fit
+
+
+def calibrate(arango, dry_run: bool = False) -> Dict:
+    """Fit thresholds to all stored feedback and store them (unless dry_run)"""
+    fit = fit_thresholds(arango.get_feedback_outcomes())
+    if not fit['calibrated']:
+        print(f"Calibration skipped: {fit['samples']} posts with feedback "
+              f"({Config.CALIBRATION_MIN_FEEDBACK} needed, {fit['successes']} converted)")
+        return fit
+    print(f"Calibrated on {fit['samples']} posts: relevance >= {fit['RELEVANCE_THRESHOLD']}, "
+          f"alert >= {fit['ALERT_RELEVANCE_THRESHOLD']} (recall {fit['recall']:.0%}, "
+          f"{fit['filtered_share']:.0%} of posts dropped)")
+    if not dry_run:
+        arango.save_calibration(fit)
+    return fit
+
+
+def apply_calibration(arango) -> bool:
+    """Set the stored calibrated thresholds on Config; returns whether any were applied"""
+    if not Config.USE_CALIBRATED_THRESHOLDS:
+        return False
+    doc = arango.get_calibration()
+    if not doc or not doc.get('calibrated'):
+        return False
+    for name in THRESHOLDS:
+        if name in doc:
+            setattr(Config, name, doc[name])
+    Config.THRESHOLDS_CALIBRATED = True
+    return True
+
+
+def main():
+    """Main entry point"""
+    import argparse
+    from arango_manager import ArangoManager
+
+    parser = argparse.ArgumentParser(description='GTM threshold calibration from feedback')
+    parser.add_argument('--once', action='store_true', help='Calibrate once and exit')
+    parser.add_argument('--dry-run', action='store_true', help='Print the fit without storing it')
+    args = parser.parse_args()
+
+    arango = ArangoManager()
+    try:
+        while True:
+            calibrate(arango, dry_run=args.dry_run)
+            if args.once:
+                break
+            time.sleep(Config.CALIBRATION_INTERVAL_HOURS * 3600)
+    except KeyboardInterrupt:
+        print("\nStopping calibration...")
+
+
+if __name__ == "__main__":
+    main()
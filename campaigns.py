@@ -0,0 +1,156 @@
+"""
+Campaign definitions: keyword/subreddit sets with their own thresholds and Slack target
+
+All campaigns share one Reddit pass. The monitor lists the union of their
+subreddits once, a CampaignMatcher tags each post with every campaign whose
+keywords and subreddits it matches, and the workflow classifies the post once
+and applies each campaign's thresholds to that one classification. Stored
+posts list the campaigns they are relevant for in `campaigns`.
+
+Campaigns are read from CAMPAIGNS_FILE, a JSON list such as:
+
+    [
+      {"name": "retention", "keywords": ["customer churn", "retention marketing"],
+       "subreddits": ["saas", "marketing"], "relevance_threshold": 0.3,
+       "alert_threshold": 0.9, "slack_webhook_url": "https://hooks.slack.com/..."},
+      {"name": "crm", "keywords": ["crm migration"], "subreddits": ["sales", "saas"]}
+    ]
+
+Only name and keywords are required. Without subreddits a campaign matches
+posts in any subreddit the other campaigns list; unset thresholds and
+webhook use the config values. Without the file, KEYWORDS and SUBREDDITS
+form a single campaign named 'default'.
+"""
+import json
+import os
+from typing import Dict, List, Optional
+from config import Config
+from models import AnalysisResult, Classification, Post
+
+
+class Campaign:
+    """One keyword/subreddit set and what to do with its matches"""
+
+    __slots__ = ('name', 'keywords', 'subreddits', 'relevance_threshold', 'alert_threshold',
+                 'slack_webhook_url')
+
+    def __init__(self, name: str, keywords: List[str], subreddits: Optional[List[str]] = None,
+                 relevance_threshold: Optional[float] = None, alert_threshold: Optional[float] = None,
+                 slack_webhook_url: Optional[str] = None):
+        self.name = name
+        self.keywords = list(keywords)
+        self.subreddits = list(subreddits or [])
+        # None: the (possibly calibrated) config value, read when used
+        self.relevance_threshold = relevance_threshold
+        self.alert_threshold = alert_threshold
+        self.slack_webhook_url = slack_webhook_url
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'Campaign':
+        if not data.get('name') or not data.get('keywords'):
+            raise ValueError(f"campaign needs a name and keywords: {data!r}")
+        return cls(
+            name=str(data['name']),
+            keywords=[str(k).strip() for k in data['keywords'] if str(k).strip()],
+            subreddits=[str(s).strip() for s in data.get('subreddits') or [] if str(s).strip()],
+            relevance_threshold=data.get('relevance_threshold'),
+            alert_threshold=data.get('alert_threshold'),
+            slack_webhook_url=data.get('slack_webhook_url'),
+        )
+
+    @property
+    def webhook_url(self) -> Optional[str]:
+        return self.slack_webhook_url or Config.SLACK_WEBHOOK_URL
+
+    def is_relevant(self, classification: Classification) -> bool:
+        if self.relevance_threshold is None:
+            return classification.is_relevant
+        return classification.relevance_score >= self.relevance_threshold
+
+    def is_high_priority(self, result: AnalysisResult) -> bool:
+        if self.alert_threshold is None:
+            return result.is_high_priority
+        return (result.classification.relevance_score >= self.alert_threshold
+                or result.engagement.priority == 'high')
+
+    def __repr__(self) -> str:
+        return f"Campaign({self.name!r}, {len(self.keywords)} keywords, {len(self.subreddits)} subreddits)"
+
+
+def load_campaigns(path: Optional[str] = None) -> List[Campaign]:
+    """
+    Read campaign definitions
+
+    Args:
+        path: JSON file (defaults to config value)
+
+    Returns:
+        Campaigns from the file, or the single KEYWORDS/SUBREDDITS campaign when it doesn't exist
+    """
+    path = path or Config.CAMPAIGNS_FILE
+    if not path or not os.path.exists(path):
+        return [Campaign('default', Config.KEYWORDS, Config.SUBREDDITS)]
+    with open(path) as f:
+        campaigns = [Campaign.from_dict(data) for data in json.load(f)]
+    names = [c.name for c in campaigns]
+    if len(set(names)) != len(names):
+        raise ValueError(f"duplicate campaign names in {path}")
+    return campaigns
+
+
+class CampaignMatcher:
+    """Match a post against all campaigns at once"""
+
+    def __init__(self, campaigns: List[Campaign]):
+        self.campaigns = list(campaigns)
+        # Campaign sets as bit masks (bit i = campaigns[i]); a keyword or subreddit
+        # shared by several campaigns is checked once
+        self._keywords: Dict[str, int] = {}
+        self._subreddits: Dict[str, int] = {}
+        self._any_subreddit = 0
+        for i, campaign in enumerate(self.campaigns):
+            bit = 1 << i
+            for keyword in campaign.keywords:
+                self._keywords[keyword.lower()] = self._keywords.get(keyword.lower(), 0) | bit
+            if campaign.subreddits:
+                for subreddit in campaign.subreddits:
+                    self._subreddits[subreddit.lower()] = self._subreddits.get(subreddit.lower(), 0) | bit
+            else:
+                self._any_subreddit |= bit
+
+    @property
+    def keywords(self) -> List[str]:
+        """Every campaign keyword, once"""
+        return list(dict.fromkeys(k for c in self.campaigns for k in c.keywords))
+
+    @property
+    def subreddits(self) -> List[str]:
+        """Every campaign subreddit, once (case-insensitive, first spelling kept): what the monitor lists"""
+        unique = {}
+        for campaign in self.campaigns:
+            for subreddit in campaign.subreddits:
+                unique.setdefault(subreddit.lower(), subreddit)
+        return list(unique.values())
+
+    def match(self, text: str, subreddit: str) -> List[str]:
+        """Names of the campaigns whose subreddits and keywords match"""
+        candidates = self._subreddits.get(subreddit.lower(), 0) | self._any_subreddit
+        if not candidates:
+            return []
+        text = text.lower()
+        matched = 0
+        for keyword, mask in self._keywords.items():
+            # Skip keywords whose campaigns all matched already
+            if mask & candidates & ~matched and keyword in text:
+                matched |= mask
+                if matched & candidates == candidates:
+                    break
+        matched &= candidates
+        return [c.name for i, c in enumerate(self.campaigns) if matched >> i & 1]
+
+    def match_post(self, post: Post) -> List[str]:
+        return self.match(f"{post.title} {post.content}", post.subreddit)
+
+    def get(self, names: List[str]) -> List[Campaign]:
+        """Campaigns by name, in definition order"""
+        return [c for c in self.campaigns if c.name in names]
@@ -0,0 +1,79 @@
+"""
+Comment ingestion stage for relevant posts
+"""
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import List, Dict, Optional
+from config import Config
+from reddit_monitor import RedditMonitor
+from arango_manager import ArangoManager
+
+
+class CommentIngestor:
+    """Fetch comment trees for posts concurrently and store only new comments"""
+
+    def __init__(self, monitor: RedditMonitor, arango: ArangoManager,
+                 max_workers: Optional[int] = None):
+        """
+        Args:
+            monitor: Reddit monitor used to fetch comment trees
+            arango: Arango manager used for markers and storage
+            max_workers: Size of the fetch pool (defaults to config value)
+        """
+        self.monitor = monitor
+        self.arango = arango
+        self.max_workers = max_workers or Config.COMMENT_FETCH_WORKERS
+        self._local = threading.local()
+
+    def _client(self):
+        """Return this worker thread's own Reddit client"""
+        if not hasattr(self._local, 'reddit'):
+            self._local.reddit = self.monitor._new_client()
+        return self._local.reddit
+
+    def _fetch(self, post_id: str, since_utc: float) -> List[Dict]:
+        return self.monitor.get_post_comments(post_id, since_utc=since_utc, reddit=self._client())
+
+    def ingest(self, post_ids: List[str]) -> Dict:
+        """
+        Fetch and store new comments for the given posts
+
+        Args:
+            post_ids: Reddit submission ids to fetch comments for
+
+        Returns:
+            Dictionary with ingestion summary
+        """
+        post_ids = list(dict.fromkeys(pid for pid in post_ids if pid))
+        if not post_ids:
+            return {'posts': 0, 'new_comments': 0, 'keyword_hits': 0}
+
+        markers = self.arango.get_comment_markers(post_ids)
+        new_comments = 0
+        keyword_hits = 0
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            futures = {
+                pool.submit(self._fetch, pid, markers.get(pid, 0.0)): pid
+                for pid in post_ids
+            }
+            # Writes stay on this thread; only the Reddit round-trips run in the pool
+            for future in as_completed(futures):
+                post_id = futures[future]
+                comments = future.result()
+                if not comments:
+                    continue
+                self.arango.add_comments(post_id, comments)
+                new_comments += len(comments)
+                keyword_hits += sum(1 for c in comments if c['matches_keywords'])
+
+        return {
+            'posts': len(post_ids),
+            'new_comments': new_comments,
+            'keyword_hits': keyword_hits
+        }
+
+    def refresh(self, post_id: str) -> List[Dict]:
+        """Pull new comments for one post and return its full stored thread"""
+        self.ingest([post_id])
+        return self.arango.get_post_comments(post_id)
@@ -1,61 +1,34 @@
 """
 Engagement suggestion generator for relevant posts
 """
-from openai import OpenAI
-from typing import Dict
+from typing import Dict, Optional
 from config import Config
-import google.generativeai as genai
-from ai_scorer import AIScorer
+from models import Post, Classification, Engagement
+from prompt_builder import ENGAGEMENT
+from structured_output import generate_json
+from ai_scorer import HIGH_VALUE_INTENTS
+from llm_router import DEFAULT_TIER, LLMRouter, default_router, tier_stats
 
 class EngagementGenerator:
     """Generate personalized engagement suggestions"""
     
-    def __init__(self):
-        """Initialize AI client based on provider"""
-        self.provider = Config.AI_PROVIDER
-        
-        # Provider-specific initialization
-        if self.provider == 'openrouter':
-            api_key = Config.OPENROUTER_API_KEY or Config.OPENAI_API_KEY
-            self.client = OpenAI(
-                base_url="https://openrouter.ai/api/v1",
-                api_key=api_key
-            )
-            self.model = Config.AI_MODEL or "google/gemini-pro-1.5:free"
-        elif self.provider == 'groq':
-            self.client = OpenAI(
-                base_url="https://api.groq.com/openai/v1",
-                api_key=Config.GROQ_API_KEY
-            )
-            self.model = Config.AI_MODEL or "llama-3.1-8b-instant"
-        elif self.provider == 'together':
-            self.client = OpenAI(
-                base_url="https://api.together.xyz/v1",
-                api_key=Config.TOGETHER_API_KEY
-            )
-            self.model = Config.AI_MODEL or "meta-llama/Llama-3-8b-chat-hf"
-        elif self.provider == 'gemini':
-            genai.configure(api_key=Config.GEMINI_API_KEY)
-            self.client = None
-            self.model = Config.AI_MODEL or "gemini-pro"
-        else:
-            self.client = OpenAI(api_key=Config.OPENAI_API_KEY)
-            self.model = Config.AI_MODEL or "gpt-4o-mini"
+    def __init__(self, router: Optional[LLMRouter] = None):
+        """Initialize with an LLM router (defaults to the shared one built from config)"""
+        self.client = router or default_router()
     
-    def generate_suggestion(self, post_data: Dict, classification: Dict) -> Dict:
+    def generate_suggestion(self, post_data: Post, classification: Classification) -> Engagement:
         """
         Generate engagement suggestion based on post and classification
         
         Args:
-            post_data: Post information
+            post_data: Post record
             classification: AI classification results
             
         Returns:
-            Dictionary with engagement suggestions
+            Engagement record
         """
-        post_text = post_data.get('full_text', '')
-        intent = classification.get('intent', 'unknown')
-        relevance_score = classification.get('relevance_score', 0.0)
+        intent = classification.intent
+        relevance_score = classification.relevance_score
         
         # Different approaches based on intent
         if intent == 'question':
@@ -74,85 +47,56 @@ class EngagementGenerator:
             suggestion_type = 'value_add_comment'
             tone = 'engaging and value-adding'
         
-        prompt = f"""Generate a personalized Reddit comment or engagement suggestion for this post.
-
-Post Title: {post_data.get('title', '')}
-Post Content: {post_data.get('content', '')[:1000]}
-Post Intent: {intent}
-Relevance Score: {relevance_score}
-
-Guidelines:
-- Type: {suggestion_type}
-- Tone: {tone}
-- Length: 2-4 sentences (concise and valuable)
-- Do NOT be overly salesy or pushy
-- Add genuine value to the conversation
-- If relevant, subtly mention how we help with similar challenges
-- Be authentic and Reddit-native (use casual, helpful language)
+        prompt = ENGAGEMENT.render(
+            title=post_data.title,
+            body=post_data.content,
+            intent=intent,
+            relevance_score=relevance_score,
+            suggestion_type=suggestion_type,
+            tone=tone
+        )
+        
+        priority = self.priority_for(classification)
 
-Generate:
-1. A comment draft (2-4 sentences)
-2. A brief DM draft (if appropriate for this intent)
-3. Engagement strategy (one sentence on approach)
+        # Drafts for high-priority posts are the ones acted on; they always get the strong tier
+        base_tier = Config.LLM_TASK_TIERS.get('engagement', DEFAULT_TIER)
+        tier = DEFAULT_TIER if priority == 'high' else base_tier
 
-Respond in JSON format:
-{{
-    "comment_draft": "<draft comment text>",
-    "dm_draft": "<draft DM text or null>",
-    "strategy": "<brief engagement strategy>",
-    "priority": "high|medium|low"
-}}"""
-        
         try:
-            # Google Gemini uses different API
-            if self.provider == 'gemini':
-                return self._generate_with_gemini(post_data, classification, prompt)
-
+            engagement = generate_json(self.client, 'engagement', prompt, tier=tier)
+            tier_stats.add('engagement', tier, tier != base_tier)
+            if engagement is None:
+                return self._fallback_suggestion(post_data, classification)
+            return Engagement.from_llm(engagement, priority)
         except Exception as e:
             print(f"Error generating engagement suggestion: {str(e)}")
             return self._fallback_suggestion(post_data, classification)
-    
-    def _generate_with_gemini(self, post_data: Dict, classification: Dict, prompt: str) -> Dict:
-        try:
-            self.client=AIScorer().client
-            resp = self.client.models.generate_content(
-                model="gemini-2.5-flash",
-                contents=f"You are a growth marketing expert. Respond ONLY with JSON matching the schema. {prompt}"
-            )
-            import json, re
-            raw = (resp.text or "").strip()
-            if not raw:
-                return self._fallback_suggestion(post_data, classification)
-            try:
-                engagement = json.loads(raw)
-            except Exception:
-                m = re.search(r"\{[\s\S]*\}", raw)
-                if m:
-                    engagement = json.loads(m.group(0))
-                else:
-                    return self._fallback_suggestion(post_data, classification)
 
-            relevance_score = classification.get('relevance_score', 0.0)
-            intent = classification.get('intent', 'unknown')
-            if relevance_score >= 0.9 or intent in ['vendor_search', 'advice_seeking']:
-                engagement['priority'] = 'high'
-            elif relevance_score >= 0.75:
-                engagement['priority'] = 'medium'
-            else:
-                engagement['priority'] = 'low'
-            return engagement
-        except Exception as e:
-            print(f"Error generating engagement with Gemini: {str(e)}")
-            return self._fallback_suggestion(post_data, classification)
+    @staticmethod
+    def priority_for(classification: Classification) -> str:
+        """Engagement priority of a classified post"""
+        if classification.relevance_score >= 0.9 or classification.intent in HIGH_VALUE_INTENTS:
+            return 'high'
+        if classification.relevance_score >= 0.75:
+            return 'medium'
+        return 'low'
+
+    def deferred(self, classification: Classification) -> Engagement:
+        """Engagement with its priority set and drafts left for generate_for_document"""
+        return Engagement(priority=self.priority_for(classification), pending=True)
+
+    def generate_for_document(self, doc: Dict) -> Engagement:
+        """Write the drafts of a stored post whose draft_status is 'pending'"""
+        return self.generate_suggestion(Post.from_document(doc), Classification.from_document(doc))
 
-    def _fallback_suggestion(self, post_data: Dict, classification: Dict) -> Dict:
+    def _fallback_suggestion(self, post_data: Post, classification: Classification) -> Engagement:
         """Fallback engagement suggestion"""
-        title = post_data.get('title', '')
+        title = post_data.title
         
-        return {
-            'comment_draft': f"Thanks for sharing this, {title.split()[0] if title else 'there'}. This is an interesting topic. Would love to learn more about your specific situation and see if we can help.",
-            'dm_draft': f"Hi! Saw your post about {title[:50]}. We work with companies facing similar challenges. Would you be open to a quick chat?",
-            'strategy': 'Engage with helpful context first, then offer value-based follow-up',
-            'priority': 'medium'
-        }
+        return Engagement(
+            comment_draft=f"Thanks for sharing this, {title.split()[0] if title else 'there'}. This is an interesting topic. Would love to learn more about your specific situation and see if we can help.",
+            dm_draft=f"Hi! Saw your post about {title[:50]}. We work with companies facing similar challenges. Would you be open to a quick chat?",
+            strategy='Engage with helpful context first, then offer value-based follow-up',
+            priority='medium'
+        )
 
@@ -0,0 +1,411 @@
+"""
+Route structured LLM calls across providers by rolling latency and health
+
+Every call type ('classify', 'summary', 'sentiment', 'engagement') is sent to
+the fastest healthy provider for that type. A provider that errors is skipped
+for the rest of the call (failover), one that reports quota exhaustion is
+benched for Config.LLM_QUOTA_COOLDOWN_SECONDS, and one whose recent error rate
+passes Config.LLM_MAX_ERROR_RATE is only tried after the healthy ones.
+
+With hedging on (Config.LLM_HEDGE), a call still unanswered after the rolling
+p90 latency of its provider and call type gets a duplicate request on the
+next provider (or the same one when it is the only one). The first response
+wins. At most Config.LLM_HEDGE_MAX_FRACTION of calls are hedged.
+"""
+import json
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from types import SimpleNamespace
+from typing import Dict, List, Optional
+from config import Config
+from profiling import span
+
+OPENAI_COMPATIBLE_URLS = {
+    'openrouter': "https://openrouter.ai/api/v1",
+    'groq': "https://api.groq.com/openai/v1",
+    'together': "https://api.together.xyz/v1",
+    'openai': None,
+}
+
+# Model tiers: the default (strong) tier is Config.LLM_MODELS, 'fast' is Config.LLM_FAST_MODELS
+DEFAULT_TIER = 'strong'
+
+# Substrings of provider errors that mean "out of quota / rate limited"
+QUOTA_MARKERS = ('429', 'resource_exhausted', 'quota', 'rate limit', 'ratelimit')
+
+
+def is_quota_error(error: Exception) -> bool:
+    text = f"{type(error).__name__} {error}".lower()
+    return getattr(error, 'status_code', None) == 429 or any(m in text for m in QUOTA_MARKERS)
+
+
+class GeminiProvider:
+    """google.genai client with a native response_schema"""
+
+    def __init__(self, client, name: str = 'gemini'):
+        self.name = name
+        self.client = client
+
+    def generate(self, prompt: str, model: str, schema: Dict):
+        return self.client.models.generate_content(
+            model=model,
+            contents=prompt,
+            config={
+                'response_mime_type': 'application/json',
+                'response_schema': schema,
+            }
+        )
+
+
+class OpenAICompatibleProvider:
+    """OpenAI-style chat completions client (OpenAI, OpenRouter, Groq, Together) in JSON mode"""
+
+    def __init__(self, name: str, client):
+        self.name = name
+        self.client = client
+
+    def generate(self, prompt: str, model: str, schema: Dict):
+        # JSON mode only guarantees an object; the schema goes in the system
+        # message and structured_output.validate checks the fields
+        instructions = ("Respond with a single JSON object with these fields: "
+                        f"{json.dumps(schema['properties'])}. Required: {', '.join(schema['required'])}.")
+        response = self.client.chat.completions.create(
+            model=model,
+            messages=[
+                {'role': 'system', 'content': instructions},
+                {'role': 'user', 'content': prompt},
+            ],
+            response_format={'type': 'json_object'},
+        )
+        usage = getattr(response, 'usage', None)
+        return SimpleNamespace(
+            text=response.choices[0].message.content,
+            usage_metadata=SimpleNamespace(
+                prompt_token_count=getattr(usage, 'prompt_tokens', None),
+                candidates_token_count=getattr(usage, 'completion_tokens', None),
+            ),
+        )
+
+
+class ProviderHealth:
+    """Rolling latency and error window for one provider and call type"""
+
+    def __init__(self, window: int, max_age: float):
+        self.max_age = max_age
+        self.samples = deque(maxlen=window)  # (finished_at, seconds, ok)
+        self.cooldown_until = 0.0
+        self.calls = 0
+        self.errors = 0
+
+    def _recent(self, now: float) -> List:
+        # Old samples are dropped so a provider that was slow or failing gets re-probed
+        while self.samples and now - self.samples[0][0] > self.max_age:
+            self.samples.popleft()
+        return list(self.samples)
+
+    def add(self, now: float, seconds: float, ok: bool):
+        self.samples.append((now, seconds, ok))
+        self.calls += 1
+        if not ok:
+            self.errors += 1
+
+    def percentile(self, now: float, q: float, min_samples: int) -> Optional[float]:
+        """Latency percentile of recent successful calls, None below min_samples"""
+        ok = sorted(seconds for _, seconds, success in self._recent(now) if success)
+        if len(ok) < max(1, min_samples):
+            return None
+        return ok[min(len(ok) - 1, int(len(ok) * q))]
+
+    def latency(self, now: float) -> Optional[float]:
+        """Mean seconds of recent successful calls, None when there are none"""
+        ok = [seconds for _, seconds, success in self._recent(now) if success]
+        return sum(ok) / len(ok) if ok else None
+
+    def error_rate(self, now: float) -> float:
+        recent = self._recent(now)
+        return sum(1 for _, _, ok in recent if not ok) / len(recent) if recent else 0.0
+
+    def healthy(self, now: float) -> bool:
+        if now < self.cooldown_until:
+            return False
+        recent = self._recent(now)
+        return len(recent) < 3 or self.error_rate(now) < Config.LLM_MAX_ERROR_RATE
+
+
+class TierStats:
+    """Per-call-type counts of requests per final model tier and of escalations"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stats = {}
+
+    def add(self, kind: str, tier: str, escalated: bool = False):
+        """Record one request (e.g. one post's classification) answered on tier"""
+        with self._lock:
+            stats = self._stats.setdefault(kind, {'requests': 0, 'escalations': 0, 'tiers': {}})
+            stats['requests'] += 1
+            stats['tiers'][tier] = stats['tiers'].get(tier, 0) + 1
+            if escalated:
+                stats['escalations'] += 1
+
+    def summary(self) -> Dict:
+        """Call type -> requests, requests per tier, escalations and escalation rate"""
+        with self._lock:
+            return {kind: dict(stats, tiers=dict(stats['tiers']),
+                               escalation_rate=stats['escalations'] / stats['requests'])
+                    for kind, stats in self._stats.items()}
+
+    def reset(self):
+        with self._lock:
+            self._stats = {}
+
+
+tier_stats = TierStats()
+
+
+class LLMRouter:
+    """Send each call to the fastest healthy provider and fail over on errors"""
+
+    def __init__(self, providers: Dict, models: Optional[Dict[str, str]] = None,
+                 fast_models: Optional[Dict[str, str]] = None, hedge: Optional[bool] = None,
+                 clock=time.monotonic):
+        """
+        Args:
+            providers: Provider name -> GeminiProvider / OpenAICompatibleProvider,
+                in order of preference
+            models: Provider name -> strong-tier model (defaults to Config.LLM_MODELS)
+            fast_models: Provider name -> fast-tier model (defaults to Config.LLM_FAST_MODELS)
+            hedge: Send duplicate requests for slow calls (defaults to config value)
+        """
+        self.providers = dict(providers)
+        self.models = dict(Config.LLM_MODELS, **(models or {}))
+        self.tiers = {
+            DEFAULT_TIER: self.models,
+            'fast': dict(Config.LLM_FAST_MODELS, **(fast_models or {})),
+        }
+        self.hedge = Config.LLM_HEDGE if hedge is None else hedge
+        self.clock = clock
+        self.hedge_stats = {'calls': 0, 'hedged': 0, 'hedge_wins': 0, 'saved_wins': 0, 'saved_s': 0.0}
+        self._health = {}
+        self._lock = threading.Lock()
+        self._executor = None
+
+    @classmethod
+    def from_config(cls) -> 'LLMRouter':
+        """Build a provider for every name in Config.LLM_PROVIDERS that has an API key"""
+        providers = {}
+        for name in Config.LLM_PROVIDERS:
+            if name == 'gemini':
+                if not Config.GEMINI_API_KEY:
+                    print(f"Warning: no API key for LLM provider '{name}', skipping it")
+                    continue
+                from google import genai
+                providers[name] = GeminiProvider(genai.Client(api_key=Config.GEMINI_API_KEY))
+            elif name in OPENAI_COMPATIBLE_URLS:
+                api_key = {
+                    'openrouter': Config.OPENROUTER_API_KEY or Config.OPENAI_API_KEY,
+                    'groq': Config.GROQ_API_KEY,
+                    'together': Config.TOGETHER_API_KEY,
+                    'openai': Config.OPENAI_API_KEY,
+                }[name]
+                if not api_key:
+                    print(f"Warning: no API key for LLM provider '{name}', skipping it")
+                    continue
+                from openai import OpenAI
+                providers[name] = OpenAICompatibleProvider(
+                    name, OpenAI(base_url=OPENAI_COMPATIBLE_URLS[name], api_key=api_key))
+            else:
+                print(f"Warning: unknown LLM provider '{name}', skipping it")
+        if not providers:
+            raise ValueError("No usable LLM provider in LLM_PROVIDERS")
+        return cls(providers)
+
+    def _stats(self, name: str, kind: str) -> ProviderHealth:
+        key = (name, kind)
+        if key not in self._health:
+            self._health[key] = ProviderHealth(Config.LLM_STATS_WINDOW, Config.LLM_STATS_MAX_AGE_SECONDS)
+        return self._health[key]
+
+    def candidates(self, kind: str) -> List[str]:
+        """
+        Providers in the order they should be tried for a call type
+
+        Healthy providers come first, fastest first; one without recent
+        successes sorts ahead so it gets measured. Unhealthy providers follow,
+        as a last resort, soonest out of cooldown first.
+        """
+        now = self.clock()
+        order = list(self.providers)
+        with self._lock:
+            stats = {name: self._stats(name, kind) for name in order}
+            healthy = [n for n in order if stats[n].healthy(now)]
+            benched = [n for n in order if n not in healthy]
+            healthy.sort(key=lambda n: stats[n].latency(now) or 0.0)
+            benched.sort(key=lambda n: stats[n].cooldown_until)
+        return healthy + benched
+
+    def record(self, name: str, kind: str, seconds: float, error: Optional[Exception] = None):
+        now = self.clock()
+        with self._lock:
+            stats = self._stats(name, kind)
+            stats.add(now, seconds, error is None)
+            if error is not None and is_quota_error(error):
+                stats.cooldown_until = now + Config.LLM_QUOTA_COOLDOWN_SECONDS
+
+    def generate(self, kind: str, prompt: str, schema: Dict, tier: str = DEFAULT_TIER):
+        """
+        Run one schema-constrained call, failing over until a provider answers
+
+        Args:
+            kind: Call type, used to keep latency/health per type
+            prompt: Prompt text
+            schema: structured_output.response_schema for the call
+            tier: Model tier ('fast' or 'strong'); latency/health is kept per tier
+
+        Returns:
+            Response with .text and .usage_metadata
+
+        Raises:
+            The last provider error when every provider failed
+        """
+        call = kind if tier == DEFAULT_TIER else f"{kind}@{tier}"
+        remaining = self.candidates(call)
+        last_error = None
+        with self._lock:
+            self.hedge_stats['calls'] += 1
+        while remaining:
+            name = remaining.pop(0)
+            try:
+                if self.hedge:
+                    return self._hedged(call, prompt, schema, tier, name, remaining)
+                return self._timed(name, call, prompt, schema, tier)
+            except Exception as e:
+                last_error = e
+        raise last_error or RuntimeError("No LLM provider configured")
+
+    def _timed(self, name: str, kind: str, prompt: str, schema: Dict, tier: str):
+        started = self.clock()
+        try:
+            with span(f"llm.{name}", kind=kind, tier=tier):
+                response = self.providers[name].generate(prompt, self.tiers[tier][name], schema)
+        except Exception as e:
+            self.record(name, kind, self.clock() - started, e)
+            print(f"Error from LLM provider {name} ({kind}): {str(e)}")
+            raise
+        self.record(name, kind, self.clock() - started)
+        return response
+
+    def hedge_delay(self, name: str, kind: str) -> Optional[float]:
+        """Seconds to wait before hedging a call, None while too few samples exist"""
+        with self._lock:
+            return self._stats(name, kind).percentile(
+                self.clock(), Config.LLM_HEDGE_PERCENTILE, Config.LLM_HEDGE_MIN_SAMPLES)
+
+    def _take_hedge(self) -> bool:
+        with self._lock:
+            stats = self.hedge_stats
+            if stats['hedged'] + 1 > stats['calls'] * Config.LLM_HEDGE_MAX_FRACTION:
+                return False
+            stats['hedged'] += 1
+            return True
+
+    def _hedged(self, kind: str, prompt: str, schema: Dict, tier: str, name: str, remaining: List[str]):
+        """
+        Run a call on name, duplicating it once it is slower than the hedge delay
+
+        The hedge goes to the next provider in line (taken out of remaining) or
+        to name itself. A losing request that has already started cannot be
+        interrupted; it finishes in the background and its result is dropped,
+        but its latency still feeds the provider stats.
+
+        Raises:
+            The last error when every request of this attempt failed
+        """
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=Config.LLM_HEDGE_WORKERS,
+                                                    thread_name_prefix='llm-hedge')
+        started = time.perf_counter()
+        primary = self._executor.submit(self._timed, name, kind, prompt, schema, tier)
+        pending = {primary}
+        delay = self.hedge_delay(name, kind)
+        if delay is not None and not wait(pending, timeout=delay).done and self._take_hedge():
+            alternate = remaining.pop(0) if remaining else name
+            pending.add(self._executor.submit(self._timed, alternate, kind, prompt, schema, tier))
+
+        last_error = None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                try:
+                    response = future.result()
+                except Exception as e:
+                    last_error = e
+                    continue
+                for loser in pending:
+                    loser.cancel()
+                if future is not primary:
+                    won_at = time.perf_counter() - started
+                    with self._lock:
+                        self.hedge_stats['hedge_wins'] += 1
+                    primary.add_done_callback(lambda f, won_at=won_at: self._add_saved(f, started, won_at))
+                return response
+        raise last_error
+
+    def _add_saved(self, primary, started: float, won_at: float):
+        # Called when the losing primary finishes: how much longer it would have taken.
+        # A primary that failed or never ran gives no answer to compare against.
+        if primary.cancelled() or primary.exception() is not None:
+            return
+        with self._lock:
+            self.hedge_stats['saved_s'] += max(0.0, time.perf_counter() - started - won_at)
+            self.hedge_stats['saved_wins'] += 1
+
+    def hedge_summary(self) -> Dict:
+        """
+        Hedge rate, how often the hedge answered first and the latency it saved
+
+        Saved time is only measured for wins whose primary later succeeded
+        (saved_wins); saved_ms_per_win averages over those.
+        """
+        with self._lock:
+            stats = dict(self.hedge_stats)
+        stats['hedge_rate'] = stats['hedged'] / stats['calls'] if stats['calls'] else 0.0
+        stats['saved_ms_per_win'] = stats['saved_s'] * 1000 / stats['saved_wins'] if stats['saved_wins'] else 0.0
+        return stats
+
+    def reset_hedge_stats(self):
+        """Start a new run's hedge counters (provider health is kept)"""
+        with self._lock:
+            self.hedge_stats = {'calls': 0, 'hedged': 0, 'hedge_wins': 0, 'saved_wins': 0, 'saved_s': 0.0}
+
+    def summary(self) -> Dict:
+        """Provider -> call type -> calls, errors, recent latency and health"""
+        now = self.clock()
+        report = {}
+        with self._lock:
+            for (name, kind), stats in self._health.items():
+                latency = stats.latency(now)
+                report.setdefault(name, {})[kind] = {
+                    'calls': stats.calls,
+                    'errors': stats.errors,
+                    'mean_ms': latency * 1000 if latency is not None else None,
+                    'error_rate': stats.error_rate(now),
+                    'healthy': stats.healthy(now),
+                }
+        return report
+
+
+_default_router = None
+_default_lock = threading.Lock()
+
+
+def default_router() -> LLMRouter:
+    """Process-wide router built from config on first use, shared by AIScorer and EngagementGenerator"""
+    global _default_router
+    with _default_lock:
+        if _default_router is None:
+            _default_router = LLMRouter.from_config()
+        return _default_router
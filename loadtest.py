@@ -0,0 +1,290 @@
+"""
+Load test for the FastAPI server against local stand-ins for Arango and Gemini
+
+Usage:
+    python loadtest.py run --synthetic 25 --concurrency 1,4,16 --requests 50
+    python loadtest.py run --fixtures fixtures/run1 --thresholds loadtest_thresholds.json
+
+`run` starts `loadtest.py serve` in a subprocess (server.py wired to replay
+fakes and an in-memory Arango), drives /gtm, /gtm_week and /api/posts at each
+concurrency level, and reports p50/p95/p99 latency, error rate and server
+memory growth. With --thresholds it exits non-zero when a limit is crossed.
+"""
+import argparse
+import json
+import os
+import random
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+import requests
+from config import Config
+from replay import FaultInjector, InMemoryArango, build_replay_workflow, load_fixtures, synthetic_fixtures
+
+# Scenario name -> (HTTP method, path)
+SCENARIOS = {
+    'posts': ('GET', '/api/posts?limit=100'),
+    'gtm': ('POST', '/gtm'),
+    'gtm_week': ('POST', '/gtm_week'),
+}
+
+
+def _seed_posts(arango: InMemoryArango, count: int, seed: int):
+    """Fill the stand-in collection with analyzed-post docs for the read path"""
+    rng = random.Random(seed)
+    now = time.time()
+    docs = []
+    for i in range(count):
+        ts = now - rng.uniform(0, 28 * 24 * 3600)
+        docs.append({
+            '_key': f"seed{i:07d}",
+            'post_id': f"seed{i:07d}",
+            'post_link': f"https://www.reddit.com/r/marketing/comments/seed{i:07d}/",
+            'post_title': f"Seeded post {i}",
+            'post_summary': "Seeded summary " * rng.randint(1, 10),
+            'author': f"user{rng.randint(1, 500)}",
+            'subreddit': rng.choice(Config.SUBREDDITS or ['marketing', 'startups']),
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S', time.localtime(ts)),
+            'relevance_score': round(rng.random(), 2),
+            'is_relevant': True,
+            'intent': rng.choice(['question', 'complaint', 'vendor_search', 'advice_seeking']),
+            'intent_score': round(rng.random(), 2),
+            'sentiment': rng.choice(['positive', 'neutral', 'negative']),
+            'sentiment_score': rng.randint(0, 10),
+            'ai_reasoning': "Seeded reasoning " * rng.randint(1, 10),
+            'engagement_comment': "Seeded comment " * rng.randint(1, 10),
+            'engagement_dm': "Seeded DM " * rng.randint(1, 10),
+            'engagement_strategy': 'Seeded strategy',
+            'priority': rng.choice(['high', 'medium', 'low']),
+        })
+    arango.col.import_bulk(docs, on_duplicate='update')
+
+
+def serve(args):
+    """Run server.py with replay stand-ins (child process of `run`)"""
+    import uvicorn
+    import server
+    from trends_analyzer import TrendsAnalyzer
+
+    Config.REQUEST_DELAY_SECONDS = 0.0
+    fixtures = load_fixtures(args.fixtures) if args.fixtures else synthetic_fixtures(args.synthetic, seed=args.seed)
+    faults = FaultInjector(args.latency_ms, args.jitter_ms, args.error_rate, args.seed)
+    arango = InMemoryArango()
+    _seed_posts(arango, args.seed_posts, args.seed)
+
+    server.workflow_factory = lambda: build_replay_workflow(fixtures, faults, arango)[0]
+    server.trends_factory = lambda: TrendsAnalyzer(arango=arango)
+    server.arango_factory = lambda: arango
+    uvicorn.run(server.app, host='127.0.0.1', port=args.port, log_level='warning')
+
+
+def _rss_mb(pid: int) -> Optional[float]:
+    """Resident memory of a process in MB (Linux /proc only)"""
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return None
+
+
+def _percentile(ordered: List[float], pct: float) -> float:
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * len(ordered) + 0.5)) - 1)]
+
+
+class LoadDriver:
+    """Fire requests at a fixed concurrency and collect latency/status"""
+
+    def __init__(self, base_url: str, timeout: float):
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+        self._local = threading.local()
+
+    def _session(self) -> requests.Session:
+        if not hasattr(self._local, 'session'):
+            self._local.session = requests.Session()
+        return self._local.session
+
+    def _hit(self, method: str, path: str) -> Dict:
+        start = time.perf_counter()
+        try:
+            resp = self._session().request(method, self.base_url + path, timeout=self.timeout)
+            latency = time.perf_counter() - start
+            if resp.status_code == 409:
+                return {'latency': latency, 'outcome': 'rejected'}
+            body = resp.json()
+            failed = resp.status_code >= 400 or (isinstance(body, dict) and 'error' in body)
+            return {'latency': latency, 'outcome': 'error' if failed else 'ok'}
+        except Exception:
+            return {'latency': time.perf_counter() - start, 'outcome': 'error'}
+
+    def run_level(self, scenario: str, concurrency: int, count: int) -> Dict:
+        method, path = SCENARIOS[scenario]
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            hits = list(pool.map(lambda _: self._hit(method, path), range(count)))
+        wall = time.perf_counter() - start
+
+        ordered = sorted(h['latency'] for h in hits)
+        errors = sum(1 for h in hits if h['outcome'] == 'error')
+        rejected = sum(1 for h in hits if h['outcome'] == 'rejected')
+        return {
+            'scenario': scenario,
+            'concurrency': concurrency,
+            'requests': count,
+            'rps': count / wall if wall else 0.0,
+            'p50_ms': _percentile(ordered, 50) * 1000,
+            'p95_ms': _percentile(ordered, 95) * 1000,
+            'p99_ms': _percentile(ordered, 99) * 1000,
+            'error_rate': errors / count if count else 0.0,
+            'rejected': rejected,
+        }
+
+    def wait_ready(self, deadline_s: float = 30.0):
+        end = time.time() + deadline_s
+        while time.time() < end:
+            try:
+                requests.get(self.base_url + '/api/posts?limit=1', timeout=1)
+                return
+            except Exception:
+                time.sleep(0.2)
+        raise RuntimeError(f"Server at {self.base_url} did not come up")
+
+
+def check_thresholds(levels: List[Dict], memory_growth_mb: Optional[float], thresholds: Dict) -> List[str]:
+    """
+    Compare results against a thresholds dict such as:
+
+        {"default": {"max_p95_ms": 2000, "max_error_rate": 0.01},
+         "posts": {"max_p99_ms": 500},
+         "max_memory_growth_mb": 100}
+
+    Returns:
+        List of human-readable failures (empty when everything passed)
+    """
+    failures = []
+    for level in levels:
+        limits = dict(thresholds.get('default', {}), **thresholds.get(level['scenario'], {}))
+        for key, limit in limits.items():
+            metric = key[len('max_'):]
+            if metric in level and level[metric] > limit:
+                failures.append(f"{level['scenario']} @ c={level['concurrency']}: "
+                                f"{metric} {level[metric]:.3f} > {limit}")
+    max_growth = thresholds.get('max_memory_growth_mb')
+    if max_growth is not None and memory_growth_mb is not None and memory_growth_mb > max_growth:
+        failures.append(f"memory growth {memory_growth_mb:.1f} MB > {max_growth} MB")
+    return failures
+
+
+def print_report(levels: List[Dict], memory_growth_mb: Optional[float], failures: List[str]):
+    print("\n" + "=" * 84)
+    print("LOAD TEST")
+    print("=" * 84)
+    print(f"{'scenario':<10}{'conc':>6}{'reqs':>6}{'rps':>9}{'p50_ms':>10}{'p95_ms':>10}"
+          f"{'p99_ms':>10}{'err%':>8}{'409s':>6}{'rss_mb':>9}")
+    for l in levels:
+        rss = f"{l['rss_mb']:.1f}" if l.get('rss_mb') is not None else '-'
+        print(f"{l['scenario']:<10}{l['concurrency']:>6}{l['requests']:>6}{l['rps']:>9.1f}"
+              f"{l['p50_ms']:>10.1f}{l['p95_ms']:>10.1f}{l['p99_ms']:>10.1f}"
+              f"{l['error_rate'] * 100:>8.1f}{l['rejected']:>6}{rss:>9}")
+    if memory_growth_mb is not None:
+        print(f"\nServer memory growth: {memory_growth_mb:.1f} MB")
+    if failures:
+        print("\nTHRESHOLDS FAILED:")
+        for failure in failures:
+            print(f"  - {failure}")
+    print("=" * 84)
+
+
+def run(args) -> int:
+    """Drive the server and return a process exit code"""
+    proc = None
+    base_url = args.url
+    if not base_url:
+        base_url = f"http://127.0.0.1:{args.port}"
+        child = [sys.executable, os.path.abspath(__file__), 'serve', '--port', str(args.port),
+                 '--latency-ms', str(args.latency_ms), '--jitter-ms', str(args.jitter_ms),
+                 '--error-rate', str(args.error_rate), '--seed', str(args.seed),
+                 '--seed-posts', str(args.seed_posts)]
+        child += ['--fixtures', args.fixtures] if args.fixtures else ['--synthetic', str(args.synthetic)]
+        output = None if args.verbose else subprocess.DEVNULL
+        proc = subprocess.Popen(child, stdout=output, stderr=output)
+
+    try:
+        driver = LoadDriver(base_url, args.timeout)
+        driver.wait_ready()
+        start_rss = _rss_mb(proc.pid) if proc else None
+
+        levels = []
+        for scenario in [s.strip() for s in args.scenarios.split(',') if s.strip()]:
+            for concurrency in [int(c) for c in args.concurrency.split(',')]:
+                level = driver.run_level(scenario, concurrency, args.requests)
+                level['rss_mb'] = _rss_mb(proc.pid) if proc else None
+                levels.append(level)
+
+        end_rss = _rss_mb(proc.pid) if proc else None
+        growth = end_rss - start_rss if start_rss is not None and end_rss is not None else None
+
+        thresholds = {}
+        if args.thresholds:
+            with open(args.thresholds) as f:
+                thresholds = json.load(f)
+        failures = check_thresholds(levels, growth, thresholds)
+        print_report(levels, growth, failures)
+
+        if args.json:
+            with open(args.json, 'w') as f:
+                json.dump({'levels': levels, 'memory_growth_mb': growth, 'failures': failures}, f, indent=2)
+        return 1 if failures else 0
+    finally:
+        if proc:
+            proc.terminate()
+            proc.wait(timeout=10)
+
+
+def main():
+    """Main entry point"""
+    parser = argparse.ArgumentParser(description='GTM server load test')
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    for name in ('run', 'serve'):
+        p = sub.add_parser(name)
+        source = p.add_mutually_exclusive_group()
+        source.add_argument('--fixtures', help='Fixture directory recorded by benchmark.py')
+        source.add_argument('--synthetic', type=int, default=25, metavar='N',
+                            help='Generated fixtures with N posts per subreddit (default)')
+        p.add_argument('--port', type=int, default=8765)
+        p.add_argument('--latency-ms', type=float, default=50.0, help='Mean injected latency per fake call')
+        p.add_argument('--jitter-ms', type=float, default=20.0)
+        p.add_argument('--error-rate', type=float, default=0.0)
+        p.add_argument('--seed', type=int, default=1)
+        p.add_argument('--seed-posts', type=int, default=5000,
+                       help='Analyzed posts preloaded into the stand-in collection')
+
+    rp = sub.choices['run']
+    rp.add_argument('--url', help='Drive an already running server instead of starting one')
+    rp.add_argument('--scenarios', default=','.join(SCENARIOS),
+                    help=f"Comma-separated scenarios ({', '.join(SCENARIOS)})")
+    rp.add_argument('--concurrency', default='1,4,16', help='Comma-separated concurrency levels')
+    rp.add_argument('--requests', type=int, default=50, help='Requests per scenario per level')
+    rp.add_argument('--timeout', type=float, default=120.0)
+    rp.add_argument('--thresholds', help='JSON file of limits; exit 1 when crossed')
+    rp.add_argument('--json', help='Also write the report to this file')
+    rp.add_argument('--verbose', action='store_true', help='Show server output')
+
+    args = parser.parse_args()
+    if args.command == 'serve':
+        serve(args)
+        return
+    sys.exit(run(args))
+
+
+if __name__ == "__main__":
+    main()
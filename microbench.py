@@ -0,0 +1,318 @@
+"""
+Micro-benchmarks of the per-post hot paths, compared against a stored baseline
+
+Each case runs on seeded synthetic data at the chosen scales (number of posts,
+LLM responses or documents):
+
+    match_keywords   RedditMonitor._matches_keywords over post texts
+    match_campaigns  CampaignMatcher.match of post texts against ten overlapping campaigns
+    extract_posts    RedditMonitor._extract_post_data over PRAW-like submissions
+    parse_llm        JSON parse and schema validation of classify responses
+                     (structured_output; clean, invalid-field and non-JSON answers)
+    build_docs       AnalysisResult.to_document, the doc building of ArangoManager.add_results
+    weekly_stats     TrendsAnalyzer.get_weekly_stats over pre-fetched post rows
+
+Throughput is the best of --repeat timed runs. Peak memory comes from one more
+run under tracemalloc.
+
+The committed microbench_baseline.json holds the 1k and 100k results of the
+reference machine. Regenerate it there after an intended change in speed or memory.
+
+Usage:
+    python microbench.py --baseline microbench_baseline.json
+    python microbench.py --scales 1k,100k --save microbench_baseline.json
+"""
+import argparse
+import json
+import platform
+import random
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+from types import SimpleNamespace
+from typing import Callable, Dict, List, Optional, Tuple
+from campaigns import Campaign, CampaignMatcher
+from models import AnalysisResult, Classification, Engagement, Post, Sentiment
+from reddit_monitor import RedditMonitor
+from structured_output import INTENTS, _loads, validate
+from trends_analyzer import CATEGORY_COLUMNS, TrendsAnalyzer
+
+SCALES = {'1k': 1000, '10k': 10000, '100k': 100000, '1m': 1000000}
+KEYWORDS = ['customer churn', 'retention marketing', 'growth hacking', 'crm migration', 'sales tool',
+            'lead scoring', 'cold outreach', 'product led growth', 'pipeline review', 'b2b saas']
+SUBREDDITS = ['marketing', 'startups', 'smallbusiness', 'sales', 'saas', 'entrepreneur']
+WORDS = ('we our team tried new tool month budget users churn pipeline quarter help anyone '
+         'recommend process sales lead growth product pricing launch feedback metrics').split()
+MEMORY_SLACK_MB = 1.0
+# Fixed reference time, so generated data (and results) don't depend on the day of the run
+EPOCH = datetime(2025, 1, 1)
+
+
+# ---------------------------------------------------------------------------
+# Seeded generators
+# ---------------------------------------------------------------------------
+
+def _text(rng: random.Random, words: int) -> str:
+    return ' '.join(rng.choice(WORDS) for _ in range(words))
+
+
+def generate_submissions(n: int, seed: int = 1) -> List[SimpleNamespace]:
+    """PRAW-like submissions; about one in ten mentions a keyword"""
+    rng = random.Random(seed)
+    submissions = []
+    for i in range(n):
+        title = _text(rng, rng.randint(5, 14))
+        if rng.random() < 0.1:
+            title += ' ' + rng.choice(KEYWORDS)
+        subreddit = rng.choice(SUBREDDITS)
+        submissions.append(SimpleNamespace(
+            id=f"s{seed}x{i}",
+            title=title,
+            selftext=_text(rng, rng.randint(0, 250)),
+            author=f"user{rng.randint(1, 5000)}",
+            permalink=f"/r/{subreddit}/comments/s{seed}x{i}/post/",
+            url='',
+            subreddit=subreddit,
+            created_utc=EPOCH.timestamp() - rng.uniform(0, 72 * 3600),
+            score=rng.randint(0, 500),
+            num_comments=rng.randint(0, 80),
+            upvote_ratio=round(rng.uniform(0.5, 1.0), 2),
+        ))
+    return submissions
+
+
+def generate_llm_responses(n: int, seed: int = 1) -> List[str]:
+    """
+    Classify responses: mostly clean JSON, some with values that need coercion
+    or fail validation, and some that are not JSON at all
+    """
+    rng = random.Random(seed)
+    responses = []
+    for _ in range(n):
+        data = {
+            'relevance_score': round(rng.random(), 2),
+            'is_relevant': rng.random() < 0.4,
+            'intent': rng.choice(INTENTS),
+            'intent_score': round(rng.random(), 2),
+            'reasoning': _text(rng, rng.randint(10, 40)),
+        }
+        kind = rng.random()
+        if kind < 0.7:
+            responses.append(json.dumps(data))
+        elif kind < 0.85:
+            data.update(relevance_score=f"{rng.randint(0, 150)}%", is_relevant='yes',
+                        intent=rng.choice(['Vendor Search', 'advice-seeking', 'rant']))
+            responses.append(json.dumps(data))
+        elif kind < 0.95:
+            responses.append(f"```json\n{json.dumps(data)}\n```")
+        else:
+            responses.append(json.dumps(data)[:rng.randint(10, 60)])
+    return responses
+
+
+def generate_results(n: int, seed: int = 1) -> List[AnalysisResult]:
+    """Scored posts as the workflow hands them to ArangoManager.add_results"""
+    rng = random.Random(seed)
+    results = []
+    for sub in generate_submissions(n, seed):
+        post = Post.from_submission(sub)
+        classification = Classification(True, round(rng.random(), 2), rng.choice(INTENTS),
+                                        round(rng.random(), 2), _text(rng, 30))
+        engagement = Engagement(_text(rng, 60), _text(rng, 40) if rng.random() < 0.5 else None,
+                                _text(rng, 20), rng.choice(['high', 'medium', 'low']))
+        sentiment = Sentiment(rng.choice(['positive', 'neutral', 'negative']), rng.randint(0, 10))
+        results.append(AnalysisResult(post, classification, engagement, _text(rng, 35), sentiment))
+    return results
+
+
+def generate_post_rows(n: int, seed: int = 1) -> List[list]:
+    """Stored-post rows in the shape ArangoManager.iter_post_rows yields them"""
+    rng = random.Random(seed)
+    now_ms = int(datetime.now().timestamp() * 1000)
+    values = {'subreddit': SUBREDDITS, 'intent': INTENTS,
+              'sentiment': ['positive', 'neutral', 'negative'], 'priority': ['high', 'medium', 'low']}
+    return [[now_ms - rng.randrange(4 * 7 * 86400 * 1000), round(rng.random(), 3)]
+            + [rng.choice(values[name]) for name in CATEGORY_COLUMNS]
+            for _ in range(n)]
+
+
+class _PostRows:
+    """Stands in for ArangoManager: serves pre-built rows, so only this repo's code is timed"""
+
+    def __init__(self, rows: List[list]):
+        self.rows = rows
+
+    def iter_post_rows(self, fields: List[str], since: Optional[str] = None, batch_size: int = 5000):
+        return iter(self.rows)
+
+
+# ---------------------------------------------------------------------------
+# Cases: name -> setup(n, seed) returning the callable to time
+# ---------------------------------------------------------------------------
+
+def _monitor() -> RedditMonitor:
+    monitor = RedditMonitor(client_factory=lambda: None)
+    monitor.keywords = KEYWORDS
+    return monitor
+
+
+def setup_match_keywords(n: int, seed: int) -> Callable[[], object]:
+    monitor = _monitor()
+    texts = [f"{s.title} {s.selftext}".lower() for s in generate_submissions(n, seed)]
+    return lambda: sum(1 for text in texts if monitor._matches_keywords(text))
+
+
+def setup_match_campaigns(n: int, seed: int) -> Callable[[], object]:
+    matcher = CampaignMatcher([Campaign(f"c{i}", KEYWORDS[i:i + 3] + KEYWORDS[:1], SUBREDDITS[i % 3:i % 3 + 4])
+                               for i in range(10)])
+    posts = [(f"{s.title} {s.selftext}", s.subreddit) for s in generate_submissions(n, seed)]
+    return lambda: sum(1 for text, subreddit in posts if matcher.match(text, subreddit))
+
+
+def setup_extract_posts(n: int, seed: int) -> Callable[[], object]:
+    monitor = _monitor()
+    submissions = generate_submissions(n, seed)
+    return lambda: [monitor._extract_post_data(s) for s in submissions]
+
+
+def setup_parse_llm(n: int, seed: int) -> Callable[[], object]:
+    responses = generate_llm_responses(n, seed)
+
+    def parse():
+        parsed = []
+        for text in responses:
+            data = _loads(text)
+            parsed.append(validate('classify', data) if data is not None else None)
+        return parsed
+    return parse
+
+
+def setup_build_docs(n: int, seed: int) -> Callable[[], object]:
+    results = generate_results(n, seed)
+    return lambda: [result.to_document() for result in results]
+
+
+def setup_weekly_stats(n: int, seed: int) -> Callable[[], object]:
+    analyzer = TrendsAnalyzer(arango=_PostRows(generate_post_rows(n, seed)))
+    return lambda: analyzer.get_weekly_stats(weeks=4)
+
+
+CASES = {
+    'match_keywords': setup_match_keywords,
+    'match_campaigns': setup_match_campaigns,
+    'extract_posts': setup_extract_posts,
+    'parse_llm': setup_parse_llm,
+    'build_docs': setup_build_docs,
+    'weekly_stats': setup_weekly_stats,
+}
+
+
+def measure(case: str, n: int, repeat: int = 3, seed: int = 1) -> Dict:
+    """Best-of-repeat wall time and tracemalloc peak of one case at one scale"""
+    fn = CASES[case](n, seed)
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    best = min(times)
+    return {'n': n, 'best_s': best, 'items_per_s': n / best if best else 0.0, 'peak_mb': peak / 2 ** 20}
+
+
+def run(cases: List[str], scales: List[str], repeat: int = 3, seed: int = 1) -> Dict:
+    results = {}
+    for case in cases:
+        for scale in scales:
+            results[f"{case}@{scale}"] = measure(case, SCALES[scale], repeat, seed)
+            r = results[f"{case}@{scale}"]
+            print(f"  {case}@{scale}: {r['items_per_s']:,.0f}/s, peak {r['peak_mb']:.1f} MB", file=sys.stderr)
+    return {
+        'meta': {'created': datetime.now().isoformat(timespec='seconds'), 'seed': seed, 'repeat': repeat,
+                 'python': platform.python_version(), 'machine': platform.machine(),
+                 'platform': platform.platform()},
+        'results': results,
+    }
+
+
+def compare(current: Dict, baseline: Dict, tolerance: float) -> Tuple[List[Dict], int]:
+    """
+    Compare to a baseline run
+
+    Returns:
+        Rows per shared case/scale, and how many regressed: throughput below
+        (1 - tolerance) x baseline, or peak memory above (1 + tolerance) x baseline
+        plus MEMORY_SLACK_MB (so small runs don't flag allocator noise)
+    """
+    rows = []
+    regressions = 0
+    for key, now in current['results'].items():
+        before = baseline['results'].get(key)
+        if before is None:
+            continue
+        speed = now['items_per_s'] / before['items_per_s'] if before['items_per_s'] else 1.0
+        memory = now['peak_mb'] / before['peak_mb'] if before['peak_mb'] else 1.0
+        regressed = (speed < 1 - tolerance
+                     or now['peak_mb'] > before['peak_mb'] * (1 + tolerance) + MEMORY_SLACK_MB)
+        regressions += regressed
+        rows.append({'key': key, 'speed': speed, 'memory': memory, 'regressed': regressed})
+    return rows, regressions
+
+
+def print_report(current: Dict, rows: Optional[List[Dict]] = None):
+    by_key = {row['key']: row for row in rows or []}
+    print("\n" + "=" * 78)
+    print("MICRO-BENCHMARKS")
+    print("=" * 78)
+    header = f"{'case':<24}{'items/s':>14}{'peak_mb':>10}"
+    if rows is not None:
+        header += f"{'vs base':>10}{'mem vs':>10}"
+    print(header)
+    for key, r in current['results'].items():
+        line = f"{key:<24}{r['items_per_s']:>14,.0f}{r['peak_mb']:>10.1f}"
+        row = by_key.get(key)
+        if row is not None:
+            line += f"{row['speed']:>9.2f}x{row['memory']:>9.2f}x" + ("  REGRESSED" if row['regressed'] else "")
+        print(line)
+    print("=" * 78)
+
+
+def main():
+    """Main entry point"""
+    parser = argparse.ArgumentParser(description='GTM hot-path micro-benchmarks')
+    parser.add_argument('--cases', default=','.join(CASES), help=f"Comma-separated cases ({', '.join(CASES)})")
+    parser.add_argument('--scales', default='1k,100k', help=f"Comma-separated scales ({', '.join(SCALES)})")
+    parser.add_argument('--repeat', type=int, default=3, help='Timed runs per case; the best is kept')
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--save', help='Write the results to this file (e.g. as the new baseline)')
+    parser.add_argument('--baseline', help='Compare against this saved run; exits 1 on regressions')
+    parser.add_argument('--tolerance', type=float, default=0.2,
+                        help='Allowed relative slowdown / memory growth before a case counts as regressed')
+    args = parser.parse_args()
+
+    cases = [c.strip() for c in args.cases.split(',') if c.strip()]
+    scales = [s.strip().lower() for s in args.scales.split(',') if s.strip()]
+    unknown = [c for c in cases if c not in CASES] + [s for s in scales if s not in SCALES]
+    if unknown:
+        parser.error(f"unknown case/scale: {', '.join(unknown)}")
+
+    current = run(cases, scales, args.repeat, args.seed)
+    rows = regressions = None
+    if args.baseline:
+        with open(args.baseline) as f:
+            rows, regressions = compare(current, json.load(f), args.tolerance)
+    print_report(current, rows)
+    if args.save:
+        with open(args.save, 'w') as f:
+            json.dump(current, f, indent=2)
+    if regressions:
+        print(f"{regressions} regressed beyond {args.tolerance:.0%}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,236 @@
+"""
+Compact records passed between pipeline stages
+"""
+from datetime import datetime
+from typing import Dict, Optional
+from config import Config
+
+
+class Post:
+    """A Reddit submission matched by the monitor"""
+
+    __slots__ = ('post_id', 'title', 'content', 'author', 'link', 'url', 'subreddit',
+                 'timestamp', 'score', 'num_comments', 'upvote_ratio', 'campaigns')
+
+    def __init__(self, post_id: str, title: str, content: str = '', author: str = '[deleted]',
+                 link: str = '', url: str = '', subreddit: str = '', timestamp: str = '',
+                 score: int = 0, num_comments: int = 0, upvote_ratio: float = 0.0,
+                 campaigns: tuple = ()):
+        self.post_id = post_id
+        self.title = title
+        self.content = content
+        self.author = author
+        self.link = link
+        self.url = url
+        self.subreddit = subreddit
+        self.timestamp = timestamp
+        self.score = score
+        self.num_comments = num_comments
+        self.upvote_ratio = upvote_ratio
+        self.campaigns = campaigns  # Names of the campaigns it matched (see campaigns.py)
+
+    @classmethod
+    def from_submission(cls, post) -> 'Post':
+        """Build from a PRAW submission"""
+        return cls(
+            post_id=post.id,
+            title=post.title,
+            content=getattr(post, 'selftext', '') or '',
+            author=str(post.author) if post.author else '[deleted]',
+            link=f"https://www.reddit.com{post.permalink}",
+            url=getattr(post, 'url', ''),
+            subreddit=str(post.subreddit),
+            timestamp=datetime.fromtimestamp(post.created_utc).isoformat(),
+            score=post.score,
+            num_comments=post.num_comments,
+            upvote_ratio=getattr(post, 'upvote_ratio', 0),
+        )
+
+    @classmethod
+    def from_archive(cls, data: Dict) -> 'Post':
+        """Build from one submission record of a Reddit archive dump (NDJSON)"""
+        return cls(
+            post_id=data['id'],
+            title=data.get('title') or '',
+            content=data.get('selftext') or '',
+            author=data.get('author') or '[deleted]',
+            link=f"https://www.reddit.com{data.get('permalink', '')}",
+            url=data.get('url') or '',
+            subreddit=data.get('subreddit') or '',
+            # Older dumps store created_utc as a string
+            timestamp=datetime.fromtimestamp(int(float(data['created_utc']))).isoformat(),
+            score=data.get('score') or 0,
+            num_comments=data.get('num_comments') or 0,
+            upvote_ratio=data.get('upvote_ratio') or 0,
+        )
+
+    @classmethod
+    def from_document(cls, doc: Dict) -> 'Post':
+        """Rebuild from a stored gtm_posts document (the body is only kept while a draft is pending)"""
+        return cls(
+            post_id=doc.get('post_id') or doc.get('_key', ''),
+            title=doc.get('post_title', ''),
+            content=doc.get('post_body', ''),
+            author=doc.get('author', '[deleted]'),
+            link=doc.get('post_link', ''),
+            subreddit=doc.get('subreddit', ''),
+            timestamp=doc.get('timestamp', ''),
+        )
+
+    @property
+    def created_utc(self) -> float:
+        """Epoch seconds of the submission (timestamp is stored as local ISO time)"""
+        return datetime.fromisoformat(self.timestamp).timestamp() if self.timestamp else 0.0
+
+    @property
+    def full_text(self) -> str:
+        """Title and body joined; built on access rather than stored"""
+        return f"{self.title}\n\n{self.content}".strip()
+
+    def __repr__(self) -> str:
+        return f"Post({self.post_id!r}, r/{self.subreddit}, {self.title[:40]!r})"
+
+
+class Classification:
+    """Relevance and intent assessment of a post"""
+
+    __slots__ = ('is_relevant', 'relevance_score', 'intent', 'intent_score', 'reasoning')
+
+    def __init__(self, is_relevant: bool = False, relevance_score: float = 0.0,
+                 intent: str = 'unknown', intent_score: float = 0.0, reasoning: str = ''):
+        self.is_relevant = is_relevant
+        self.relevance_score = relevance_score
+        self.intent = intent
+        self.intent_score = intent_score
+        self.reasoning = reasoning
+
+    @classmethod
+    def from_document(cls, doc: Dict) -> 'Classification':
+        """Rebuild from a stored gtm_posts document"""
+        return cls(
+            is_relevant=doc.get('is_relevant', False),
+            relevance_score=doc.get('relevance_score', 0.0),
+            intent=doc.get('intent', 'unknown'),
+            intent_score=doc.get('intent_score', 0.0),
+            reasoning=doc.get('ai_reasoning', ''),
+        )
+
+    @classmethod
+    def from_llm(cls, data: Dict) -> 'Classification':
+        """Build from a parsed model response, applying the relevance threshold"""
+        relevance_score = float(data.get('relevance_score', 0.0))
+        is_relevant = relevance_score >= Config.RELEVANCE_THRESHOLD
+        if not Config.THRESHOLDS_CALIBRATED:
+            # Calibrated cuts are fitted to outcomes, the model's flag is not
+            is_relevant = is_relevant or bool(data.get('is_relevant', False))
+        return cls(
+            is_relevant=is_relevant,
+            relevance_score=relevance_score,
+            intent=data.get('intent', 'unknown'),
+            intent_score=float(data.get('intent_score', 0.0)),
+            reasoning=data.get('reasoning', 'No reasoning provided'),
+        )
+
+
+class Engagement:
+    """Suggested comment/DM drafts for a post"""
+
+    __slots__ = ('comment_draft', 'dm_draft', 'strategy', 'priority', 'pending')
+
+    def __init__(self, comment_draft: str = '', dm_draft: Optional[str] = None,
+                 strategy: str = '', priority: str = 'medium', pending: bool = False):
+        self.comment_draft = comment_draft
+        self.dm_draft = dm_draft
+        self.strategy = strategy
+        self.priority = priority
+        self.pending = pending  # Drafts are generated on demand (see server.py)
+
+    def to_document(self) -> Dict:
+        """The gtm_posts fields holding this engagement"""
+        return {
+            'engagement_comment': self.comment_draft,
+            'engagement_dm': self.dm_draft,
+            'engagement_strategy': self.strategy,
+            'priority': self.priority,
+            'draft_status': 'pending' if self.pending else 'ready',
+        }
+
+    @classmethod
+    def from_llm(cls, data: Dict, priority: str) -> 'Engagement':
+        """Build from a parsed model response; priority is decided by the caller"""
+        return cls(
+            comment_draft=data.get('comment_draft', ''),
+            dm_draft=data.get('dm_draft'),
+            strategy=data.get('strategy', ''),
+            priority=priority,
+        )
+
+
+class Sentiment:
+    """Sentiment label and level (0-10) of a post"""
+
+    __slots__ = ('label', 'level')
+
+    def __init__(self, label: str = '', level: float = 0.0):
+        self.label = label
+        self.level = level
+
+    @classmethod
+    def from_llm(cls, data: Dict) -> 'Sentiment':
+        try:
+            level = float(data.get('sentiment_level', 0.0))
+        except (TypeError, ValueError):
+            level = 0.0
+        return cls(label=str(data.get('sentiment', '')), level=level)
+
+
+class AnalysisResult:
+    """Everything the pipeline learned about one relevant post"""
+
+    __slots__ = ('post', 'classification', 'engagement', 'summary', 'sentiment', 'campaigns')
+
+    def __init__(self, post: Post, classification: Classification,
+                 engagement: Optional[Engagement] = None, summary: str = '',
+                 sentiment: Optional[Sentiment] = None, campaigns: tuple = ()):
+        self.post = post
+        self.classification = classification
+        self.engagement = engagement or Engagement(priority='')
+        self.summary = summary
+        self.sentiment = sentiment or Sentiment()
+        self.campaigns = campaigns  # Campaigns the post is relevant for
+
+    @property
+    def is_high_priority(self) -> bool:
+        return (self.classification.relevance_score >= Config.ALERT_RELEVANCE_THRESHOLD
+                or self.engagement.priority == 'high')
+
+    def to_document(self) -> Dict:
+        """Serialize to the gtm_posts document shape"""
+        post = self.post
+        classification = self.classification
+        engagement = self.engagement
+        doc = {
+            'post_id': post.post_id,
+            'post_link': post.link,
+            'post_title': post.title,
+            'post_summary': self.summary,
+            'author': post.author,
+            'subreddit': post.subreddit,
+            'timestamp': post.timestamp,
+            'relevance_score': classification.relevance_score,
+            'is_relevant': classification.is_relevant,
+            'intent': classification.intent,
+            'intent_score': classification.intent_score,
+            'sentiment': self.sentiment.label,
+            'sentiment_score': self.sentiment.level,
+            'ai_reasoning': classification.reasoning,
+            'campaigns': list(self.campaigns),
+        }
+        doc.update(engagement.to_document())
+        if engagement.pending:
+            # Needed to write the draft later
+            doc['post_body'] = post.content
+        # Use post_id as _key for dedupe safety
+        if post.post_id:
+            doc['_key'] = post.post_id
+        return doc
@@ -0,0 +1,275 @@
+"""
+Incremental Parquet export of gtm_posts
+
+Each run streams the posts written since the last exported watermark
+(written_at, _key) from an AQL cursor. It appends them to Hive-style date
+partitions, <EXPORT_DIR>/date=YYYY-MM-DD/part-<run>-<n>.parquet, where the date
+is the post's own timestamp. At most EXPORT_BATCH_SIZE rows are buffered.
+
+manifest.json lists the committed files and the watermark. It is replaced only
+after all files of a run are closed, so files from an interrupted run are never
+listed, and the next run starts again from the old watermark.
+
+Every write stamps written_at, so a post that is written again (e.g. its draft)
+is exported again. read_export keeps the newest copy of each post. Posts stored
+before written_at existed are exported once, in the first run after this
+was added, with written_at 0.
+
+Usage:
+    python parquet_export.py
+    python parquet_export.py --out /data/gtm_posts
+"""
+import itertools
+import json
+import os
+import time
+import uuid
+from collections import OrderedDict
+from datetime import datetime
+from typing import Dict, List, Optional
+from config import Config
+
+# Exported fields and their Parquet types
+COLUMNS = [
+    ('_key', 'string'),
+    ('post_id', 'string'),
+    ('post_link', 'string'),
+    ('post_title', 'string'),
+    ('post_summary', 'string'),
+    ('author', 'string'),
+    ('subreddit', 'string'),
+    ('timestamp', 'timestamp'),
+    ('relevance_score', 'double'),
+    ('is_relevant', 'bool'),
+    ('intent', 'string'),
+    ('intent_score', 'double'),
+    ('sentiment', 'string'),
+    ('sentiment_score', 'double'),
+    ('ai_reasoning', 'string'),
+    ('engagement_comment', 'string'),
+    ('engagement_dm', 'string'),
+    ('engagement_strategy', 'string'),
+    ('priority', 'string'),
+    ('draft_status', 'string'),
+    ('written_at', 'double'),
+]
+MANIFEST = 'manifest.json'
+
+
+def _schema():
+    import pyarrow as pa
+    types = {'string': pa.string(), 'timestamp': pa.timestamp('ms'),
+             'double': pa.float64(), 'bool': pa.bool_()}
+    return pa.schema([(name, types[kind]) for name, kind in COLUMNS])
+
+
+def _parse_timestamp(value) -> Optional[datetime]:
+    try:
+        return datetime.fromisoformat(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _value(value, kind: str):
+    if value is None:
+        return None
+    try:
+        if kind == 'string':
+            return str(value)
+        if kind == 'timestamp':
+            return _parse_timestamp(value)
+        if kind == 'double':
+            return float(value)
+        return bool(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def load_manifest(out_dir: str) -> Dict:
+    """The stored manifest of an export, or an empty one before the first run"""
+    try:
+        with open(os.path.join(out_dir, MANIFEST)) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {'version': 1, 'columns': [name for name, _ in COLUMNS],
+                'partitioning': 'date', 'dedupe': {'key': '_key', 'latest': 'written_at'},
+                'watermark': {'written_at': 0.0, 'key': ''}, 'files': [], 'runs': []}
+
+
+def partition_of(doc: Dict) -> str:
+    """Date partition of a post: the day of its Reddit timestamp"""
+    ts = _parse_timestamp(doc.get('timestamp'))
+    return ts.date().isoformat() if ts else 'unknown'
+
+
+class ParquetExporter:
+    """Append posts written since the last run to date-partitioned Parquet files"""
+
+    def __init__(self, arango, out_dir: Optional[str] = None, batch_size: Optional[int] = None,
+                 max_open_files: Optional[int] = None, lag_seconds: Optional[float] = None):
+        """
+        Args:
+            arango: ArangoManager to read gtm_posts from
+            out_dir: Export root (defaults to config value)
+            batch_size: Cursor batch and rows buffered before a flush (defaults to config value)
+            max_open_files: Partition files open at once (defaults to config value)
+            lag_seconds: Leave posts written this recently for the next run (defaults to config value)
+        """
+        self.arango = arango
+        self.out_dir = out_dir or Config.EXPORT_DIR
+        self.batch_size = batch_size or Config.EXPORT_BATCH_SIZE
+        self.max_open_files = max_open_files or Config.EXPORT_MAX_OPEN_FILES
+        self.lag_seconds = Config.EXPORT_LAG_SECONDS if lag_seconds is None else lag_seconds
+        self.schema = _schema()
+
+    def _save_manifest(self, manifest: Dict):
+        path = os.path.join(self.out_dir, MANIFEST)
+        with open(path + '.tmp', 'w') as f:
+            json.dump(manifest, f, indent=2)
+        os.replace(path + '.tmp', path)
+
+    def run(self) -> Dict:
+        """
+        Export posts written since the watermark
+
+        Returns:
+            Dictionary with the rows and files written and the new watermark
+        """
+        start = time.monotonic()
+        manifest = load_manifest(self.out_dir)
+        watermark = manifest['watermark']
+        run_id = f"{time.strftime('%Y%m%dT%H%M%S', time.gmtime())}-{uuid.uuid4().hex[:6]}"
+        buffers = {}
+        writers = OrderedDict()
+        files = []
+        rows = buffered = 0
+        last = None
+
+        os.makedirs(self.out_dir, exist_ok=True)
+        try:
+            try:
+                docs = self.arango.iter_posts_written_between(
+                    watermark['written_at'], watermark['key'], time.time() - self.lag_seconds,
+                    batch_size=self.batch_size)
+                if not manifest.get('unstamped_exported'):
+                    # Posts without written_at never pass the watermark; export them once,
+                    # before the stamped ones so they never become the newest copy
+                    unstamped = (dict(doc, written_at=0.0)
+                                 for doc in self.arango.iter_unstamped_posts(batch_size=self.batch_size))
+                    docs = itertools.chain(unstamped, docs)
+                for doc in docs:
+                    buffers.setdefault(partition_of(doc), []).append(doc)
+                    rows += 1
+                    buffered += 1
+                    last = doc
+                    if buffered >= self.batch_size:
+                        self._flush(buffers, writers, files, run_id)
+                        buffered = 0
+                self._flush(buffers, writers, files, run_id)
+            finally:
+                for writer, _ in writers.values():
+                    writer.close()
+        except Exception as e:
+            print(f"Error exporting posts: {str(e)}")
+            # Not in the manifest, so nothing reads them; remove them for the retry
+            for entry in files:
+                try:
+                    os.remove(os.path.join(self.out_dir, entry['path']))
+                except OSError:
+                    pass
+            return {'error': str(e), 'rows': 0, 'files': 0}
+
+        if last is not None:
+            manifest['files'].extend(files)
+            manifest['watermark'] = {'written_at': last['written_at'], 'key': last['_key']}
+            manifest['unstamped_exported'] = True
+            manifest['runs'].append({'run_id': run_id, 'rows': rows, 'files': len(files),
+                                     'finished_at': time.time()})
+            self._save_manifest(manifest)
+        return {'rows': rows, 'files': len(files), 'partitions': len({f['partition'] for f in files}),
+                'watermark': manifest['watermark'], 'duration_s': time.monotonic() - start}
+
+    def _flush(self, buffers: Dict[str, List[Dict]], writers: OrderedDict, files: List[Dict], run_id: str):
+        """Write each partition's buffered docs as one row group"""
+        import pyarrow as pa
+        for partition, docs in buffers.items():
+            columns = {name: pa.array([_value(doc.get(name), kind) for doc in docs], type=self.schema.field(name).type)
+                       for name, kind in COLUMNS}
+            writer, entry = self._writer(partition, writers, files, run_id)
+            writer.write_table(pa.table(columns, schema=self.schema))
+            entry['rows'] += len(docs)
+        buffers.clear()
+
+    def _writer(self, partition: str, writers: OrderedDict, files: List[Dict], run_id: str):
+        """Open (or reuse) this run's file for a partition, closing the least recently used one when full"""
+        import pyarrow.parquet as pq
+        if partition in writers:
+            writers.move_to_end(partition)
+            return writers[partition]
+        if len(writers) >= self.max_open_files:
+            writer, _ = writers.popitem(last=False)[1]
+            writer.close()
+        path = os.path.join(f"date={partition}", f"part-{run_id}-{len(files):04d}.parquet")
+        os.makedirs(os.path.join(self.out_dir, f"date={partition}"), exist_ok=True)
+        entry = {'path': path, 'partition': partition, 'rows': 0, 'run_id': run_id}
+        files.append(entry)
+        writers[partition] = (pq.ParquetWriter(os.path.join(self.out_dir, path), self.schema,
+                                               compression='zstd'), entry)
+        return writers[partition]
+
+
+def read_export(out_dir: Optional[str] = None, columns: Optional[List[str]] = None,
+                since: Optional[datetime] = None, categories: Optional[List[str]] = None):
+    """
+    Read exported posts into a DataFrame, newest copy of each post only
+
+    Args:
+        out_dir: Export root (defaults to config value)
+        columns: Columns to read (defaults to all)
+        since: Only posts with timestamp >= this; earlier date partitions are not opened
+        categories: String columns to read as pandas categoricals
+    """
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.parquet as pq
+
+    out_dir = out_dir or Config.EXPORT_DIR
+    manifest = load_manifest(out_dir)
+    wanted = list(columns or [name for name, _ in COLUMNS])
+    read_columns = list(dict.fromkeys(wanted + ['_key', 'written_at', 'timestamp']))
+    cutoff = since.date().isoformat() if since else None
+
+    tables = [pq.read_table(os.path.join(out_dir, entry['path']), columns=read_columns,
+                            read_dictionary=categories)
+              for entry in manifest['files']
+              if cutoff is None or entry['partition'] == 'unknown' or entry['partition'] >= cutoff]
+    if not tables:
+        return _schema().empty_table().select(wanted).to_pandas()
+    table = pa.concat_tables(tables, promote_options='permissive')
+    if since is not None:
+        table = table.filter(pc.greater_equal(table['timestamp'], pa.scalar(since, type=pa.timestamp('ms'))))
+
+    # Keep the newest copy of each post (the last written_at per _key)
+    df = table.sort_by('written_at').to_pandas()
+    df = df.drop_duplicates('_key', keep='last')
+    return df[wanted].reset_index(drop=True)
+
+
+def main():
+    """Main entry point"""
+    import argparse
+    from arango_manager import ArangoManager
+
+    parser = argparse.ArgumentParser(description='GTM incremental Parquet export')
+    parser.add_argument('--out', help='Export directory (defaults to EXPORT_DIR)')
+    args = parser.parse_args()
+
+    result = ParquetExporter(ArangoManager(), out_dir=args.out).run()
+    if result.get('error'):
+        return
+    print(f"Exported {result['rows']} posts to {result['files']} files in {result['partitions']} "
+          f"partitions ({result['duration_s']:.1f}s); watermark {result['watermark']}")
+
+
+if __name__ == "__main__":
+    main()
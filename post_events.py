@@ -0,0 +1,111 @@
+"""
+Live feed of newly stored posts, for the server-sent events endpoint
+"""
+import threading
+import time
+from collections import deque
+from typing import Dict, List, Optional, Tuple
+from config import Config
+
+# Posts read from Arango per query while catching up
+PAGE_SIZE = 500
+
+
+def event_id(doc: Dict) -> str:
+    """SSE event id of a post doc: its write time and key, so clients can resume"""
+    # repr() round-trips the float exactly, so a resume starts right after this doc
+    return f"{doc['written_at']!r}-{doc['_key']}"
+
+
+def parse_event_id(value: str) -> Optional[Tuple[float, str]]:
+    try:
+        written_at, key = value.split('-', 1)
+        return float(written_at), key
+    except (AttributeError, ValueError):
+        return None
+
+
+class PostEventFeed:
+    """
+    Tail the posts collection by written_at and keep recent docs for subscribers
+
+    Every writer (the server's own /gtm runs, worker.py, scheduler.py,
+    stream_ingestor.py) stamps written_at on import, so one poller here sees
+    them all. Writes are re-read over a short lag window because a chunk
+    stamped earlier can land after a later one.
+    """
+
+    def __init__(self, arango, poll_seconds: Optional[float] = None,
+                 lag_seconds: Optional[float] = None, buffer_size: Optional[int] = None):
+        self.arango = arango
+        self.poll_seconds = poll_seconds or Config.EVENT_POLL_SECONDS
+        self.lag_seconds = Config.EVENT_LAG_SECONDS if lag_seconds is None else lag_seconds
+
+        self._events = deque(maxlen=buffer_size or Config.EVENT_BUFFER_SIZE)
+        self._seq = 0
+        self._cursor = time.time()
+        self._emitted = {}  # _key -> written_at of events inside the lag window
+        self._lock = threading.Lock()
+        self._subscribers = 0
+        self._thread = None
+
+    def subscribe(self) -> int:
+        """Register a listener; returns the sequence number to read events after"""
+        with self._lock:
+            self._subscribers += 1
+            if self._thread is None or not self._thread.is_alive():
+                # Only writes from now on are live; older ones come from backfill()
+                self._cursor = max(self._cursor, time.time() - self.lag_seconds)
+                self._thread = threading.Thread(target=self._poll_loop, daemon=True)
+                self._thread.start()
+            return self._seq
+
+    def unsubscribe(self):
+        with self._lock:
+            self._subscribers -= 1
+
+    def _poll_loop(self):
+        while True:
+            with self._lock:
+                if self._subscribers <= 0:
+                    self._thread = None
+                    return
+            try:
+                self.poll()
+            except Exception as e:
+                print(f"Error polling post events: {str(e)}")
+            time.sleep(self.poll_seconds)
+
+    def poll(self):
+        """Read posts written since the cursor (minus the lag window) and queue the new ones"""
+        since, after_key = self._cursor - self.lag_seconds, None
+        while True:
+            docs = self.arango.get_posts_written_since(since, after_key, limit=PAGE_SIZE)
+            with self._lock:
+                for doc in docs:
+                    if self._emitted.get(doc['_key']) == doc['written_at']:
+                        continue
+                    self._emitted[doc['_key']] = doc['written_at']
+                    self._seq += 1
+                    self._events.append((self._seq, event_id(doc), doc))
+                    self._cursor = max(self._cursor, doc['written_at'])
+            if len(docs) < PAGE_SIZE:
+                break
+            since, after_key = docs[-1]['written_at'], docs[-1]['_key']
+
+        with self._lock:
+            horizon = self._cursor - self.lag_seconds
+            self._emitted = {k: w for k, w in self._emitted.items() if w >= horizon}
+
+    def events_after(self, seq: int) -> Tuple[List[Tuple[str, Dict]], int]:
+        """Return (event id, doc) pairs queued after seq, and the new seq"""
+        with self._lock:
+            return [(eid, doc) for s, eid, doc in self._events if s > seq], self._seq
+
+    def backfill(self, last_event_id: str, limit: int = 1000) -> List[Tuple[str, Dict]]:
+        """Posts written after a client's Last-Event-ID, straight from Arango"""
+        start = parse_event_id(last_event_id)
+        if start is None:
+            return []
+        docs = self.arango.get_posts_written_since(start[0], start[1], limit=limit)
+        return [(event_id(doc), doc) for doc in docs]
@@ -0,0 +1,167 @@
+"""
+Opt-in profiling of workflow and trends runs
+
+A Profiler samples the stacks of all threads every PROFILE_INTERVAL_MS and
+records the wall-clock spans opened with span(): pipeline stages and Reddit,
+LLM, Arango and Slack calls. When it stops it writes two files to PROFILE_DIR:
+
+    <name>-<time>.folded       collapsed stacks ("thread;frame;frame count"),
+                               for flamegraph.pl, speedscope or inferno
+    <name>-<time>.trace.json   spans in Chrome trace event format, for
+                               chrome://tracing or ui.perfetto.dev
+
+While no profiler runs, span() costs one list check.
+Samples cover every thread of the process, so a run profiled in the server
+also shows requests that run at the same time.
+
+Usage:
+    python workflow.py --profile
+    curl -X POST 'http://127.0.0.1:8000/gtm?profile=true'
+"""
+import json
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+from config import Config
+
+# Running profilers; spans are recorded in each
+_active: List['Profiler'] = []
+_active_lock = threading.Lock()
+
+
+@contextmanager
+def span(name: str, **args):
+    """Time the enclosed block as a span named `name` (e.g. 'llm.gemini'), with args as details"""
+    if not _active:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        end = time.perf_counter()
+        tid = threading.get_ident()
+        for profiler in list(_active):
+            profiler.add_span(name, start, end, tid, args)
+
+
+def _frame_name(frame) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+class Profiler:
+    """Sampling profiler plus span recorder for one run; use as a context manager"""
+
+    def __init__(self, name: str, out_dir: Optional[str] = None, interval_ms: Optional[float] = None):
+        """
+        Args:
+            name: Prefix of the output files (e.g. 'gtm', 'gtm_week')
+            out_dir: Output directory (defaults to config value)
+            interval_ms: Sampling interval (defaults to config value)
+        """
+        self.name = name
+        self.out_dir = out_dir or Config.PROFILE_DIR
+        self.interval = (interval_ms or Config.PROFILE_INTERVAL_MS) / 1000
+        self.stacks = Counter()
+        self.samples = 0
+        self.spans = []
+        self.paths = {}
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._thread = None
+
+    def __enter__(self) -> 'Profiler':
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def start(self) -> 'Profiler':
+        self._t0 = time.perf_counter()
+        self._started_at = time.time()
+        with _active_lock:
+            _active.append(self)
+        self._thread = threading.Thread(target=self._sample_loop, name='profiler', daemon=True)
+        self._thread.start()
+        return self
+
+    def _sample_loop(self):
+        own = threading.get_ident()
+        while not self._stopped.wait(self.interval):
+            names = {t.ident: t.name for t in threading.enumerate()}
+            for tid, frame in sys._current_frames().items():
+                if tid == own:
+                    continue
+                stack = []
+                while frame is not None:
+                    stack.append(_frame_name(frame))
+                    frame = frame.f_back
+                stack.append(names.get(tid, str(tid)))
+                self.stacks[';'.join(reversed(stack))] += 1
+            self.samples += 1
+
+    def add_span(self, name: str, start: float, end: float, tid: int, args: Dict):
+        with self._lock:
+            self.spans.append((name, start, end, tid, args))
+
+    def stop(self) -> Dict[str, str]:
+        """Stop sampling and write the output files; returns their paths"""
+        self._stopped.set()
+        self._thread.join()
+        with _active_lock:
+            _active.remove(self)
+        try:
+            return self.write()
+        except Exception as e:
+            print(f"Error writing profile: {str(e)}")
+            return {}
+
+    def write(self) -> Dict[str, str]:
+        os.makedirs(self.out_dir, exist_ok=True)
+        stamp = time.strftime('%Y%m%dT%H%M%S', time.localtime(self._started_at))
+        stem = os.path.join(self.out_dir, f"{self.name}-{stamp}")
+
+        with open(stem + '.folded', 'w') as f:
+            for stack, count in self.stacks.most_common():
+                f.write(f"{stack} {count}\n")
+
+        pid = os.getpid()
+        events = [{
+            'name': name,
+            'cat': name.split('.')[0],
+            'ph': 'X',
+            'ts': round((start - self._t0) * 1e6),
+            'dur': round((end - start) * 1e6),
+            'pid': pid,
+            'tid': tid,
+            'args': args,
+        } for name, start, end, tid, args in self.spans]
+        events += [{'name': 'thread_name', 'ph': 'M', 'pid': pid, 'tid': t.ident, 'args': {'name': t.name}}
+                   for t in threading.enumerate()]
+        with open(stem + '.trace.json', 'w') as f:
+            json.dump({'traceEvents': events, 'displayTimeUnit': 'ms',
+                       'otherData': {'name': self.name, 'started_at': self._started_at,
+                                     'interval_ms': self.interval * 1000, 'samples': self.samples}},
+                      f, default=str)
+
+        self.paths = {'flamegraph': stem + '.folded', 'trace': stem + '.trace.json'}
+        return self.paths
+
+    def span_summary(self) -> Dict:
+        """Count and total seconds per span name, slowest first"""
+        totals = {}
+        with self._lock:
+            for name, start, end, _, _ in self.spans:
+                entry = totals.setdefault(name, {'count': 0, 'total_s': 0.0})
+                entry['count'] += 1
+                entry['total_s'] += end - start
+        return dict(sorted(totals.items(), key=lambda item: item[1]['total_s'], reverse=True))
+
+    def report(self) -> Dict:
+        """Output paths and span totals, for run summaries"""
+        return dict(self.paths, samples=self.samples, spans=self.span_summary())
@@ -0,0 +1,169 @@
+"""
+Prompt templates with per-call token budgets and token usage accounting
+"""
+import string
+import threading
+from functools import lru_cache
+from typing import Dict, Tuple
+from config import Config
+
+# Rough size of a Gemini/GPT token in English text; close enough for budgeting
+CHARS_PER_TOKEN = 4
+ELLIPSIS = "\n[...]\n"
+
+
+def count_tokens(text: str) -> int:
+    """Estimate the number of tokens in text"""
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+def truncate_middle(text: str, max_tokens: int, head_ratio: float = 0.7) -> str:
+    """Keep the head and tail of text within max_tokens, dropping the middle"""
+    max_chars = max(0, max_tokens * CHARS_PER_TOKEN)
+    if len(text) <= max_chars:
+        return text
+    keep = max_chars - len(ELLIPSIS)
+    if keep <= 0:
+        return text[:max_chars]
+    head = int(keep * head_ratio)
+    tail = keep - head
+    return text[:head].rstrip() + ELLIPSIS + (text[-tail:].lstrip() if tail else '')
+
+
+@lru_cache(maxsize=512)
+def _fit_post(title: str, body: str, available: int) -> Tuple[str, str]:
+    """Split a token allowance between title and body; cached so sibling calls reuse it"""
+    # Titles are short and carry the most signal, so they keep up to half the allowance
+    title = truncate_middle(title, max(1, available // 2), head_ratio=1.0)
+    body = truncate_middle(body, available - count_tokens(title))
+    return title, body
+
+
+class PromptTemplate:
+    """A prompt with a fixed instruction part and title/body post sections"""
+
+    def __init__(self, kind: str, text: str):
+        self.kind = kind
+        self.text = text
+        self.fields = [name for _, name, _, _ in string.Formatter().parse(text) if name]
+        # Instruction text without any field values, counted once
+        self.fixed_tokens = count_tokens(text.format(**{name: '' for name in self.fields}))
+
+    def render(self, title: str = '', body: str = '', budget: int = None, **fields) -> str:
+        """
+        Fill the template, truncating title/body to fit the token budget
+
+        Args:
+            title: Post title section
+            body: Post body section (head and tail are kept when truncated)
+            budget: Whole-prompt token budget (defaults to Config.PROMPT_TOKEN_BUDGETS)
+            **fields: Other template fields, inserted as-is
+        """
+        budget = budget or Config.PROMPT_TOKEN_BUDGETS.get(self.kind, 1000)
+        used = self.fixed_tokens + sum(count_tokens(str(v)) for v in fields.values())
+        title, body = _fit_post(title, body, max(budget - used, 16))
+        return self.text.format(title=title, body=body, **fields)
+
+
+CLASSIFY = PromptTemplate('classify', """You are an expert GTM analyst. Respond ONLY with a JSON object matching the required schema.
+Analyze the following Reddit post and provide:
+1. Relevance score (0.0-1.0): How relevant is this post to GTM (Go-To-Market), growth marketing, customer retention, or business growth topics?
+2. Intent classification: One of ["question", "complaint", "vendor_search", "general_chatter", "case_study", "advice_seeking"]
+3. Intent score (0.0-1.0): Confidence in the intent classification
+4. Brief reasoning: 1-2 sentences explaining your assessment
+
+Post Title: {title}
+Post Content: {body}
+
+Respond in this exact JSON format:
+{{
+    "relevance_score": <float 0.0-1.0>,
+    "is_relevant": <boolean>,
+    "intent": "<one of: question, complaint, vendor_search, general_chatter, case_study, advice_seeking>",
+    "intent_score": <float 0.0-1.0>,
+    "reasoning": "<brief explanation>"
+}}""")
+
+SUMMARY = PromptTemplate('summary', """Summarize the following Reddit post in {max_length} characters or less. Focus on the main question or topic.
+
+Post Title: {title}
+Post Content: {body}
+
+Respond in JSON format:
+{{"summary": "<summary>"}}""")
+
+SENTIMENT = PromptTemplate('sentiment', """Find the sentiment and sentiment level [0-10] of this Reddit post.
+
+Post Title: {title}
+Post Content: {body}
+
+Respond ONLY with JSON:
+{{"sentiment": "<positive|neutral|negative>", "sentiment_level": <integer 0-10>}}""")
+
+ENGAGEMENT = PromptTemplate('engagement', """You are a growth marketing expert. Respond ONLY with JSON matching the schema.
+Generate a personalized Reddit comment or engagement suggestion for this post.
+
+Post Title: {title}
+Post Content: {body}
+Post Intent: {intent}
+Relevance Score: {relevance_score}
+
+Guidelines:
+- Type: {suggestion_type}
+- Tone: {tone}
+- Length: 2-4 sentences (concise and valuable)
+- Do NOT be overly salesy or pushy
+- Add genuine value to the conversation
+- If relevant, subtly mention how we help with similar challenges
+- Be authentic and Reddit-native (use casual, helpful language)
+
+Generate:
+1. A comment draft (2-4 sentences)
+2. A brief DM draft (if appropriate for this intent)
+3. Engagement strategy (one sentence on approach)
+
+Respond in JSON format:
+{{
+    "comment_draft": "<draft comment text>",
+    "dm_draft": "<draft DM text or null>",
+    "strategy": "<brief engagement strategy>"
+}}""")
+
+
+class TokenUsage:
+    """Per-call-type input/output token counters"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stats = {}
+
+    def record(self, kind: str, prompt: str, response) -> Dict:
+        """
+        Record one model call
+
+        Uses the provider's usage metadata when present, otherwise estimates.
+
+        Returns:
+            Dictionary with input_tokens and output_tokens for this call
+        """
+        meta = getattr(response, 'usage_metadata', None)
+        input_tokens = getattr(meta, 'prompt_token_count', None) or count_tokens(prompt)
+        output_tokens = getattr(meta, 'candidates_token_count', None) or count_tokens(getattr(response, 'text', '') or '')
+        with self._lock:
+            stats = self._stats.setdefault(kind, {'calls': 0, 'input_tokens': 0, 'output_tokens': 0})
+            stats['calls'] += 1
+            stats['input_tokens'] += input_tokens
+            stats['output_tokens'] += output_tokens
+        return {'input_tokens': input_tokens, 'output_tokens': output_tokens}
+
+    def summary(self) -> Dict:
+        with self._lock:
+            return {kind: dict(stats) for kind, stats in self._stats.items()}
+
+    def reset(self):
+        with self._lock:
+            self._stats = {}
+
+
+# Shared by AIScorer and EngagementGenerator
+token_usage = TokenUsage()
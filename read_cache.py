@@ -0,0 +1,104 @@
+"""
+In-process cache for dashboard reads, with ETag/Last-Modified validators
+"""
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from email.utils import formatdate, parsedate_to_datetime
+from typing import Callable, Dict, Optional
+from config import Config
+
+
+class CachedResponse:
+    """A serialized read result and its validators"""
+
+    __slots__ = ('body', 'etag', 'last_modified', 'loaded_at')
+
+    def __init__(self, body: bytes, last_modified: float):
+        self.body = body
+        self.etag = '"' + hashlib.sha1(body).hexdigest() + '"'
+        self.last_modified = last_modified
+        self.loaded_at = time.monotonic()
+
+    @property
+    def last_modified_header(self) -> str:
+        return formatdate(self.last_modified, usegmt=True)
+
+    def not_modified(self, if_none_match: Optional[str], if_modified_since: Optional[str]) -> bool:
+        """True when the client's validators still match (If-None-Match wins, per RFC 9110)"""
+        if if_none_match:
+            return self.etag in [tag.strip() for tag in if_none_match.split(',')] or if_none_match.strip() == '*'
+        if if_modified_since:
+            try:
+                return int(self.last_modified) <= parsedate_to_datetime(if_modified_since).timestamp()
+            except (TypeError, ValueError):
+                return False
+        return False
+
+
+class ReadCache:
+    """
+    Cache read results per namespace ('posts', 'weekly')
+
+    Writes in this process call invalidate(namespace). Entries also expire
+    after Config.READ_CACHE_TTL_SECONDS, which bounds staleness for writes made
+    by other processes (workers, scheduler, stream ingestor).
+    """
+
+    def __init__(self, ttl: Optional[float] = None, max_entries: int = 256):
+        self.ttl = Config.READ_CACHE_TTL_SECONDS if ttl is None else ttl
+        self.max_entries = max_entries
+        self.stats = {'hits': 0, 'misses': 0, 'invalidations': 0}
+        self._entries = OrderedDict()
+        # (namespace, key) -> (etag, last_modified) last served; kept longer than
+        # entries, so a reload after eviction or expiry can tell the body changed
+        self._served = OrderedDict()
+        self._changed_at = {}
+        self._lock = threading.Lock()
+
+    def get(self, namespace: str, key: str, loader: Callable[[], object]) -> CachedResponse:
+        """Return the cached response for (namespace, key), loading and serializing it on a miss"""
+        with self._lock:
+            cached = self._entries.get((namespace, key))
+            if cached is not None and time.monotonic() - cached.loaded_at < self.ttl:
+                self._entries.move_to_end((namespace, key))
+                self.stats['hits'] += 1
+                return cached
+            changed_at = self._changed_at.setdefault(namespace, time.time())
+            served = self._served.get((namespace, key))
+
+        # Loaded outside the lock; concurrent misses may both load, which is harmless
+        body = json.dumps(loader(), default=str).encode()
+        entry = CachedResponse(body, changed_at)
+        if served is not None and served[0] != entry.etag:
+            # Changed (e.g. by another process) since it was last served
+            entry.last_modified = max(time.time(), served[1])
+        with self._lock:
+            self.stats['misses'] += 1
+            if self._changed_at.get(namespace) == changed_at:
+                self._entries[(namespace, key)] = entry
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+            self._served[(namespace, key)] = (entry.etag, entry.last_modified)
+            self._served.move_to_end((namespace, key))
+            while len(self._served) > self.max_entries * 16:
+                self._served.popitem(last=False)
+        return entry
+
+    def invalidate(self, namespace: str):
+        """Drop a namespace after a write"""
+        with self._lock:
+            for cache_key in [k for k in self._entries if k[0] == namespace]:
+                del self._entries[cache_key]
+            self._changed_at[namespace] = time.time()
+            self.stats['invalidations'] += 1
+
+    def summary(self) -> Dict:
+        with self._lock:
+            return dict(self.stats, entries=len(self._entries))
+
+
+# Shared by ArangoManager (invalidation on write) and server.py (reads)
+read_cache = ReadCache()
@@ -1,25 +1,40 @@
 """
 Reddit monitoring module for tracking posts and comments
 """
+import time
+from collections import deque
 import praw
 from datetime import datetime, timedelta
-from typing import List, Dict, Optional
+from typing import Callable, Iterator, List, Dict, Optional, Tuple
+from campaigns import Campaign, CampaignMatcher, load_campaigns
 from config import Config
+from models import Post
+from profiling import span
 
 
 class RedditMonitor:
     """Monitor Reddit for posts matching keywords"""
     
-    def __init__(self):
-        """Initialize Reddit API client"""
-        self.reddit = praw.Reddit(
-            client_id=Config.REDDIT_CLIENT_ID,
-            client_secret=Config.REDDIT_CLIENT_SECRET,
-            user_agent=Config.REDDIT_USER_AGENT
-        )
-        self.keywords = Config.KEYWORDS
-        self.subreddits = Config.SUBREDDITS
+    def __init__(self, client_factory: Optional[Callable[[], praw.Reddit]] = None,
+                 campaigns: Optional[List[Campaign]] = None):
+        """
+        Initialize Reddit API client
+
+        Args:
+            client_factory: Builds Reddit clients (defaults to PRAW from config)
+            campaigns: Campaigns to match posts against (defaults to load_campaigns())
+        """
+        self._client_factory = client_factory or self._praw_client
+        self.reddit = self._client_factory()
+        self.set_campaigns(campaigns if campaigns is not None else load_campaigns())
         self.max_age_hours = Config.MAX_POST_AGE_HOURS
+
+    def set_campaigns(self, campaigns: List[Campaign]):
+        """Match against these campaigns; keywords and subreddits become their union"""
+        self.campaigns = list(campaigns)
+        self.matcher = CampaignMatcher(self.campaigns)
+        self.keywords = self.matcher.keywords
+        self.subreddits = self.matcher.subreddits
     
     def _matches_keywords(self, text: str) -> bool:
         """Check if text contains any of the monitored keywords"""
@@ -35,67 +50,69 @@ class RedditMonitor:
         age_hours = (datetime.now() - post_time).total_seconds() / 3600
         return age_hours <= self.max_age_hours
     
-    def _extract_post_data(self, post) -> Dict:
+    def _extract_post_data(self, post) -> Post:
         """Extract relevant data from Reddit post"""
-        post_time = datetime.fromtimestamp(post.created_utc)
-        
-        return {
-            'post_id': post.id,
-            'title': post.title,
-            'content': post.selftext if hasattr(post, 'selftext') else '',
-            'author': str(post.author) if post.author else '[deleted]',
-            'link': f"https://www.reddit.com{post.permalink}",
-            'url': post.url if hasattr(post, 'url') else '',
-            'subreddit': str(post.subreddit),
-            'timestamp': post_time.isoformat(),
-            'score': post.score,
-            'num_comments': post.num_comments,
-            'upvote_ratio': post.upvote_ratio if hasattr(post, 'upvote_ratio') else 0,
-            'full_text': f"{post.title}\n\n{post.selftext}".strip()
-        }
+        return Post.from_submission(post)
+
+    def _match(self, post) -> Optional[Post]:
+        """The post tagged with the campaigns it matches, or None when it matches none"""
+        campaigns = self.matcher.match(f"{post.title} {post.selftext}", str(post.subreddit))
+        if not campaigns:
+            return None
+        data = self._extract_post_data(post)
+        data.campaigns = tuple(campaigns)
+        return data
     
-    def search_posts(self, limit: Optional[int] = None) -> List[Dict]:
+    def search_posts(self, limit: Optional[int] = None,
+                     subreddits: Optional[List[str]] = None) -> List[Post]:
         """
-        Search for posts matching keywords across specified subreddits
+        Search for posts matching any campaign across specified subreddits
+
+        Each listing is fetched once for all campaigns; posts carry the names
+        of the campaigns they matched.
         
         Args:
             limit: Maximum posts per subreddit (defaults to config value)
+            subreddits: Subreddits to scan (defaults to all monitored ones)
             
         Returns:
-            List of post dictionaries
+            List of Post records
         """
         all_posts = []
         seen_ids = set()
         limit = limit or Config.MAX_POSTS_PER_SUBREDDIT
         
-        for subreddit_name in self.subreddits:
+        for subreddit_name in (self.subreddits if subreddits is None else subreddits):
             try:
                 subreddit = self.reddit.subreddit(subreddit_name)
                 
-                # Search in new posts
-                for post in subreddit.new(limit=limit):
+                # Search in new posts (the listing is fetched page by page while iterated)
+                with span('reddit.listing', subreddit=subreddit_name, listing='new'):
+                    new_posts = list(subreddit.new(limit=limit))
+                for post in new_posts:
                     if not self._is_recent(post):
                         continue
                     
-                    post_text = f"{post.title} {post.selftext}".lower()
-                    if self._matches_keywords(post_text):
-                        if post.id in seen_ids:
-                            continue
+                    if post.id in seen_ids:
+                        continue
+                    matched = self._match(post)
+                    if matched is not None:
                         seen_ids.add(post.id)
-                        all_posts.append(self._extract_post_data(post))
+                        all_posts.append(matched)
                 
                 # Also search in hot posts
-                for post in subreddit.hot(limit=max(1, limit // 2)):
+                with span('reddit.listing', subreddit=subreddit_name, listing='hot'):
+                    hot_posts = list(subreddit.hot(limit=max(1, limit // 2)))
+                for post in hot_posts:
                     if not self._is_recent(post):
                         continue
                     
-                    post_text = f"{post.title} {post.selftext}".lower()
-                    
-                    if self._matches_keywords(post_text):
-                        if post.id in seen_ids:
-                            continue
+                    if post.id in seen_ids:
+                        continue
+                    matched = self._match(post)
+                    if matched is not None:
                         seen_ids.add(post.id)
-                        all_posts.append(self._extract_post_data(post))
+                        all_posts.append(matched)
             
             except Exception as e:
                 print(f"Error monitoring subreddit {subreddit_name}: {str(e)}")
@@ -103,24 +120,184 @@ class RedditMonitor:
         
         return all_posts
     
-    # def get_post_comments(self, post_id: str, subreddit: str, limit: int = 10) -> List[Dict]:
-    #     """Get top comments for a specific post"""
-    #     try:
-    #         submission = self.reddit.submission(id=post_id)
-    #         comments = []
-    #
-    #         submission.comments.replace_more(limit=0)
-    #         for comment in submission.comments.list()[:limit]:
-    #             if hasattr(comment, 'body') and comment.author:
-    #                 comments.append({
-    #                     'author': str(comment.author),
-    #                     'content': comment.body,
-    #                     'score': comment.score,
-    #                     'timestamp': datetime.fromtimestamp(comment.created_utc).isoformat()
-    #                 })
-    #
-    #         return comments
-    #     except Exception as e:
-    #         print(f"Error fetching comments for post {post_id}: {str(e)}")
-    #         return []
+    def _cursor_listed(self, multireddit, fullname: str) -> bool:
+        """
+        Whether the cursor post is still in the `new` listing
+
+        A removed or deleted post leaves it, and so does any post pushed past
+        the ~1000 items Reddit keeps. `before` pages of such a cursor are empty.
+        """
+        try:
+            return bool(list(multireddit.new(limit=1, params={'after': fullname})))
+        except Exception as e:
+            print(f"Error checking stream cursor {fullname}: {str(e)}")
+            return True
+
+    def _posts_since(self, multireddit, since: float, seen) -> Tuple[list, Optional[str]]:
+        """
+        Page back from the head of the `new` listing to posts created at `since`
+
+        Returns:
+            The posts created at or after `since` that are not in `seen`, newest
+            first, and the fullname of the listing head (None when empty)
+        """
+        posts = []
+        head = None
+        after = None
+        # Reddit listings end after about 1000 items
+        for _ in range(10):
+            chunk = list(multireddit.new(limit=100, params={'after': after} if after else {}))
+            if not chunk:
+                break
+            head = head or f"t3_{chunk[0].id}"
+            posts.extend(p for p in chunk if f"t3_{p.id}" not in seen and p.created_utc >= since)
+            if chunk[-1].created_utc < since:
+                break
+            after = f"t3_{chunk[-1].id}"
+        return posts, head
+
+    def stream_posts(self, subreddits: Optional[List[str]] = None, before: Optional[str] = None,
+                     reddit: Optional[praw.Reddit] = None,
+                     before_created: Optional[float] = None) -> Iterator[Optional[Post]]:
+        """
+        Continuously yield new posts matching keywords, oldest first
+
+        Polls the `new` listing of a multireddit of the subreddits, paging forward
+        from the `before` cursor so bursts larger than one page are not skipped.
+        Yields None after a poll that found nothing new, then waits (doubling up
+        to Config.STREAM_MAX_POLL_SECONDS while quiet), so the caller can
+        checkpoint or stop.
+
+        Args:
+            subreddits: Subreddits to stream (defaults to all monitored ones)
+            before: Fullname (t3_<id>) of the newest post already handled; resume point
+            reddit: Client to use instead of the shared one (for a fetch thread)
+            before_created: created_utc of the `before` post; when that post left
+                the listing (removed, or pushed out after a long outage), the
+                stream resumes from this time instead
+        """
+        reddit = reddit or self.reddit
+        multireddit = reddit.subreddit('+'.join(subreddits or self.subreddits))
+        # Fullnames already yielded or skipped
+        seen = deque(maxlen=1000)
+        last_created = before_created or 0.0
+        delay = Config.STREAM_POLL_SECONDS
+        empty_polls = 0
+
+        while True:
+            try:
+                params = {'before': before} if before else {}
+                page = list(multireddit.new(limit=100, params=params))
+                if not page and before and empty_polls % 5 == 4 and \
+                        not self._cursor_listed(multireddit, before):
+                    # `before` pages of a cursor outside the listing stay empty;
+                    # page back from the head to the cursor's time instead
+                    page, head = self._posts_since(multireddit, last_created, seen)
+                    if not page and head:
+                        # Nothing newer: continue from the head, which is listed
+                        before = head
+            except Exception as e:
+                print(f"Error streaming subreddits: {str(e)}")
+                page = []
+
+            if not page:
+                empty_polls += 1
+                yield None
+                time.sleep(delay)
+                delay = min(delay * 2, Config.STREAM_MAX_POLL_SECONDS)
+                continue
+            delay = Config.STREAM_POLL_SECONDS
+            empty_polls = 0
+
+            # Listings are newest first
+            for post in reversed(page):
+                fullname = f"t3_{post.id}"
+                before = fullname
+                if fullname in seen:
+                    continue
+                seen.append(fullname)
+                last_created = max(last_created, post.created_utc)
+                if not self._is_recent(post):
+                    continue
+                matched = self._match(post)
+                if matched is not None:
+                    yield matched
+
+    @staticmethod
+    def _praw_client() -> praw.Reddit:
+        return praw.Reddit(
+            client_id=Config.REDDIT_CLIENT_ID,
+            client_secret=Config.REDDIT_CLIENT_SECRET,
+            user_agent=Config.REDDIT_USER_AGENT
+        )
+
+    def _new_client(self) -> praw.Reddit:
+        """Create a separate Reddit client (PRAW instances are not thread-safe)"""
+        return self._client_factory()
+
+    def get_post_comments(self, post_id: str, since_utc: float = 0.0,
+                          limit: Optional[int] = None, max_depth: Optional[int] = None,
+                          reddit: Optional[praw.Reddit] = None) -> List[Dict]:
+        """
+        Get comments for a specific post
+
+        Args:
+            post_id: Reddit submission id
+            since_utc: Only return comments created after this unix timestamp
+            limit: Maximum comments to return (defaults to config value)
+            max_depth: Deepest reply level to include, 0 = top-level only
+            reddit: Client to use instead of the shared one (for worker threads)
+
+        Returns:
+            List of comment dictionaries, oldest first. When more than `limit` are
+            new, these are the oldest ones, so a marker at the newest returned
+            comment leaves the rest for the next fetch. Comments sharing a
+            timestamp are never split: when they alone exceed `limit`, all of
+            them are returned.
+
+        Comments behind "load more" stubs are not fetched (up to 500 are loaded per
+        request). Once the marker passes their time, they are never ingested.
+        """
+        limit = limit or Config.MAX_COMMENTS_PER_POST
+        max_depth = Config.MAX_COMMENT_DEPTH if max_depth is None else max_depth
+        try:
+            submission = (reddit or self.reddit).submission(id=post_id)
+            submission.comment_sort = 'new'
+            # Reddit's per-request maximum; the cap below is applied after sorting
+            submission.comment_limit = 500
+            comments = []
+
+            # Skip "load more" stubs; they cost one request each
+            submission.comments.replace_more(limit=0)
+            # comments.list() is breadth-first, not in time order
+            for comment in submission.comments.list():
+                if not hasattr(comment, 'body') or not comment.author:
+                    continue
+                if getattr(comment, 'depth', 0) > max_depth:
+                    continue
+                if comment.created_utc <= since_utc:
+                    continue
+                comments.append({
+                    'comment_id': comment.id,
+                    'post_id': post_id,
+                    'parent_id': comment.parent_id,
+                    'author': str(comment.author),
+                    'content': comment.body,
+                    'score': comment.score,
+                    'depth': getattr(comment, 'depth', 0),
+                    'created_utc': comment.created_utc,
+                    'timestamp': datetime.fromtimestamp(comment.created_utc).isoformat(),
+                    'matches_keywords': self._matches_keywords(comment.body)
+                })
 
+            comments.sort(key=lambda c: c['created_utc'])
+            if len(comments) > limit:
+                cut = comments[limit]['created_utc']
+                # Comments created at the cut time go together (the marker excludes its
+                # own time): in the next fetch, or all in this one when they fill the cap
+                comments = ([c for c in comments[:limit] if c['created_utc'] < cut]
+                            or [c for c in comments if c['created_utc'] == cut])
+            return comments
+        except Exception as e:
+            print(f"Error fetching comments for post {post_id}: {str(e)}")
+            return []
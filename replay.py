@@ -0,0 +1,736 @@
+"""
+Offline record/replay of Reddit listings and Gemini responses
+
+Recording wraps the live PRAW and Gemini clients and writes what they returned
+to fixture files. Replay serves those fixtures through fake clients with
+injected latency and errors, plus an in-memory stand-in for ArangoDB, so the
+whole workflow can run without network access.
+"""
+import hashlib
+import json
+import os
+import random
+import re
+import threading
+import time
+import uuid
+from types import SimpleNamespace
+from typing import Dict, List, Optional
+from config import Config
+from arango_manager import SEARCH_RESULT_FIELDS, ArangoManager, rollup_buckets, snapshot_rollups
+from read_cache import read_cache
+
+REDDIT_FIXTURE = 'reddit.json'
+LLM_FIXTURE = 'llm.json'
+
+
+def _prompt_key(model: str, contents) -> str:
+    return hashlib.sha1(f"{model}\n{contents}".encode('utf-8')).hexdigest()
+
+
+def _post_to_dict(post) -> Dict:
+    return {
+        'id': post.id,
+        'title': post.title,
+        'selftext': getattr(post, 'selftext', ''),
+        'author': str(post.author) if post.author else None,
+        'permalink': post.permalink,
+        'url': getattr(post, 'url', ''),
+        'subreddit': str(post.subreddit),
+        'created_utc': post.created_utc,
+        'score': post.score,
+        'num_comments': post.num_comments,
+        'upvote_ratio': getattr(post, 'upvote_ratio', 0),
+    }
+
+
+def _comment_to_dict(comment) -> Dict:
+    return {
+        'id': comment.id,
+        'parent_id': comment.parent_id,
+        'author': str(comment.author) if comment.author else None,
+        'body': comment.body,
+        'score': comment.score,
+        'depth': getattr(comment, 'depth', 0),
+        'created_utc': comment.created_utc,
+    }
+
+
+def load_fixtures(path: str) -> Dict:
+    """Load a fixture directory written by save_fixtures"""
+    with open(os.path.join(path, REDDIT_FIXTURE)) as f:
+        reddit = json.load(f)
+    with open(os.path.join(path, LLM_FIXTURE)) as f:
+        llm = json.load(f)
+    return {'reddit': reddit, 'llm': llm}
+
+
+def save_fixtures(path: str, reddit: 'RecordingReddit', llm: 'RecordingGenAI'):
+    """Write recorded Reddit listings/comments and LLM responses to a fixture directory"""
+    os.makedirs(path, exist_ok=True)
+    with open(os.path.join(path, REDDIT_FIXTURE), 'w') as f:
+        json.dump({
+            'recorded_at': reddit.recorded_at,
+            'keywords': Config.KEYWORDS,
+            'listings': reddit.listings,
+            'comments': reddit.comments,
+        }, f, indent=2)
+    with open(os.path.join(path, LLM_FIXTURE), 'w') as f:
+        json.dump({'calls': llm.calls}, f, indent=2)
+
+
+def synthetic_fixtures(posts_per_subreddit: int = 25, comments_per_post: int = 5,
+                       seed: int = 1) -> Dict:
+    """Build a fixture set without a live recording (uses Config keywords/subreddits)"""
+    rng = random.Random(seed)
+    keywords = Config.KEYWORDS or ['customer churn', 'retention marketing', 'growth hacking']
+    subreddits = Config.SUBREDDITS or ['marketing', 'startups', 'smallbusiness']
+    now = time.time()
+    filler = "We tried a few things this quarter and I'd love some outside perspective. "
+
+    listings = {}
+    comments = {}
+    for name in subreddits:
+        posts = []
+        for i in range(posts_per_subreddit):
+            post_id = f"{name[:3]}{seed}{i:05d}"
+            keyword = rng.choice(keywords)
+            posts.append({
+                'id': post_id,
+                'title': f"How do you handle {keyword}? ({i})",
+                'selftext': filler * rng.randint(1, 20),
+                'author': f"user{rng.randint(1, 500)}",
+                'permalink': f"/r/{name}/comments/{post_id}/synthetic/",
+                'url': '',
+                'subreddit': name,
+                'created_utc': now - rng.uniform(0, Config.MAX_POST_AGE_HOURS * 3600 * 0.9),
+                'score': rng.randint(0, 200),
+                'num_comments': comments_per_post,
+                'upvote_ratio': round(rng.uniform(0.5, 1.0), 2),
+            })
+            comments[post_id] = [{
+                'id': f"{post_id}c{j}",
+                'parent_id': f"t3_{post_id}",
+                'author': f"user{rng.randint(1, 500)}",
+                'body': f"We had the same {rng.choice(keywords)} problem last year.",
+                'score': rng.randint(0, 50),
+                'depth': rng.randint(0, 3),
+                'created_utc': now - rng.uniform(0, 3600),
+            } for j in range(comments_per_post)]
+        listings[name] = {'new': posts, 'hot': posts[:max(1, len(posts) // 4)]}
+
+    # One JSON shape carrying every field the parsers look for, served for any prompt
+    calls = []
+    for i in range(20):
+        relevance = round(rng.uniform(0.0, 1.0), 2)
+        calls.append({'key': f"synthetic{i}", 'model': 'synthetic', 'text': json.dumps({
+            'relevance_score': relevance,
+            'is_relevant': relevance >= Config.RELEVANCE_THRESHOLD,
+            'intent': rng.choice(['question', 'complaint', 'vendor_search', 'general_chatter',
+                                  'case_study', 'advice_seeking']),
+            'intent_score': round(rng.uniform(0.3, 1.0), 2),
+            'reasoning': 'Synthetic response',
+            'summary': 'Synthetic summary of the post.',
+            'comment_draft': 'Synthetic comment draft.',
+            'dm_draft': 'Synthetic DM draft.',
+            'strategy': 'Synthetic strategy',
+            'priority': rng.choice(['high', 'medium', 'low']),
+            'sentiment': rng.choice(['positive', 'neutral', 'negative']),
+            'sentiment_level': rng.randint(0, 10),
+        })})
+
+    return {
+        'reddit': {'recorded_at': now, 'keywords': keywords, 'listings': listings, 'comments': comments},
+        'llm': {'calls': calls, 'any_prompt': True},
+    }
+
+
+# ---------------------------------------------------------------------------
+# Recording
+# ---------------------------------------------------------------------------
+
+class _RecordingSubreddit:
+    def __init__(self, recorder: 'RecordingReddit', name: str):
+        self._recorder = recorder
+        self._name = name
+        self._subreddit = recorder.reddit.subreddit(name)
+
+    def new(self, limit: Optional[int] = None):
+        return self._record('new', self._subreddit.new(limit=limit))
+
+    def hot(self, limit: Optional[int] = None):
+        return self._record('hot', self._subreddit.hot(limit=limit))
+
+    def _record(self, kind: str, listing) -> List:
+        posts = list(listing)
+        self._recorder.listings.setdefault(self._name, {})[kind] = [_post_to_dict(p) for p in posts]
+        return posts
+
+
+class RecordingReddit:
+    """Wrap a praw.Reddit and capture the listings it returns"""
+
+    def __init__(self, reddit):
+        self.reddit = reddit
+        self.recorded_at = time.time()
+        self.listings = {}
+        self.comments = {}
+
+    def subreddit(self, name: str) -> _RecordingSubreddit:
+        return _RecordingSubreddit(self, name)
+
+    def submission(self, id: str):
+        return self.reddit.submission(id=id)
+
+    def post_ids(self) -> List[str]:
+        return list(dict.fromkeys(
+            post['id']
+            for kinds in self.listings.values()
+            for posts in kinds.values()
+            for post in posts
+        ))
+
+    def record_comments(self, post_ids: List[str]):
+        """Capture the full comment tree of each post"""
+        for post_id in post_ids:
+            try:
+                submission = self.reddit.submission(id=post_id)
+                submission.comment_sort = 'new'
+                submission.comments.replace_more(limit=0)
+                self.comments[post_id] = [
+                    _comment_to_dict(c) for c in submission.comments.list() if hasattr(c, 'body')
+                ]
+            except Exception as e:
+                print(f"Error recording comments for post {post_id}: {str(e)}")
+
+
+class RecordingGenAI:
+    """Wrap a google.genai client and capture every generate_content response"""
+
+    def __init__(self, client):
+        self.client = client
+        self.models = self
+        self.calls = []
+
+    def generate_content(self, model: str, contents, **kwargs):
+        response = self.client.models.generate_content(model=model, contents=contents, **kwargs)
+        self.calls.append({
+            'key': _prompt_key(model, contents),
+            'prompt_key': _prompt_key('', contents),
+            'model': model,
+            'text': response.text,
+        })
+        return response
+
+
+# ---------------------------------------------------------------------------
+# Replay
+# ---------------------------------------------------------------------------
+
+class FaultInjector:
+    """Injected latency and errors shared by the fake clients"""
+
+    def __init__(self, latency_ms: float = 0.0, jitter_ms: float = 0.0,
+                 error_rate: float = 0.0, seed: Optional[int] = None):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.injected_errors = 0
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def __call__(self, what: str):
+        with self._lock:
+            delay_ms = max(0.0, self._rng.gauss(self.latency_ms, self.jitter_ms))
+            fail = self._rng.random() < self.error_rate
+            if fail:
+                self.injected_errors += 1
+        if delay_ms:
+            time.sleep(delay_ms / 1000)
+        if fail:
+            raise RuntimeError(f"Injected error in {what}")
+
+
+class _FakeCommentForest:
+    def __init__(self, comments: List[SimpleNamespace], faults: FaultInjector):
+        self._comments = comments
+        self._faults = faults
+
+    def replace_more(self, limit: Optional[int] = None) -> List:
+        self._faults('submission.comments')
+        return []
+
+    def list(self) -> List[SimpleNamespace]:
+        return list(self._comments)
+
+
+class _FakeSubmission:
+    def __init__(self, comments: List[SimpleNamespace], faults: FaultInjector):
+        self.comment_sort = 'confidence'
+        self.comment_limit = None
+        self.comments = _FakeCommentForest(comments, faults)
+
+
+class _FakeSubreddit:
+    def __init__(self, reddit: 'FakeReddit', name: str):
+        self._reddit = reddit
+        self._name = name
+
+    def new(self, limit: Optional[int] = None, params: Optional[Dict] = None):
+        params = params or {}
+        return self._reddit._listing(self._name, 'new', limit, params.get('before'), params.get('after'))
+
+    def hot(self, limit: Optional[int] = None):
+        return self._reddit._listing(self._name, 'hot', limit)
+
+
+class FakeReddit:
+    """Serve recorded listings and comment trees in place of praw.Reddit"""
+
+    def __init__(self, fixture: Dict, faults: Optional[FaultInjector] = None, window: int = 1000):
+        self.faults = faults or FaultInjector()
+        # Reddit listings only reach back this many items
+        self.window = window
+        self.calls = 0
+        self._lock = threading.Lock()
+        # Shift recorded times forward so the age filter sees the posts as fresh
+        shift = time.time() - fixture['recorded_at']
+        self._listings = {
+            name.lower(): {
+                kind: [SimpleNamespace(**dict(p, created_utc=p['created_utc'] + shift)) for p in posts]
+                for kind, posts in kinds.items()
+            }
+            for name, kinds in fixture['listings'].items()
+        }
+        self._comments = {
+            post_id: [SimpleNamespace(**dict(c, created_utc=c['created_utc'] + shift)) for c in comments]
+            for post_id, comments in fixture.get('comments', {}).items()
+        }
+
+    def _count(self):
+        with self._lock:
+            self.calls += 1
+
+    def _listing(self, name: str, kind: str, limit: Optional[int],
+                 before: Optional[str] = None, after: Optional[str] = None) -> List[SimpleNamespace]:
+        self._count()
+        self.faults(f"r/{name}.{kind}")
+        # 'a+b' is a multireddit: merged, newest first
+        posts = [p for part in name.lower().split('+') for p in self._listings.get(part, {}).get(kind, [])]
+        if '+' in name:
+            posts.sort(key=lambda p: p.created_utc, reverse=True)
+        posts = posts[:self.window]
+        if before:
+            # Reddit returns the items just newer than the anchor
+            ids = [f"t3_{p.id}" for p in posts]
+            posts = posts[:ids.index(before)] if before in ids else []
+            return posts[-limit:] if limit else posts
+        if after:
+            # ... and the items just older
+            ids = [f"t3_{p.id}" for p in posts]
+            posts = posts[ids.index(after) + 1:] if after in ids else []
+        return posts[:limit] if limit else list(posts)
+
+    def publish(self, subreddit: str, post: Dict):
+        """Add a post to the head of a `new` listing, as a live submission would"""
+        listing = self._listings.setdefault(subreddit.lower(), {}).setdefault('new', [])
+        listing.insert(0, SimpleNamespace(**post))
+
+    def remove(self, post_id: str):
+        """Drop a post from every listing, as moderators removing it would"""
+        for kinds in self._listings.values():
+            for kind, posts in kinds.items():
+                kinds[kind] = [p for p in posts if p.id != post_id]
+
+    def info(self, fullnames: List[str]) -> List[SimpleNamespace]:
+        self._count()
+        wanted = set(fullnames)
+        found = {f"t3_{p.id}": p for kinds in self._listings.values() for posts in kinds.values() for p in posts}
+        return [found[name] for name in wanted if name in found]
+
+    def subreddit(self, name: str) -> _FakeSubreddit:
+        return _FakeSubreddit(self, name)
+
+    def submission(self, id: str) -> _FakeSubmission:
+        self._count()
+        return _FakeSubmission(self._comments.get(id, []), self.faults)
+
+
+class FixtureMiss(Exception):
+    """No recorded response for a prompt (prompts or models changed since recording)"""
+
+
+class FakeGenAI:
+    """
+    Serve recorded generate_content responses in place of a google.genai client
+
+    A prompt without a recorded response raises FixtureMiss (the call fails like a
+    provider error) and counts in `misses`. Synthetic fixtures ('any_prompt')
+    answer every prompt from their generic responses instead.
+    """
+
+    def __init__(self, fixture: Dict, faults: Optional[FaultInjector] = None):
+        self.faults = faults or FaultInjector()
+        self.models = self
+        self.calls = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._by_key = {}
+        self._by_prompt = {}
+        for call in fixture['calls']:
+            self._by_key.setdefault(call['key'], call['text'])
+            if 'prompt_key' in call:
+                self._by_prompt.setdefault(call['prompt_key'], call['text'])
+        self._any_prompt = [call['text'] for call in fixture['calls']] if fixture.get('any_prompt') else None
+
+    def generate_content(self, model: str, contents, **kwargs) -> SimpleNamespace:
+        with self._lock:
+            self.calls += 1
+            index = self.calls
+        self.faults('generate_content')
+        text = self._by_key.get(_prompt_key(model, contents))
+        if text is None:
+            # Recorded on another model tier
+            text = self._by_prompt.get(_prompt_key('', contents))
+        if text is None and self._any_prompt:
+            text = self._any_prompt[index % len(self._any_prompt)]
+        if text is None:
+            # Prompt or model changed since recording; an unrelated answer would skew the scores
+            with self._lock:
+                self.misses += 1
+            raise FixtureMiss(f"no recorded response for {_prompt_key(model, contents)}")
+        return SimpleNamespace(text=text)
+
+
+class _MemoryCollection:
+    def __init__(self):
+        self.docs = {}
+        self._lock = threading.Lock()
+
+    def import_bulk(self, documents: List[Dict], on_duplicate: str = 'error', **kwargs) -> Dict:
+        created = updated = ignored = 0
+        with self._lock:
+            for doc in documents:
+                key = doc.get('_key') or uuid.uuid4().hex
+                if key in self.docs:
+                    if on_duplicate == 'update':
+                        self.docs[key].update(doc)
+                        updated += 1
+                    elif on_duplicate == 'replace':
+                        self.docs[key] = dict(doc, _key=key)
+                        updated += 1
+                    else:
+                        ignored += 1
+                    continue
+                self.docs[key] = dict(doc, _key=key)
+                created += 1
+        return {'created': created, 'updated': updated, 'ignored': ignored, 'errors': 0}
+
+    def insert(self, document: Dict) -> Dict:
+        self.import_bulk([document])
+        return document
+
+
+class InMemoryArango(ArangoManager):
+    """ArangoManager stand-in that keeps collections in process memory"""
+
+    def __init__(self):
+        self.collection_name = Config.ARANGO_COLLECTION
+        self.comments_collection_name = Config.ARANGO_COMMENTS_COLLECTION
+        self.comment_edges_collection_name = Config.ARANGO_COMMENT_EDGES_COLLECTION
+        self.col = _MemoryCollection()
+        self.comments_col = _MemoryCollection()
+        self.comment_edges_col = _MemoryCollection()
+        self.weekly_col = _MemoryCollection()
+        self.feedback_col = _MemoryCollection()
+        self.coordination = {}
+        self._coordination_lock = threading.Lock()
+
+    def get_existing_post_ids(self, limit: int = 5000) -> set:
+        return set(d.get('post_id') for d in list(self.col.docs.values())[:limit] if d.get('post_id'))
+
+    def get_stored_post_ids(self, post_ids: List[str]) -> set:
+        return set(post_ids) & set(self.col.docs)
+
+    def get_existing_posts(self, limit: int = 5000) -> list:
+        # Copies, as a database read would return
+        return json.loads(json.dumps(list(self.col.docs.values())[:limit]))
+
+    def iter_post_rows(self, fields: List[str], since: Optional[str] = None,
+                       batch_size: int = 5000):
+        from datetime import datetime, timezone
+        for doc in list(self.col.docs.values()):
+            if since is not None and (doc.get('timestamp') or '') < since:
+                continue
+            row = []
+            for field in fields:
+                if field == 'timestamp_ms':
+                    ts = doc.get('timestamp')
+                    row.append(int(datetime.fromisoformat(ts).replace(tzinfo=timezone.utc).timestamp() * 1000)
+                               if ts else None)
+                else:
+                    row.append(doc.get(field))
+            yield row
+
+    def get_posts_page(self, limit: int = 100, offset: int = 0, campaign: Optional[str] = None) -> list:
+        docs = sorted((d for d in self.col.docs.values() if not campaign or campaign in (d.get('campaigns') or ())),
+                      key=lambda d: d.get('timestamp') or '', reverse=True)
+        return docs[offset:offset + limit]
+
+    def get_posts_written_since(self, since: float, after_key: Optional[str] = None,
+                                limit: int = 500) -> list:
+        start = (since, after_key or '')
+        docs = [d for d in list(self.col.docs.values())
+                if 'written_at' in d and (d['written_at'], d['_key']) > start]
+        return sorted(docs, key=lambda d: (d['written_at'], d['_key']))[:limit]
+
+    def iter_posts_written_between(self, since: float, after_key: Optional[str], until: float,
+                                   batch_size: int = 5000):
+        start = (since, after_key or '')
+        docs = [dict(d) for d in list(self.col.docs.values())
+                if d.get('written_at') is not None and (d['written_at'], d['_key']) > start and d['written_at'] <= until]
+        for doc in sorted(docs, key=lambda d: (d['written_at'], d['_key'])):
+            yield doc
+
+    def iter_unstamped_posts(self, batch_size: int = 5000):
+        docs = [dict(d) for d in list(self.col.docs.values()) if d.get('written_at') is None]
+        for doc in sorted(docs, key=lambda d: d['_key']):
+            yield doc
+
+    def search_posts(self, query: str = '', subreddits: Optional[List[str]] = None,
+                     intents: Optional[List[str]] = None, priorities: Optional[List[str]] = None,
+                     start: Optional[str] = None, end: Optional[str] = None,
+                     limit: int = 20, offset: int = 0, campaigns: Optional[List[str]] = None) -> Dict:
+        # Term counts stand in for BM25
+        terms = set(re.findall(r'\w+', query.lower()))
+        hits = []
+        for doc in list(self.col.docs.values()):
+            if (subreddits and doc.get('subreddit') not in subreddits) or \
+                    (intents and doc.get('intent') not in intents) or \
+                    (priorities and doc.get('priority') not in priorities) or \
+                    (campaigns and not set(campaigns) & set(doc.get('campaigns') or ())) or \
+                    (start and (doc.get('timestamp') or '') < start) or \
+                    (end and (doc.get('timestamp') or '') >= end):
+                continue
+            text = ' '.join(doc.get(f) or '' for f in ('post_title', 'post_summary', 'ai_reasoning')).lower()
+            score = sum(1 for word in re.findall(r'\w+', text) if word in terms)
+            if terms and not score:
+                continue
+            hits.append((score, doc.get('timestamp') or '', doc))
+        hits.sort(key=lambda h: (h[0], h[1]), reverse=True)
+        return {'total': len(hits),
+                'results': [dict({f: doc[f] for f in SEARCH_RESULT_FIELDS if f in doc}, score=score)
+                            for score, _, doc in hits[offset:offset + limit]]}
+
+    def get_post(self, post_id: str) -> Optional[Dict]:
+        doc = self.col.docs.get(post_id)
+        return dict(doc) if doc is not None else None
+
+    def save_draft(self, post_id: str, fields: Dict) -> Optional[Dict]:
+        with self.col._lock:
+            doc = self.col.docs.get(post_id)
+            if doc is None or doc.get('draft_status') != 'pending':
+                return None
+            doc.update(fields, written_at=time.time())
+            doc.pop('post_body', None)
+            updated = dict(doc)
+        read_cache.invalidate('posts')
+        return updated
+
+    def get_comment_markers(self, post_ids: List[str]) -> Dict[str, float]:
+        return {
+            pid: self.col.docs[pid]['comments_last_utc']
+            for pid in post_ids
+            if self.col.docs.get(pid, {}).get('comments_last_utc') is not None
+        }
+
+    def add_comments(self, post_id: str, comments: List[Dict]):
+        if not comments:
+            return
+        self.comments_col.import_bulk([dict(c, _key=c['comment_id']) for c in comments], on_duplicate='update')
+        self.comment_edges_col.import_bulk([{
+            '_key': c['comment_id'],
+            '_from': f"{self.collection_name}/{post_id}",
+            '_to': f"{self.comments_collection_name}/{c['comment_id']}",
+        } for c in comments], on_duplicate='ignore')
+        if post_id in self.col.docs:
+            self.col.docs[post_id].update({
+                'comments_last_utc': max(c['created_utc'] for c in comments),
+                'comment_count': len(self.get_post_comments(post_id)),
+            })
+            read_cache.invalidate('posts')
+
+    def get_post_comments(self, post_id: str) -> list:
+        start = f"{self.collection_name}/{post_id}"
+        keys = [e['_to'].split('/', 1)[1] for e in self.comment_edges_col.docs.values() if e['_from'] == start]
+        comments = [self.comments_col.docs[k] for k in keys if k in self.comments_col.docs]
+        return sorted(comments, key=lambda c: c['created_utc'], reverse=True)
+
+    def try_lease(self, key: str, owner: str, ttl: float, **fields) -> bool:
+        now = time.time()
+        with self._coordination_lock:
+            current = self.coordination.get(key)
+            if current and current['owner'] != owner and (current.get('done') or current['expires_at'] > now):
+                return False
+            self.coordination[key] = dict(current or {}, **fields, _key=key, owner=owner, expires_at=now + ttl)
+            return True
+
+    def release_lease(self, key: str, owner: str):
+        with self._coordination_lock:
+            if self.coordination.get(key, {}).get('owner') == owner:
+                del self.coordination[key]
+
+    def heartbeat(self, worker_id: str, ttl: float):
+        with self._coordination_lock:
+            self.coordination[f"worker:{worker_id}"] = {
+                'kind': 'worker', 'owner': worker_id, 'expires_at': time.time() + ttl,
+            }
+
+    def _coordination_docs(self, kind: str) -> list:
+        now = time.time()
+        with self._coordination_lock:
+            return [dict(d) for d in self.coordination.values() if d.get('kind') == kind and d['expires_at'] > now]
+
+    def claim_posts(self, post_ids: List[str], owner: str, ttl: float) -> List[str]:
+        return [pid for pid in post_ids
+                if self.try_lease(f"claim:{pid}", owner, ttl, kind='claim', post_id=pid, done=False)]
+
+    def complete_claims(self, post_ids: List[str], owner: str):
+        expires_at = time.time() + Config.WORKER_CLAIM_RETENTION_HOURS * 3600
+        with self._coordination_lock:
+            for pid in post_ids:
+                claim = self.coordination.get(f"claim:{pid}")
+                if claim and claim['owner'] == owner:
+                    claim.update(done=True, expires_at=expires_at)
+
+    def get_checkpoint(self, name: str) -> Optional[str]:
+        with self._coordination_lock:
+            return self.coordination.get(f"checkpoint:{name}", {}).get('value')
+
+    def save_checkpoint(self, name: str, value: str):
+        with self._coordination_lock:
+            self.coordination[f"checkpoint:{name}"] = {'kind': 'checkpoint', 'value': value}
+
+    def add_feedback_bulk(self, items: List[Dict]) -> Dict:
+        now = time.time()
+        result = self.feedback_col.import_bulk([{
+            'post_id': str(item['post_id']),
+            'success': bool(item['success']),
+            'notes': item.get('notes') or '',
+            'ts': item.get('ts') or now,
+        } for item in items])
+        return {'created': result['created'], 'errors': result.get('errors', 0)}
+
+    def get_feedback_outcomes(self, since: float = 0.0) -> list:
+        latest = {}
+        for f in sorted(self.feedback_col.docs.values(), key=lambda f: f['ts']):
+            if f['ts'] >= since:
+                latest[f['post_id']] = f['success']
+        outcomes = []
+        for post_id, success in latest.items():
+            post = self.col.docs.get(post_id)
+            if post is not None:
+                outcomes.append({'post_id': post_id, 'success': success,
+                                 'relevance_score': post.get('relevance_score'),
+                                 'intent': post.get('intent'), 'priority': post.get('priority')})
+        return outcomes
+
+    def get_calibration(self) -> Optional[Dict]:
+        with self._coordination_lock:
+            doc = self.coordination.get("calibration:thresholds")
+            return dict(doc) if doc else None
+
+    def save_calibration(self, doc: Dict):
+        with self._coordination_lock:
+            self.coordination["calibration:thresholds"] = dict(doc, kind='calibration', updated_at=time.time())
+
+    def insert_weekly_trends(self, doc: Dict) -> List[Dict]:
+        key = uuid.uuid4().hex
+        self.weekly_col.insert(dict(doc, _key=key, ts=doc.get('ts') or time.time(), resolution='snapshot'))
+        read_cache.invalidate('weekly')
+        return [self.weekly_col.docs[key]]
+
+    def get_latest_weekly_trends(self) -> Optional[Dict]:
+        docs = self.get_weekly_trends_range(end=float('inf'))
+        return docs[-1] if docs else None
+
+    def get_weekly_trends_range(self, start: float = 0.0, end: Optional[float] = None,
+                                resolution: Optional[str] = None, limit: int = 1000) -> list:
+        end = end or time.time()
+        docs = [d for d in list(self.weekly_col.docs.values())
+                if start <= d['ts'] < end and (resolution is None or d['resolution'] == resolution)]
+        return sorted(docs, key=lambda d: d['ts'])[:limit]
+
+    def downsample_weekly_trends(self, now: Optional[float] = None) -> Dict[str, int]:
+        now = now or time.time()
+        rolled = {}
+        for source, target, bucket_seconds, max_age_days in snapshot_rollups():
+            groups = {}
+            for d in list(self.weekly_col.docs.values()):
+                if d['resolution'] == source and \
+                        (d['ts'] // bucket_seconds + 1) * bucket_seconds <= now - max_age_days * 86400:
+                    groups.setdefault(d['ts'] // bucket_seconds, []).append(d)
+            keep, drop = rollup_buckets(list(groups.values()))
+            for key in drop:
+                del self.weekly_col.docs[key]
+            for key in keep:
+                self.weekly_col.docs[key]['resolution'] = target
+            rolled[target] = len(keep)
+        if any(rolled.values()):
+            read_cache.invalidate('weekly')
+        return rolled
+
+
+class FakeSlack:
+    """SlackNotifier stand-in that only counts notifications"""
+
+    def __init__(self, faults: Optional[FaultInjector] = None):
+        self.faults = faults or FaultInjector()
+        self.sent = 0
+
+    def notify_high_priority_post(self, result: Dict, webhook_url: Optional[str] = None,
+                                  campaigns: Optional[List[str]] = None):
+        try:
+            self.faults('slack')
+            self.sent += 1
+        except Exception as e:
+            print(f"Error sending Slack notification: {str(e)}")
+
+
+def build_replay_workflow(fixtures: Dict, faults: Optional[FaultInjector] = None,
+                          arango: Optional[InMemoryArango] = None):
+    """
+    Build a GTMAutomationWorkflow wired to fake clients
+
+    Returns:
+        Tuple of (workflow, fake reddit, fake LLM client)
+    """
+    from campaigns import Campaign
+    from reddit_monitor import RedditMonitor
+    from ai_scorer import AIScorer
+    from engagement_generator import EngagementGenerator
+    from llm_router import LLMRouter, GeminiProvider
+    from workflow import GTMAutomationWorkflow
+
+    faults = faults or FaultInjector()
+    reddit = FakeReddit(fixtures['reddit'], faults)
+    llm = FakeGenAI(fixtures['llm'], faults)
+
+    router = LLMRouter({'gemini': GeminiProvider(llm)})
+    scorer = AIScorer(router=router)
+    engagement_gen = EngagementGenerator(router=router)
+
+    monitor = RedditMonitor(client_factory=lambda: reddit)
+    # Fall back to what the fixtures were recorded with when .env has no campaign
+    if not monitor.keywords or not monitor.subreddits:
+        monitor.set_campaigns([Campaign('default', monitor.keywords or fixtures['reddit'].get('keywords', []),
+                                        monitor.subreddits or list(fixtures['reddit']['listings']))])
+
+    workflow = GTMAutomationWorkflow(
+        monitor=monitor,
+        scorer=scorer,
+        engagement_gen=engagement_gen,
+        arango=arango or InMemoryArango(),
+        slack=FakeSlack(faults),
+    )
+    return workflow, reddit, llm
@@ -0,0 +1,221 @@
+"""
+Continuous monitoring daemon with adaptive per-subreddit polling
+
+Each subreddit gets its own polling interval, derived from how many new
+matching posts it produces and how many of those turn out relevant. Busy,
+relevant subreddits are polled more often and quiet ones back off, while a
+global request budget keeps total Reddit API calls at or below a fixed rate.
+
+Usage:
+    python scheduler.py
+    python scheduler.py --budget 60 --dry-run
+"""
+import time
+from typing import Callable, Dict, List, Optional
+from config import Config
+
+# Reddit requests per poll before comment ingestion: the `new` and `hot` listings
+LISTING_REQUESTS = 2
+# Weight of the newest observation in the velocity / hit-rate averages
+SMOOTHING = 0.5
+
+
+class SubredditState:
+    """Polling statistics for one subreddit"""
+
+    __slots__ = ('name', 'interval', 'next_due', 'last_polled', 'velocity', 'hit_rate', 'cost', 'polls')
+
+    def __init__(self, name: str, interval: float, now: float):
+        self.name = name
+        self.interval = interval  # Desired seconds between polls, before budget scaling
+        self.next_due = now
+        self.last_polled = None
+        self.velocity = 0.0  # New matching posts per hour
+        self.hit_rate = 0.0  # Share of new posts that were relevant
+        self.cost = float(LISTING_REQUESTS)  # Reddit requests per poll
+        self.polls = 0
+
+    def to_dict(self) -> Dict:
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+class PollScheduler:
+    """Poll each subreddit on its own interval, within a global request budget"""
+
+    def __init__(self, workflow, subreddits: Optional[List[str]] = None,
+                 budget_per_hour: Optional[int] = None, min_interval: Optional[float] = None,
+                 max_interval: Optional[float] = None, dry_run: bool = False,
+                 clock: Callable[[], float] = time.monotonic,
+                 sleep: Callable[[float], None] = time.sleep):
+        """
+        Args:
+            workflow: GTMAutomationWorkflow used for each poll
+            subreddits: Subreddits to poll (defaults to the workflow monitor's, or
+                to the leased ones when the workflow runs in worker mode)
+            budget_per_hour: Reddit requests per hour (defaults to config value)
+            min_interval: Shortest polling interval in seconds (defaults to config value)
+            max_interval: Longest polling interval in seconds (defaults to config value)
+            dry_run: Passed to workflow.run
+        """
+        self.workflow = workflow
+        self.subreddits = subreddits
+        self.budget = budget_per_hour or Config.POLL_REQUEST_BUDGET_PER_HOUR
+        self.min_interval = min_interval or Config.POLL_MIN_SECONDS
+        self.max_interval = max_interval or Config.POLL_MAX_SECONDS
+        self.dry_run = dry_run
+        self.clock = clock
+        self.sleep = sleep
+
+        self.states = {}
+        self.tokens = float(LISTING_REQUESTS)
+        self._refilled = clock()
+        self.requests = 0
+
+    def _current_subreddits(self) -> List[str]:
+        if self.subreddits is not None:
+            return self.subreddits
+        coordinator = getattr(self.workflow, 'coordinator', None)
+        if coordinator is not None:
+            return coordinator.owned_shards()
+        return self.workflow.monitor.subreddits
+
+    def _sync_states(self, now: float):
+        names = self._current_subreddits()
+        for name in names:
+            if name not in self.states:
+                # Start from an even split of the budget
+                share = LISTING_REQUESTS * 3600 * max(1, len(names)) / self.budget
+                self.states[name] = SubredditState(name, self._clamp(share), now)
+        for name in list(self.states):
+            if name not in names:
+                del self.states[name]
+
+    def _clamp(self, interval: float) -> float:
+        return min(self.max_interval, max(self.min_interval, interval))
+
+    def _refill(self, now: float):
+        # Token bucket; a burst of at most a few minutes of budget can build up
+        rate = self.budget / 3600
+        cap = max(LISTING_REQUESTS * 2, self.budget / 12)
+        self.tokens = min(cap, self.tokens + (now - self._refilled) * rate)
+        self._refilled = now
+
+    def budget_scale(self) -> float:
+        """Factor (>= 1) stretching every interval so expected requests fit the budget"""
+        demand = sum(s.cost * 3600 / s.interval for s in self.states.values())
+        return max(1.0, demand / self.budget) if self.budget else 1.0
+
+    def adapt(self, state: SubredditState, summary: Dict, now: float):
+        """
+        Update a subreddit's statistics from one poll and pick its next interval
+
+        Velocity is new matching posts per hour since the previous poll (the
+        first poll uses everything inside the MAX_POST_AGE_HOURS window). The
+        interval aims for POLL_TARGET_POSTS new posts per poll and is shortened
+        further by the relevant-hit rate; polls without new posts back off.
+        """
+        new_posts = summary.get('new_posts', 0)
+        relevant = summary.get('relevant_posts', 0)
+        if state.last_polled is None:
+            state.velocity = summary.get('total_posts', 0) / Config.MAX_POST_AGE_HOURS
+            state.hit_rate = relevant / new_posts if new_posts else 0.0
+        else:
+            observed = new_posts / max((now - state.last_polled) / 3600, 1e-6)
+            state.velocity = SMOOTHING * observed + (1 - SMOOTHING) * state.velocity
+            if new_posts:
+                state.hit_rate = SMOOTHING * (relevant / new_posts) + (1 - SMOOTHING) * state.hit_rate
+        cost = LISTING_REQUESTS + (relevant if not self.dry_run else 0)
+        state.cost = SMOOTHING * cost + (1 - SMOOTHING) * state.cost
+
+        if new_posts == 0 or state.velocity <= 0:
+            interval = state.interval * Config.POLL_BACKOFF
+        else:
+            interval = Config.POLL_TARGET_POSTS / state.velocity * 3600
+        state.interval = self._clamp(interval / (1 + state.hit_rate))
+        state.last_polled = now
+        state.polls += 1
+
+    def poll(self, state: SubredditState) -> Dict:
+        """Run the workflow for one subreddit and reschedule it"""
+        try:
+            summary = self.workflow.run(dry_run=self.dry_run, subreddits=[state.name])
+        except Exception as e:
+            print(f"Error polling r/{state.name}: {str(e)}")
+            summary = {}
+        now = self.clock()
+        self.adapt(state, summary, now)
+        spent = LISTING_REQUESTS + (summary.get('relevant_posts', 0) if not self.dry_run else 0)
+        self.tokens -= spent
+        self.requests += spent
+        state.next_due = now + state.interval * self.budget_scale()
+        print(f"[scheduler] r/{state.name}: {summary.get('new_posts', 0)} new, "
+              f"{summary.get('relevant_posts', 0)} relevant, velocity {state.velocity:.1f}/h, "
+              f"hit rate {state.hit_rate:.2f}, next poll in {state.next_due - now:.0f}s")
+        return summary
+
+    def tick(self) -> float:
+        """
+        Poll every due subreddit the budget allows, most valuable first
+
+        Returns:
+            Seconds until the next poll could happen
+        """
+        now = self.clock()
+        self._sync_states(now)
+        self._refill(now)
+
+        due = [s for s in self.states.values() if s.next_due <= now]
+        # When the budget is short, subreddits with the most relevant posts per hour go first
+        due.sort(key=lambda s: (-(s.velocity * s.hit_rate), s.next_due))
+        for state in due:
+            if self.tokens < LISTING_REQUESTS:
+                break
+            self.poll(state)
+
+        now = self.clock()
+        self._refill(now)
+        if not self.states:
+            return self.max_interval
+        wait = min(s.next_due for s in self.states.values()) - now
+        if self.tokens < LISTING_REQUESTS:
+            wait = max(wait, (LISTING_REQUESTS - self.tokens) * 3600 / self.budget)
+        return max(1.0, wait)
+
+    def run_forever(self, max_polls: Optional[int] = None):
+        """Poll until interrupted (or until max_polls polls have run)"""
+        while max_polls is None or sum(s.polls for s in self.states.values()) < max_polls:
+            self.sleep(self.tick())
+
+    def stats(self) -> Dict:
+        return {
+            'requests': self.requests,
+            'budget_scale': self.budget_scale(),
+            'subreddits': {name: state.to_dict() for name, state in self.states.items()},
+        }
+
+
+def main():
+    """Main entry point"""
+    import argparse
+    from workflow import GTMAutomationWorkflow
+
+    parser = argparse.ArgumentParser(description='GTM continuous monitoring daemon')
+    parser.add_argument('--budget', type=int, default=Config.POLL_REQUEST_BUDGET_PER_HOUR,
+                        help='Reddit requests per hour across all subreddits')
+    parser.add_argument('--dry-run', action='store_true',
+                        help='Run without writing to ArangoDB or sending notifications')
+    args = parser.parse_args()
+
+    workflow = GTMAutomationWorkflow(dry_run=args.dry_run)
+    scheduler = PollScheduler(workflow, budget_per_hour=args.budget, dry_run=args.dry_run)
+    print(f"Polling {len(workflow.monitor.subreddits)} subreddits within {args.budget} requests/hour")
+    try:
+        scheduler.run_forever()
+    except KeyboardInterrupt:
+        print("\nStopping scheduler...")
+        for name, state in scheduler.stats()['subreddits'].items():
+            print(f"  r/{name}: {state['polls']} polls, every ~{state['interval']:.0f}s")
+
+
+if __name__ == "__main__":
+    main()
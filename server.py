@@ -1,7 +1,22 @@
-from fastapi import FastAPI
+import asyncio
+import json
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import List, Optional
+from fastapi import FastAPI, Request
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+from pydantic import BaseModel
+from engagement_generator import EngagementGenerator
+from post_events import PostEventFeed
+from profiling import Profiler
+from read_cache import CachedResponse, read_cache
 from workflow import GTMAutomationWorkflow
 from trends_analyzer import TrendsAnalyzer
+from arango_manager import ArangoManager
 app = FastAPI()
 app.add_middleware(
     CORSMiddleware,
@@ -11,19 +26,291 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Factories are module attributes so stand-ins can be swapped in (see loadtest.py)
+workflow_factory = GTMAutomationWorkflow
+trends_factory = TrendsAnalyzer
+arango_factory = ArangoManager
+engagement_factory = EngagementGenerator
+
+# One pipeline run of each kind at a time; extra clicks get a 409 instead of a second run
+_gtm_lock = threading.Lock()
+_gtm_week_lock = threading.Lock()
+_arango = None
+_post_feed = None
+_engagement_gen = None
+# Post id -> [lock, requests holding or waiting for it], so concurrent first
+# views of a post write its draft once
+_draft_locks = {}
+_draft_locks_guard = threading.Lock()
+
+
+def get_arango() -> ArangoManager:
+    global _arango
+    if _arango is None:
+        _arango = arango_factory()
+    return _arango
+
+
+def get_post_feed() -> PostEventFeed:
+    global _post_feed
+    if _post_feed is None:
+        _post_feed = PostEventFeed(get_arango())
+    return _post_feed
+
+
+def _already_running(name: str) -> JSONResponse:
+    return JSONResponse(status_code=409, content={"status": "already_running", "job": name})
+
+
+def _run(name: str, job, profile: bool, response: dict) -> dict:
+    """Run job() into response['result']; with profile, under a Profiler whose report goes in response['profile']"""
+    if not profile:
+        response['result'] = job()
+        return response
+    with Profiler(name) as profiler:
+        response['result'] = job()
+    response['profile'] = profiler.report()
+    return response
+
+
 @app.post("/gtm")
-def start():
+def start(profile: bool = False):
+    if not _gtm_lock.acquire(blocking=False):
+        return _already_running("gtm")
     try:
-      GTM = GTMAutomationWorkflow()
-      result=GTM.run(False)
-      return {"status": "started", "result": result}
+      GTM = workflow_factory()
+      return _run("gtm", lambda: GTM.run(False), profile, {"status": "started"})
     except Exception as e:
         return {"error":str(e)}
+    finally:
+        _gtm_lock.release()
 @app.post("/gtm_week")
-def start():
+def start_week(profile: bool = False):
+    if not _gtm_week_lock.acquire(blocking=False):
+        return _already_running("gtm_week")
+    try:
+      Trend = trends_factory()
+      return _run("gtm_week", Trend.run, profile, {})
+    except Exception as e:
+        return {"error":str(e)}
+    finally:
+        _gtm_week_lock.release()
+def _conditional(request: Request, entry: CachedResponse) -> Response:
+    """304 when the client's ETag/date still match, else the cached body"""
+    headers = {
+        "ETag": entry.etag,
+        "Last-Modified": entry.last_modified_header,
+        "Cache-Control": "no-cache",
+    }
+    if entry.not_modified(request.headers.get("if-none-match"), request.headers.get("if-modified-since")):
+        return Response(status_code=304, headers=headers)
+    return Response(content=entry.body, media_type="application/json", headers=headers)
+
+
+@app.get("/api/posts")
+def posts(request: Request, limit: int = 100, offset: int = 0, campaign: Optional[str] = None):
     try:
-      Trend = TrendsAnalyzer()
-      result=Trend.run()
-      return {"result": result}
+      limit = min(limit, 1000)
+      entry = read_cache.get("posts", f"{limit}:{offset}:{campaign or ''}",
+                             lambda: get_arango().get_posts_page(limit=limit, offset=offset, campaign=campaign))
+      return _conditional(request, entry)
     except Exception as e:
         return {"error":str(e)}
+@app.get("/api/weekly_report")
+def weekly_report(request: Request):
+    try:
+      entry = read_cache.get("weekly", "latest", lambda: get_arango().get_latest_weekly_trends())
+      return _conditional(request, entry)
+    except Exception as e:
+        return {"error":str(e)}
+
+
+class FeedbackItem(BaseModel):
+    post_id: str
+    success: bool
+    notes: str = ""
+    ts: Optional[float] = None  # Epoch seconds of the outcome; defaults to now
+
+
+@app.post("/api/feedback")
+def feedback(items: List[FeedbackItem]):
+    """Store engagement outcomes in one import; calibration.py fits thresholds to them"""
+    try:
+      return get_arango().add_feedback_bulk([item.dict() for item in items])
+    except Exception as e:
+        return {"error":str(e)}
+
+
+@contextmanager
+def _draft_lock(post_id: str):
+    """Hold the post's draft lock; the entry is dropped once no request holds or waits for it"""
+    with _draft_locks_guard:
+        entry = _draft_locks.setdefault(post_id, [threading.Lock(), 0])
+        entry[1] += 1
+    try:
+        with entry[0]:
+            yield
+    finally:
+        with _draft_locks_guard:
+            entry[1] -= 1
+            if not entry[1]:
+                del _draft_locks[post_id]
+
+
+@app.get("/api/posts/{post_id}/draft")
+def post_draft(post_id: str):
+    """
+    Engagement drafts of a post, written on first request when the pipeline
+    stored it as draft pending (LAZY_DRAFTS) and cached in its Arango doc
+    """
+    global _engagement_gen
+    try:
+      arango = get_arango()
+      doc = arango.get_post(post_id)
+      if doc is None:
+          return JSONResponse(status_code=404, content={"error": "post not found"})
+      if doc.get('draft_status') == 'pending':
+          with _draft_lock(post_id):
+              # Re-read: a request that held the lock before may have drafted it
+              doc = arango.get_post(post_id)
+              if doc is None:
+                  return JSONResponse(status_code=500, content={"error": "post could not be read"})
+              if doc.get('draft_status') == 'pending':
+                  if _engagement_gen is None:
+                      _engagement_gen = engagement_factory()
+                  engagement = _engagement_gen.generate_for_document(doc)
+                  saved = arango.save_draft(post_id, engagement.to_document())
+                  if saved is None:
+                      # Another process drafted it first (its draft wins), or the write failed
+                      saved = arango.get_post(post_id)
+                      if saved is None or saved.get('draft_status') == 'pending':
+                          return JSONResponse(status_code=500, content={"error": "draft could not be saved"})
+                  doc = saved
+      return {field: doc.get(field) for field in (
+          'post_id', 'engagement_comment', 'engagement_dm', 'engagement_strategy', 'priority', 'draft_status')}
+    except Exception as e:
+        return {"error":str(e)}
+
+
+def _epoch(value: Optional[str]) -> Optional[float]:
+    """Epoch seconds from a number or an ISO date/time (UTC when no offset is given)"""
+    if not value:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        parsed = datetime.fromisoformat(value)
+        if parsed.tzinfo is None:
+            parsed = parsed.replace(tzinfo=timezone.utc)
+        return parsed.timestamp()
+
+
+@app.get("/api/weekly_report/history")
+def weekly_report_history(request: Request, start: Optional[str] = None, end: Optional[str] = None,
+                          resolution: Optional[str] = None, limit: int = 1000):
+    """
+    Weekly analysis snapshots between start and end (epoch seconds or ISO dates),
+    oldest first; older history is downsampled to daily/weekly/monthly docs
+    """
+    try:
+      limit = min(limit, 5000)
+      since, until = _epoch(start) or 0.0, _epoch(end)
+      entry = read_cache.get("weekly", f"history:{since}:{until}:{resolution}:{limit}",
+                             lambda: get_arango().get_weekly_trends_range(since, until, resolution, limit))
+      return _conditional(request, entry)
+    except ValueError as e:
+        return JSONResponse(status_code=400, content={"error": str(e)})
+    except Exception as e:
+        return {"error":str(e)}
+
+
+def _csv(value: Optional[str]) -> set:
+    return {v.strip().lower() for v in (value or '').split(',') if v.strip()}
+
+
+def _facet(value: Optional[str]) -> List[str]:
+    """Comma-separated facet values, as stored (facets are matched exactly)"""
+    return sorted({v.strip() for v in (value or '').split(',') if v.strip()})
+
+
+def _iso(value: Optional[str]) -> Optional[str]:
+    """An ISO date/time in the form post timestamps are stored in"""
+    return datetime.fromisoformat(value).replace(tzinfo=None).isoformat() if value else None
+
+
+@app.get("/api/posts/search")
+def search_posts(request: Request, q: str = "", subreddit: Optional[str] = None,
+                 intent: Optional[str] = None, priority: Optional[str] = None,
+                 start: Optional[str] = None, end: Optional[str] = None,
+                 limit: int = 20, offset: int = 0, campaign: Optional[str] = None):
+    """
+    Full-text search over stored posts (title, summary, AI reasoning), best BM25
+    match first; subreddit/intent/priority/campaign take comma-separated values and
+    start/end bound the post date. Without q, matches come newest first.
+    """
+    try:
+      limit, offset = min(max(limit, 1), 100), max(offset, 0)
+      facets = {'subreddits': _facet(subreddit), 'intents': _facet(intent), 'priorities': _facet(priority),
+                'campaigns': _facet(campaign), 'start': _iso(start), 'end': _iso(end)}
+      key = json.dumps([q, facets, limit, offset], sort_keys=True)
+      entry = read_cache.get("posts", f"search:{key}",
+                             lambda: get_arango().search_posts(q, limit=limit, offset=offset, **facets))
+      return _conditional(request, entry)
+    except ValueError as e:
+        return JSONResponse(status_code=400, content={"error": str(e)})
+    except Exception as e:
+        return {"error":str(e)}
+
+
+def _sse(event_id: str, doc: dict) -> str:
+    return f"id: {event_id}\nevent: post\ndata: {json.dumps(doc, default=str)}\n\n"
+
+
+@app.get("/api/posts/stream")
+async def posts_stream(request: Request, priority: Optional[str] = None,
+                       subreddit: Optional[str] = None, last_event_id: Optional[str] = None):
+    """
+    Server-sent events: one `post` event per analyzed post as soon as it is stored
+
+    priority/subreddit take comma-separated values to filter on. Reconnecting
+    clients send Last-Event-ID (or ?last_event_id=) and get what they missed.
+    """
+    feed = get_post_feed()
+    priorities = _csv(priority)
+    subreddits = _csv(subreddit)
+    last_event_id = request.headers.get('last-event-id') or last_event_id
+
+    def wanted(doc: dict) -> bool:
+        if priorities and str(doc.get('priority', '')).lower() not in priorities:
+            return False
+        if subreddits and str(doc.get('subreddit', '')).lower() not in subreddits:
+            return False
+        return True
+
+    async def events():
+        seq = feed.subscribe()
+        try:
+            yield "retry: 3000\n\n"
+            sent = set()
+            if last_event_id:
+                for event_id, doc in await run_in_threadpool(feed.backfill, last_event_id):
+                    sent.add(event_id)
+                    if wanted(doc):
+                        yield _sse(event_id, doc)
+            keepalive = time.monotonic()
+            while not await request.is_disconnected():
+                batch, seq = feed.events_after(seq)
+                for event_id, doc in batch:
+                    if event_id not in sent and wanted(doc):
+                        yield _sse(event_id, doc)
+                        keepalive = time.monotonic()
+                if time.monotonic() - keepalive > 15:
+                    # Comment line; keeps proxies from closing an idle stream
+                    yield ": keepalive\n\n"
+                    keepalive = time.monotonic()
+                await asyncio.sleep(0.5)
+        finally:
+            feed.unsubscribe()
+
+    return StreamingResponse(events(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
@@ -3,8 +3,9 @@ Google Sheets integration for storing results
 """
 import gspread
 from google.oauth2.service_account import Credentials
-from typing import List, Dict
+from typing import List
 from config import Config
+from models import AnalysisResult
 from datetime import datetime
 
 
@@ -59,36 +60,34 @@ class SheetsManager:
         except Exception as e:
             print(f"Error checking headers: {str(e)}")
     
-    def add_results(self, results: List[Dict]):
+    def add_results(self, results: List[AnalysisResult]):
         """
         Add results to Google Sheet
         
         Args:
-            results: List of dictionaries with post data, classification, and engagement
+            results: Analysis results with post data, classification, and engagement
         """
         rows_to_add = []
         
         for result in results:
-            post_data = result.get('post_data', {})
-            classification = result.get('classification', {})
-            engagement = result.get('engagement', {})
+            doc = result.to_document()
             
             row = [
                 datetime.now().isoformat(),  # Timestamp
-                post_data.get('link', ''),  # Post Link
-                post_data.get('title', ''),  # Post Title
-                result.get('summary', ''),  # Post Summary
-                post_data.get('author', ''),  # Author
-                post_data.get('subreddit', ''),  # Subreddit
-                classification.get('relevance_score', 0.0),  # Relevance Score
-                classification.get('is_relevant', False),  # Is Relevant
-                classification.get('intent', ''),  # Intent
-                classification.get('intent_score', 0.0),  # Intent Score
-                engagement.get('comment_draft', ''),  # Engagement Comment
-                engagement.get('dm_draft', ''),  # Engagement DM
-                engagement.get('strategy', ''),  # Engagement Strategy
-                engagement.get('priority', ''),  # Priority
-                classification.get('reasoning', '')  # AI Reasoning
+                doc['post_link'],  # Post Link
+                doc['post_title'],  # Post Title
+                doc['post_summary'],  # Post Summary
+                doc['author'],  # Author
+                doc['subreddit'],  # Subreddit
+                doc['relevance_score'],  # Relevance Score
+                doc['is_relevant'],  # Is Relevant
+                doc['intent'],  # Intent
+                doc['intent_score'],  # Intent Score
+                doc['engagement_comment'],  # Engagement Comment
+                doc['engagement_dm'] or '',  # Engagement DM
+                doc['engagement_strategy'],  # Engagement Strategy
+                doc['priority'],  # Priority
+                doc['ai_reasoning']  # AI Reasoning
             ]
             
             rows_to_add.append(row)
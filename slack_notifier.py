@@ -2,8 +2,9 @@
 Slack notification module for high-priority posts
 """
 import requests
-from typing import Dict
+from typing import List, Optional
 from config import Config
+from models import AnalysisResult
 
 
 class SlackNotifier:
@@ -13,33 +14,37 @@ class SlackNotifier:
         """Initialize Slack webhook URL"""
         self.webhook_url = Config.SLACK_WEBHOOK_URL
     
-    def notify_high_priority_post(self, result: Dict):
+    def notify_high_priority_post(self, result: AnalysisResult, webhook_url: Optional[str] = None,
+                                  campaigns: Optional[List[str]] = None):
         """
         Send Slack notification for high-priority post
         
         Args:
-            result: Dictionary containing post data, classification, and engagement
+            result: Analysis result with post data, classification, and engagement
+            webhook_url: Campaign's Slack target (defaults to config value)
+            campaigns: Names of the campaigns alerting, shown in the message
         """
-        if not self.webhook_url:
+        webhook_url = webhook_url or self.webhook_url
+        if not webhook_url:
             return
         
-        post_data = result.get('post_data', {})
-        classification = result.get('classification', {})
-        engagement = result.get('engagement', {})
+        post_data = result.post
+        classification = result.classification
+        engagement = result.engagement
         
-        relevance_score = classification.get('relevance_score', 0.0)
-        intent = classification.get('intent', 'unknown')
-        priority = engagement.get('priority', 'medium')
+        relevance_score = classification.relevance_score
+        intent = classification.intent
+        priority = engagement.priority or 'medium'
         
         # Only notify for high relevance or high priority
         if relevance_score < Config.HIGH_RELEVANCE_THRESHOLD and priority != 'high':
             return
         
-        title = post_data.get('title', 'No title')
-        link = post_data.get('link', '')
-        subreddit = post_data.get('subreddit', '')
-        summary = result.get('summary', '')[:300]
-        comment_draft = engagement.get('comment_draft', '')[:200]
+        title = post_data.title or 'No title'
+        link = post_data.link
+        subreddit = post_data.subreddit
+        summary = result.summary[:300]
+        comment_draft = engagement.comment_draft[:200]
         
         # Format Slack message
         message = {
@@ -71,7 +76,10 @@ class SlackNotifier:
                             "type": "mrkdwn",
                             "text": f"*Priority:* {priority.upper()}"
                         }
-                    ]
+                    ] + ([{
+                        "type": "mrkdwn",
+                        "text": f"*Campaigns:* {', '.join(campaigns)}"
+                    }] if campaigns else [])
                 },
                 {
                     "type": "section",
@@ -105,7 +113,7 @@ class SlackNotifier:
         }
         
         try:
-            response = requests.post(self.webhook_url, json=message)
+            response = requests.post(webhook_url, json=message)
             response.raise_for_status()
             print(f"Slack notification sent for post: {title[:50]}")
         except Exception as e:
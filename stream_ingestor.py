@@ -0,0 +1,154 @@
+"""
+Streaming ingestion: score posts as they are submitted instead of on a schedule
+
+A fetch thread follows RedditMonitor.stream_posts over a multireddit of the
+configured subreddits and puts matching posts on a bounded queue. The main
+thread takes them off in batches and runs the scoring, storage and
+notification steps. A full queue blocks the fetch thread (backpressure), and
+the cursor is only checkpointed after a batch has been processed, so a restart
+re-reads anything that was fetched but not yet scored.
+
+Usage:
+    python stream_ingestor.py
+    python stream_ingestor.py --subreddits marketing,startups
+"""
+import queue
+import threading
+import time
+from typing import Dict, List, Optional
+from config import Config
+from models import Post
+
+
+class StreamIngestor:
+    """Feed the submission stream into the workflow through a bounded queue"""
+
+    def __init__(self, workflow, subreddits: Optional[List[str]] = None,
+                 queue_size: Optional[int] = None, batch_size: Optional[int] = None,
+                 batch_seconds: Optional[float] = None, checkpoint: str = 'stream',
+                 dry_run: bool = False):
+        """
+        Args:
+            workflow: GTMAutomationWorkflow whose monitor and scoring stages are used
+            subreddits: Subreddits to stream (defaults to the monitor's)
+            queue_size: Posts buffered between fetch and scoring (defaults to config value)
+            batch_size: Posts per workflow pass (defaults to config value)
+            batch_seconds: Max wait to fill a batch (defaults to config value)
+            checkpoint: Name of the stored stream cursor
+            dry_run: Passed to workflow.process_posts; the cursor is not stored
+        """
+        self.workflow = workflow
+        self.subreddits = subreddits or workflow.monitor.subreddits
+        self.batch_size = batch_size or Config.STREAM_BATCH_SIZE
+        self.batch_seconds = batch_seconds or Config.STREAM_BATCH_SECONDS
+        self.checkpoint = checkpoint
+        self.dry_run = dry_run
+        self.stats = {'fetched': 0, 'batches': 0, 'processed': 0, 'relevant': 0, 'high_priority': 0}
+
+        self._queue = queue.Queue(maxsize=queue_size or Config.STREAM_QUEUE_SIZE)
+        self._stopped = threading.Event()
+        self._thread = None
+
+    def _arango(self):
+        return None if self.dry_run else getattr(self.workflow, 'arango', None)
+
+    def start(self):
+        """Start the fetch thread from the stored cursor"""
+        arango = self._arango()
+        cursor = arango.get_checkpoint(self.checkpoint) if arango is not None else None
+        # '<fullname>@<created_utc>'; older checkpoints hold only the fullname
+        before, _, created = (cursor or '').partition('@')
+        print(f"Streaming r/{'+'.join(self.subreddits)} from {before or 'the newest posts'}")
+        self._thread = threading.Thread(target=self._fetch_loop,
+                                        args=(before or None, float(created) if created else None),
+                                        daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stopped.set()
+
+    def _fetch_loop(self, before: Optional[str], before_created: Optional[float] = None):
+        monitor = self.workflow.monitor
+        # PRAW clients are not thread-safe; the fetch thread gets its own
+        stream = monitor.stream_posts(self.subreddits, before=before, reddit=monitor._new_client(),
+                                      before_created=before_created)
+        for post in stream:
+            if self._stopped.is_set():
+                return
+            if post is None:
+                continue
+            while not self._stopped.is_set():
+                try:
+                    # Blocks while scoring is behind; the stream is not polled meanwhile
+                    self._queue.put(post, timeout=1.0)
+                    self.stats['fetched'] += 1
+                    break
+                except queue.Full:
+                    continue
+
+    def _next_batch(self) -> List[Post]:
+        batch = []
+        deadline = time.monotonic() + self.batch_seconds
+        while len(batch) < self.batch_size and not self._stopped.is_set():
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=min(remaining, 1.0)))
+            except queue.Empty:
+                continue
+        return batch
+
+    def process_batch(self, batch: List[Post]) -> Dict:
+        """Score one batch, then advance the stored cursor past it"""
+        summary = self.workflow.process_posts(batch, dry_run=self.dry_run)
+        self.stats['batches'] += 1
+        self.stats['processed'] += summary.get('processed', 0)
+        self.stats['relevant'] += summary.get('relevant_posts', 0)
+        self.stats['high_priority'] += summary.get('high_priority', 0)
+
+        arango = self._arango()
+        if arango is not None:
+            # The creation time lets a restart page back to it if the cursor post is removed
+            last = batch[-1]
+            arango.save_checkpoint(self.checkpoint, f"t3_{last.post_id}@{last.created_utc}")
+        return summary
+
+    def run_forever(self, max_batches: Optional[int] = None):
+        """Process batches until stopped (or until max_batches batches were processed)"""
+        if self._thread is None:
+            self.start()
+        while not self._stopped.is_set():
+            batch = self._next_batch()
+            if batch:
+                self.process_batch(batch)
+                print(f"[stream] {self.stats['processed']} posts scored, "
+                      f"{self._queue.qsize()} waiting")
+            if max_batches is not None and self.stats['batches'] >= max_batches:
+                break
+
+
+def main():
+    """Main entry point"""
+    import argparse
+    from workflow import GTMAutomationWorkflow
+
+    parser = argparse.ArgumentParser(description='GTM submission streaming')
+    parser.add_argument('--subreddits', help='Comma-separated subreddits (defaults to SUBREDDITS)')
+    parser.add_argument('--dry-run', action='store_true',
+                        help='Run without writing to ArangoDB or sending notifications')
+    args = parser.parse_args()
+
+    subreddits = [s.strip() for s in args.subreddits.split(',')] if args.subreddits else None
+    workflow = GTMAutomationWorkflow(dry_run=args.dry_run)
+    ingestor = StreamIngestor(workflow, subreddits=subreddits, dry_run=args.dry_run)
+    try:
+        ingestor.run_forever()
+    except KeyboardInterrupt:
+        print("\nStopping stream...")
+        ingestor.stop()
+        print(f"Stream stats: {ingestor.stats}")
+
+
+if __name__ == "__main__":
+    main()
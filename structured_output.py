@@ -0,0 +1,205 @@
+"""
+Schema-constrained JSON generation with a single validated parse path
+"""
+import json
+import threading
+from typing import Dict, List, Optional, Tuple
+from config import Config
+from llm_router import DEFAULT_TIER, LLMRouter
+from prompt_builder import token_usage
+
+INTENTS = ['question', 'complaint', 'vendor_search', 'general_chatter', 'case_study', 'advice_seeking']
+
+# Call type -> field -> spec. Specs use Gemini's schema vocabulary so the same
+# dict drives both the declared response_schema and local validation.
+SCHEMAS = {
+    'classify': {
+        'relevance_score': {'type': 'NUMBER', 'minimum': 0.0, 'maximum': 1.0, 'default': 0.0},
+        'is_relevant': {'type': 'BOOLEAN', 'default': False},
+        'intent': {'type': 'STRING', 'enum': INTENTS, 'default': 'unknown'},
+        'intent_score': {'type': 'NUMBER', 'minimum': 0.0, 'maximum': 1.0, 'default': 0.0},
+        'reasoning': {'type': 'STRING', 'default': 'No reasoning provided'},
+    },
+    'summary': {
+        'summary': {'type': 'STRING', 'default': ''},
+    },
+    'sentiment': {
+        'sentiment': {'type': 'STRING', 'enum': ['positive', 'neutral', 'negative'], 'default': ''},
+        'sentiment_level': {'type': 'INTEGER', 'minimum': 0, 'maximum': 10, 'default': 0},
+    },
+    'engagement': {
+        'comment_draft': {'type': 'STRING', 'default': ''},
+        'dm_draft': {'type': 'STRING', 'nullable': True, 'default': None},
+        'strategy': {'type': 'STRING', 'default': ''},
+    },
+}
+
+_INVALID = object()
+
+
+def response_schema(kind: str, fields: Optional[List[str]] = None) -> Dict:
+    """Gemini response_schema for a call type, optionally limited to some fields"""
+    specs = SCHEMAS[kind]
+    names = fields or list(specs)
+    properties = {}
+    for name in names:
+        spec = specs[name]
+        properties[name] = {k: v for k, v in spec.items() if k != 'default'}
+    required = [name for name in names if not specs[name].get('nullable')]
+    return {'type': 'OBJECT', 'properties': properties, 'required': required}
+
+
+def _coerce(value, spec: Dict):
+    """Coerce one value to its spec, or return _INVALID"""
+    if value is None or (isinstance(value, str) and value.strip().lower() in ('', 'null', 'none')):
+        return None if spec.get('nullable') else _INVALID
+
+    kind = spec['type']
+    try:
+        if kind == 'BOOLEAN':
+            if isinstance(value, bool):
+                return value
+            if isinstance(value, (int, float)):
+                return bool(value)
+            text = str(value).strip().lower()
+            if text in ('true', 'yes', '1'):
+                return True
+            if text in ('false', 'no', '0'):
+                return False
+            return _INVALID
+        if kind in ('NUMBER', 'INTEGER'):
+            if isinstance(value, bool):
+                return _INVALID
+            number = float(str(value).strip().rstrip('%'))
+            if kind == 'INTEGER':
+                number = int(round(number))
+            if 'minimum' in spec and number < spec['minimum']:
+                return _INVALID
+            if 'maximum' in spec and number > spec['maximum']:
+                return _INVALID
+            return number
+        text = str(value).strip()
+        if 'enum' in spec:
+            text = text.lower().replace(' ', '_').replace('-', '_')
+            return text if text in spec['enum'] else _INVALID
+        return text
+    except (TypeError, ValueError):
+        return _INVALID
+
+
+def validate(kind: str, data: Dict, fields: Optional[List[str]] = None) -> Tuple[Dict, List[str]]:
+    """
+    Coerce a parsed response against the call type's schema
+
+    Returns:
+        Tuple of (valid values, names of missing/invalid fields)
+    """
+    specs = SCHEMAS[kind]
+    values = {}
+    invalid = []
+    for name in fields or list(specs):
+        value = _coerce(data.get(name), specs[name])
+        if value is _INVALID:
+            invalid.append(name)
+        else:
+            values[name] = value
+    return values, invalid
+
+
+def _loads(raw: str) -> Optional[Dict]:
+    try:
+        data = json.loads(raw)
+    except (TypeError, ValueError):
+        return None
+    return data if isinstance(data, dict) else None
+
+
+class ParseStats:
+    """Per-call-type counters for structured output problems"""
+
+    FIELDS = ('calls', 'parse_failures', 'invalid_fields', 'field_retries', 'defaulted_fields')
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stats = {}
+
+    def add(self, kind: str, **counts):
+        with self._lock:
+            stats = self._stats.setdefault(kind, dict.fromkeys(self.FIELDS, 0))
+            for name, count in counts.items():
+                stats[name] += count
+
+    def summary(self) -> Dict:
+        with self._lock:
+            return {kind: dict(stats) for kind, stats in self._stats.items()}
+
+    def reset(self):
+        with self._lock:
+            self._stats = {}
+
+
+parse_stats = ParseStats()
+
+
+def _call(client, kind: str, prompt: str, model: str, fields: Optional[List[str]] = None,
+          tier: str = DEFAULT_TIER):
+    if isinstance(client, LLMRouter):
+        # The router picks the provider and that provider's model for the tier
+        response = client.generate(kind, prompt, response_schema(kind, fields), tier)
+        token_usage.record(kind, prompt, response)
+        return response
+    response = client.models.generate_content(
+        model=model,
+        contents=prompt,
+        config={
+            'response_mime_type': 'application/json',
+            'response_schema': response_schema(kind, fields),
+        }
+    )
+    token_usage.record(kind, prompt, response)
+    return response
+
+
+def generate_json(client, kind: str, prompt: str, model: str = "gemini-2.5-flash",
+                  tier: str = DEFAULT_TIER) -> Optional[Dict]:
+    """
+    Request schema-constrained JSON and return validated values
+
+    client is an LLMRouter (model is then chosen per provider from the tier's
+    models, and model is ignored) or a bare google.genai client (tier is ignored).
+
+    Invalid fields are re-requested on their own (up to Config.LLM_FIELD_RETRIES
+    times); anything still invalid gets the schema default.
+
+    Returns:
+        Dict with every schema field, or None when the response was not a JSON
+        object (the caller should use its fallback)
+    """
+    parse_stats.add(kind, calls=1)
+    response = _call(client, kind, prompt, model, tier=tier)
+    data = _loads(response.text or '')
+    if data is None:
+        parse_stats.add(kind, parse_failures=1)
+        return None
+
+    values, invalid = validate(kind, data)
+    if invalid:
+        parse_stats.add(kind, invalid_fields=len(invalid))
+
+    retries = Config.LLM_FIELD_RETRIES
+    while invalid and retries > 0:
+        retries -= 1
+        parse_stats.add(kind, field_retries=1)
+        retry_prompt = (f"{prompt}\n\nYour previous answer had missing or invalid values for: "
+                        f"{', '.join(invalid)}. Respond with JSON containing only these fields.")
+        retry = _loads(_call(client, kind, retry_prompt, model, invalid, tier).text or '')
+        if retry is None:
+            continue
+        fixed, invalid = validate(kind, retry, invalid)
+        values.update(fixed)
+
+    if invalid:
+        parse_stats.add(kind, defaulted_fields=len(invalid))
+        for name in invalid:
+            values[name] = SCHEMAS[kind][name]['default']
+    return values
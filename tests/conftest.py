@@ -0,0 +1,9 @@
+"""
+Offline tests: everything runs on the replay fakes (replay.py), no services needed
+
+    python -m pytest -q tests
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,87 @@
+import time
+
+import pytest
+
+from arango_writer import BufferedArangoWriter
+from replay import _MemoryCollection
+
+
+class FlakyCollection(_MemoryCollection):
+    """In-memory collection rejecting some keys a number of times, reporting positions like ArangoDB"""
+
+    def __init__(self, rejects=None, positions=True):
+        super().__init__()
+        self.rejects = dict(rejects or {})
+        self.positions = positions
+        self.calls = []
+
+    def import_bulk(self, documents, **kwargs):
+        self.calls.append([d['_key'] for d in documents])
+        bad = [i for i, d in enumerate(documents) if self.rejects.get(d['_key'], 0) > 0]
+        for i in bad:
+            self.rejects[documents[i]['_key']] -= 1
+        result = super().import_bulk([d for i, d in enumerate(documents) if i not in bad], **kwargs)
+        details = [f"at position {i}: write-write conflict" for i in bad] if self.positions else []
+        result.update(errors=len(bad), details=details)
+        return result
+
+
+@pytest.fixture(autouse=True)
+def no_backoff(monkeypatch):
+    monkeypatch.setattr(time, 'sleep', lambda seconds: None)
+
+
+def docs(n):
+    return [{'_key': f"k{i}", 'n': i} for i in range(n)]
+
+
+def test_chunks_and_stamps():
+    col = FlakyCollection()
+    with BufferedArangoWriter(col, chunk_size=3, workers=1, stamp='written_at') as writer:
+        writer.add_many(docs(10))
+    assert sorted(len(c) for c in col.calls) == [1, 3, 3, 3]
+    assert len(col.docs) == 10 and all('written_at' in d for d in col.docs.values())
+    assert writer.stats['written'] == 10 and not writer.failed_keys
+
+
+def test_retries_only_the_failed_docs():
+    col = FlakyCollection(rejects={'k2': 1, 'k4': 2})
+    with BufferedArangoWriter(col, chunk_size=10, workers=1, retries=2) as writer:
+        writer.add_many(docs(6))
+    assert col.calls == [['k0', 'k1', 'k2', 'k3', 'k4', 'k5'], ['k2', 'k4'], ['k4']]
+    assert len(col.docs) == 6
+    assert writer.stats == {'written': 6, 'failed': 0, 'retried': 3, 'chunks': 3}
+    assert not writer.failed_keys
+
+
+def test_exhausted_retries_report_failed_keys():
+    col = FlakyCollection(rejects={'k1': 5})
+    with BufferedArangoWriter(col, chunk_size=10, workers=1, retries=1) as writer:
+        writer.add_many(docs(3))
+    assert writer.failed_keys == {'k1'}
+    assert writer.stats['failed'] == 1 and writer.stats['written'] == 2
+    assert writer.errors
+
+
+def test_errors_without_position_fail_the_whole_chunk():
+    col = FlakyCollection(rejects={'k1': 1}, positions=False)
+    with BufferedArangoWriter(col, chunk_size=2, workers=1, retries=2) as writer:
+        writer.add_many(docs(4))
+    # Nothing to retry, and any doc of the first chunk may be the one that failed
+    assert writer.failed_keys == {'k0', 'k1'}
+    assert writer.stats['failed'] == 1
+
+
+def test_import_exception_retries_then_fails_the_chunk():
+    class Down:
+        calls = 0
+
+        def import_bulk(self, documents, **kwargs):
+            Down.calls += 1
+            raise ConnectionError('arango down')
+
+    with BufferedArangoWriter(Down(), chunk_size=5, workers=1, retries=2) as writer:
+        writer.add_many(docs(3))
+    assert Down.calls == 3
+    assert writer.failed_keys == {'k0', 'k1', 'k2'}
+    assert writer.stats['failed'] == 3
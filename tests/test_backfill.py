@@ -0,0 +1,74 @@
+import json
+
+import pytest
+
+from backfill import _filters, _init_worker, filter_block, read_blocks
+
+
+def record(post_id, subreddit='startups', title='Fighting customer churn', created=1_700_000_000, **extra):
+    return dict(id=post_id, subreddit=subreddit, title=title, selftext='', author='someone',
+                permalink=f"/r/{subreddit}/comments/{post_id}/x/", created_utc=created, **extra)
+
+
+def lines(records):
+    return b''.join(json.dumps(r).encode() + b'\n' for r in records)
+
+
+@pytest.fixture
+def filters():
+    yield _init_worker
+    _filters.clear()
+
+
+def test_filter_block_matches_subreddit_keyword_and_dates(filters):
+    filters(['Startups'], ['Customer Churn'], after=1_600_000_000, before=1_800_000_000)
+    block = lines([
+        record('a'),
+        record('b', subreddit='cooking'),
+        record('c', title='Nothing to see'),
+        record('d', created=1_500_000_000),
+        record('e', created=1_800_000_000),
+        record('f', created='1700000000.0', title='CUSTOMER CHURN again'),
+    ]) + b'{"id": "truncated", "subred\n'
+    count, posts = filter_block(block)
+    assert count == 7
+    assert [p.post_id for p in posts] == ['a', 'f']
+    assert posts[0].link == 'https://www.reddit.com/r/startups/comments/a/x/'
+
+
+def test_filter_block_escaped_keyword_skips_raw_precheck(filters):
+    filters([], ['c/o "quotes"'], after=None, before=None)
+    assert _filters['raw_keywords'] is None
+    count, posts = filter_block(lines([record('a', title='c/o "quotes" here', subreddit='any')]))
+    assert (count, [p.post_id for p in posts]) == (1, ['a'])
+
+
+def test_read_blocks_yields_whole_lines(tmp_path):
+    path = tmp_path / 'dump.ndjson'
+    data = lines([record(str(i)) for i in range(50)])
+    path.write_bytes(data)
+    blocks = list(read_blocks(str(path), block_bytes=100))
+    assert b''.join(blocks) == data
+    assert all(block.endswith(b'\n') for block in blocks)
+
+
+def test_read_blocks_skips_checkpointed_bytes(tmp_path):
+    path = tmp_path / 'dump.ndjson'
+    data = lines([record(str(i)) for i in range(10)])
+    path.write_bytes(data)
+    skip = data.index(b'\n', len(data) // 2) + 1
+    assert b''.join(read_blocks(str(path), skip=skip, block_bytes=64)) == data[skip:]
+
+
+def test_read_blocks_keeps_unterminated_last_line(tmp_path):
+    path = tmp_path / 'dump.ndjson'
+    path.write_bytes(b'{"id": 1}\n{"id": 2}')
+    assert list(read_blocks(str(path), block_bytes=1024)) == [b'{"id": 1}\n', b'{"id": 2}']
+
+
+def test_read_blocks_zst(tmp_path):
+    zstandard = pytest.importorskip('zstandard')
+    path = tmp_path / 'RS_2024-01.zst'
+    data = lines([record(str(i)) for i in range(200)])
+    path.write_bytes(zstandard.ZstdCompressor().compress(data))
+    assert b''.join(read_blocks(str(path), skip=1000, block_bytes=512)) == data[1000:]
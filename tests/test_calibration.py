@@ -0,0 +1,66 @@
+from calibration import DEFAULTS, GRID, _tighten, fit_thresholds
+from config import Config
+
+
+def outcomes(successes, failures):
+    return ([{'relevance_score': s, 'success': True} for s in successes] +
+            [{'relevance_score': s, 'success': False} for s in failures])
+
+
+def test_tighten_stops_before_recall_drops():
+    assert _tighten(0.2, [0.5] * 20) == 0.5
+    # One of 20 converted posts (5%) may fall below the cut, two may not
+    assert _tighten(0.2, [0.3] + [0.8] * 19) == 0.8
+    assert _tighten(0.2, [0.3, 0.3] + [0.8] * 18) == 0.3
+
+
+def test_tighten_never_loosens():
+    assert _tighten(0.6, [0.1, 0.2]) == 0.6
+    assert _tighten(0.6, [0.62]) == 0.6
+    assert _tighten(0.2, [0.99]) == GRID[-1]
+
+
+def test_fit_keeps_defaults_below_min_feedback():
+    fit = fit_thresholds(outcomes([0.9] * 5, [0.1] * 5))
+    assert not fit['calibrated']
+    assert all(fit[name] == DEFAULTS[name] for name in DEFAULTS)
+
+
+def test_fit_tightens_relevance_and_alert():
+    fit = fit_thresholds(outcomes([0.9 + i * 0.002 for i in range(20)], [0.1] * 40))
+    assert fit['calibrated']
+    assert fit['RELEVANCE_THRESHOLD'] == 0.9
+    assert fit['HIGH_RELEVANCE_THRESHOLD'] == 0.9
+    assert fit['ALERT_RELEVANCE_THRESHOLD'] == 0.9
+    assert fit['recall'] == 1.0
+    assert fit['filtered_share'] == 40 / 60
+
+
+def test_fit_leaves_alert_without_enough_samples(monkeypatch):
+    monkeypatch.setattr(Config, 'CALIBRATION_MIN_ALERT_SAMPLES', 10)
+    fit = fit_thresholds(outcomes([0.4] * 20 + [0.95] * 5, [0.1] * 40))
+    assert fit['RELEVANCE_THRESHOLD'] == 0.4
+    assert fit['ALERT_RELEVANCE_THRESHOLD'] == DEFAULTS['ALERT_RELEVANCE_THRESHOLD']
+    assert fit['recall'] == 1.0
+
+
+def test_fit_ignores_unscored_outcomes():
+    fit = fit_thresholds([{'relevance_score': None, 'success': True}] * 60)
+    assert fit['samples'] == 0 and not fit['calibrated']
+
+
+def test_calibrated_threshold_filters_posts_the_model_calls_relevant(monkeypatch):
+    from calibration import THRESHOLDS, apply_calibration
+    from models import Classification
+    from replay import InMemoryArango
+    for name in THRESHOLDS + ('THRESHOLDS_CALIBRATED',):
+        monkeypatch.setattr(Config, name, getattr(Config, name))
+    answer = {'relevance_score': 0.5, 'is_relevant': True}
+    assert Classification.from_llm(answer).is_relevant
+
+    arango = InMemoryArango()
+    arango.save_calibration(fit_thresholds(outcomes([0.9] * 20, [0.1] * 40)))
+    assert apply_calibration(arango)
+    assert Config.RELEVANCE_THRESHOLD == 0.9
+    assert not Classification.from_llm(answer).is_relevant
+    assert Classification.from_llm({'relevance_score': 0.9, 'is_relevant': False}).is_relevant
@@ -0,0 +1,43 @@
+from campaigns import Campaign, CampaignMatcher
+
+
+def matcher():
+    return CampaignMatcher([
+        Campaign('retention', ['customer churn', 'retention marketing'], ['saas', 'marketing']),
+        Campaign('crm', ['crm migration', 'customer churn'], ['sales', 'SaaS']),
+        Campaign('anywhere', ['growth hacking']),
+    ])
+
+
+def test_match_tags_every_campaign_with_subreddit_and_keyword():
+    assert matcher().match("Fighting Customer Churn after a CRM migration", 'saas') == ['retention', 'crm']
+
+
+def test_match_needs_a_campaign_subreddit():
+    m = matcher()
+    assert m.match("customer churn", 'marketing') == ['retention']
+    assert m.match("customer churn", 'sales') == ['crm']
+    assert m.match("customer churn", 'cooking') == []
+
+
+def test_match_campaign_without_subreddits_matches_anywhere():
+    m = matcher()
+    assert m.match("growth hacking ideas", 'cooking') == ['anywhere']
+    assert m.match("growth hacking and customer churn", 'sales') == ['crm', 'anywhere']
+
+
+def test_match_needs_a_keyword():
+    assert matcher().match("nothing relevant here", 'saas') == []
+
+
+def test_unions_keep_definition_order_once():
+    m = matcher()
+    assert m.keywords == ['customer churn', 'retention marketing', 'crm migration', 'growth hacking']
+    # 'saas' and 'SaaS' are one subreddit: listed once, in the first spelling
+    assert m.subreddits == ['saas', 'marketing', 'sales']
+
+
+def test_monitor_lists_a_shared_subreddit_once():
+    from reddit_monitor import RedditMonitor
+    monitor = RedditMonitor(client_factory=lambda: None, campaigns=matcher().campaigns)
+    assert [s.lower() for s in monitor.subreddits].count('saas') == 1
@@ -0,0 +1,63 @@
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from config import Config
+from llm_router import LLMRouter
+
+
+class Provider:
+    """Provider stand-in answering after a delay, or failing"""
+
+    def __init__(self, delay, fail=False):
+        self.delay = delay
+        self.fail = fail
+
+    def generate(self, prompt, model, schema):
+        time.sleep(self.delay)
+        if self.fail:
+            raise RuntimeError('provider down')
+        return SimpleNamespace(text='{}', usage_metadata=None)
+
+
+@pytest.fixture
+def hedged(monkeypatch):
+    monkeypatch.setattr(Config, 'LLM_HEDGE_MAX_FRACTION', 1.0)
+
+    def build(primary):
+        router = LLMRouter({'slow': primary, 'fast': Provider(0.0)}, models={'slow': 'm', 'fast': 'm'},
+                           hedge=True)
+        router.hedge_delay = lambda name, kind: 0.02
+        return router
+    return build
+
+
+def settle(router):
+    """Wait for the losing primary to finish in the background"""
+    router._executor.shutdown(wait=True)
+    return router.hedge_summary()
+
+
+def test_saved_time_counts_wins_whose_primary_succeeds(hedged):
+    router = hedged(Provider(0.2))
+    router.generate('classify', 'prompt', {})
+    stats = settle(router)
+    assert (stats['hedged'], stats['hedge_wins'], stats['saved_wins']) == (1, 1, 1)
+    assert 100 < stats['saved_ms_per_win'] < 250
+
+
+def test_failed_primary_saves_nothing(hedged):
+    router = hedged(Provider(0.2, fail=True))
+    router.generate('classify', 'prompt', {})
+    stats = settle(router)
+    assert (stats['hedge_wins'], stats['saved_wins'], stats['saved_s']) == (1, 0, 0.0)
+    assert stats['saved_ms_per_win'] == 0.0
+
+
+def test_reset_hedge_stats(hedged):
+    router = hedged(Provider(0.05))
+    router.generate('classify', 'prompt', {})
+    settle(router)
+    router.reset_hedge_stats()
+    assert router.hedge_summary()['calls'] == 0
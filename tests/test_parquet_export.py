@@ -0,0 +1,59 @@
+import pytest
+
+pytest.importorskip('pyarrow')
+pytest.importorskip('pandas')
+
+from parquet_export import ParquetExporter, load_manifest, read_export
+from replay import InMemoryArango
+
+
+def post(key, written_at=None, day='2025-01-02', title='Customer churn'):
+    doc = {'_key': key, 'post_id': key, 'post_title': title, 'timestamp': f"{day}T10:00:00",
+           'relevance_score': 0.5, 'is_relevant': True}
+    if written_at is not None:
+        doc['written_at'] = written_at
+    return doc
+
+
+@pytest.fixture
+def export(tmp_path):
+    arango = InMemoryArango()
+    exporter = ParquetExporter(arango, out_dir=str(tmp_path), batch_size=2, lag_seconds=0)
+    return arango, exporter, str(tmp_path)
+
+
+def test_runs_resume_from_the_watermark(export):
+    arango, exporter, out = export
+    for doc in [post('a', 100.0), post('b', 200.0), post('c', 200.0, day='2025-01-03')]:
+        arango.col.docs[doc['_key']] = doc
+    first = exporter.run()
+    assert first['rows'] == 3 and first['partitions'] == 2
+    assert first['watermark'] == {'written_at': 200.0, 'key': 'c'}
+
+    assert exporter.run()['rows'] == 0
+    # Same written_at as the watermark, later key: still exported
+    arango.col.docs['d'] = post('d', 200.0)
+    assert exporter.run()['rows'] == 1
+    assert sorted(read_export(out, columns=['_key'])['_key']) == ['a', 'b', 'c', 'd']
+    assert len(load_manifest(out)['runs']) == 2
+
+
+def test_rewritten_post_is_exported_again_and_newest_wins(export):
+    arango, exporter, out = export
+    arango.col.docs['a'] = post('a', 100.0, title='old')
+    exporter.run()
+    arango.col.docs['a'] = post('a', 300.0, title='new')
+    assert exporter.run()['rows'] == 1
+    df = read_export(out, columns=['_key', 'post_title'])
+    assert df.to_dict('records') == [{'_key': 'a', 'post_title': 'new'}]
+
+
+def test_unstamped_posts_are_exported_once(export):
+    arango, exporter, out = export
+    arango.col.docs['old'] = post('old')
+    arango.col.docs['null'] = dict(post('null'), written_at=None)
+    arango.col.docs['new'] = post('new', 100.0)
+    assert exporter.run()['rows'] == 3
+    assert load_manifest(out)['unstamped_exported']
+    assert exporter.run()['rows'] == 0
+    assert sorted(read_export(out, columns=['_key'])['_key']) == ['new', 'null', 'old']
@@ -0,0 +1,59 @@
+import time
+
+import pytest
+
+from read_cache import ReadCache
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1_700_000_000.0]
+    monkeypatch.setattr(time, 'time', lambda: now[0])
+    return now
+
+
+def test_hit_serves_the_same_validators(clock):
+    cache = ReadCache(ttl=60)
+    first = cache.get('posts', 'page', lambda: [1, 2])
+    assert cache.get('posts', 'page', lambda: [3]) is first
+    assert first.not_modified(first.etag, None)
+    assert first.not_modified(None, first.last_modified_header)
+    assert cache.summary()['hits'] == 1
+
+
+def test_invalidate_reloads_with_a_new_etag(clock):
+    cache = ReadCache(ttl=60)
+    rows = [1]
+    first = cache.get('posts', 'page', lambda: list(rows))
+    rows.append(2)
+    clock[0] += 5
+    cache.invalidate('posts')
+    second = cache.get('posts', 'page', lambda: list(rows))
+    assert second.etag != first.etag
+    assert not second.not_modified(first.etag, None)
+    assert not second.not_modified(None, first.last_modified_header)
+
+
+@pytest.mark.parametrize('ttl, max_entries', [(0, 256), (60, 1)])
+def test_changed_reload_after_expiry_or_eviction_moves_last_modified(clock, ttl, max_entries):
+    cache = ReadCache(ttl=ttl, max_entries=max_entries)
+    rows = [1]
+    first = cache.get('posts', 'page', lambda: list(rows))
+    # Expired (ttl 0) or evicted by another key; meanwhile another process wrote
+    cache.get('posts', 'other', lambda: [])
+    rows.append(2)
+    clock[0] += 5
+    second = cache.get('posts', 'page', lambda: list(rows))
+    assert second.etag != first.etag
+    assert second.last_modified > first.last_modified
+    # A client that only sends If-Modified-Since gets the new body
+    assert not second.not_modified(None, first.last_modified_header)
+
+
+def test_unchanged_reload_keeps_validators(clock):
+    cache = ReadCache(ttl=0)
+    first = cache.get('weekly', 'latest', lambda: {'a': 1})
+    clock[0] += 5
+    second = cache.get('weekly', 'latest', lambda: {'a': 1})
+    assert second.not_modified(first.etag, None)
+    assert second.not_modified(None, first.last_modified_header)
@@ -0,0 +1,46 @@
+import time
+
+from campaigns import Campaign
+from reddit_monitor import RedditMonitor
+from replay import FakeReddit
+
+
+def monitor_with(times):
+    now = time.time()
+    comments = [dict(id=f"c{i}", parent_id='t3_p1', author='someone', body='customer churn too',
+                     score=1, depth=0, created_utc=now - 3600 + t) for i, t in enumerate(times)]
+    reddit = FakeReddit({'recorded_at': now, 'listings': {}, 'comments': {'p1': comments}})
+    return RedditMonitor(client_factory=lambda: reddit, campaigns=[Campaign('default', ['churn'], ['startups'])])
+
+
+def fetch_all(monitor, limit):
+    """Fetch with a marker at the newest returned comment until nothing is new"""
+    marker, fetched = 0.0, []
+    for _ in range(100):
+        comments = monitor.get_post_comments('p1', since_utc=marker, limit=limit)
+        if not comments:
+            return fetched
+        fetched.append([c['comment_id'] for c in comments])
+        marker = max(c['created_utc'] for c in comments)
+    raise AssertionError('marker never caught up')
+
+
+def test_capped_fetches_return_oldest_first_and_miss_nothing():
+    monitor = monitor_with([(i * 7) % 120 for i in range(120)])
+    batches = fetch_all(monitor, limit=50)
+    assert [len(b) for b in batches] == [50, 50, 20]
+    assert sorted(c for b in batches for c in b) == sorted(f"c{i}" for i in range(120))
+
+
+def test_same_second_comments_are_never_split():
+    # 10 older comments, then 30 in one second, then 5 newer
+    monitor = monitor_with([1] * 10 + [2] * 30 + [3] * 5)
+    batches = fetch_all(monitor, limit=20)
+    # The cap stops before the group, then the whole group comes at once
+    assert [len(b) for b in batches] == [10, 30, 5]
+    assert len({c for b in batches for c in b}) == 45
+
+
+def test_group_filling_the_cap_is_returned_whole():
+    monitor = monitor_with([5] * 30)
+    assert len(monitor.get_post_comments('p1', limit=10)) == 30
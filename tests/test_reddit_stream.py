@@ -0,0 +1,73 @@
+import time
+
+import pytest
+
+from campaigns import Campaign
+from config import Config
+from reddit_monitor import RedditMonitor
+from replay import FakeReddit
+
+
+def submission(i, now):
+    return dict(id=f"p{i:04d}", title=f"Customer churn question {i}", selftext='', author='someone',
+                permalink=f"/r/startups/comments/p{i:04d}/x/", url='', subreddit='startups',
+                created_utc=now - 3600 + i, score=1, num_comments=0, upvote_ratio=1.0)
+
+
+@pytest.fixture
+def stream(monkeypatch):
+    monkeypatch.setattr(Config, 'STREAM_POLL_SECONDS', 0)
+    monkeypatch.setattr(Config, 'STREAM_MAX_POLL_SECONDS', 0)
+    now = time.time()
+
+    def start(posts, window=1000):
+        # Listings are newest first
+        listing = [submission(i, now) for i in reversed(range(posts))]
+        reddit = FakeReddit({'recorded_at': now, 'listings': {'startups': {'new': listing}}}, window=window)
+        monitor = RedditMonitor(client_factory=lambda: reddit,
+                                campaigns=[Campaign('default', ['customer churn'], ['startups'])])
+        return reddit, monitor, now
+    return start
+
+
+def take(stream, polls):
+    """Post ids yielded within this many polls (each empty poll yields None)"""
+    ids = []
+    for item in stream:
+        if item is None:
+            polls -= 1
+            if not polls:
+                return ids
+        else:
+            ids.append(item.post_id)
+
+
+def test_resume_yields_newer_posts_oldest_first(stream):
+    reddit, monitor, now = stream(20)
+    posts = monitor.stream_posts(before='t3_p0014', before_created=now - 3600 + 14)
+    assert take(posts, 1) == ['p0015', 'p0016', 'p0017', 'p0018', 'p0019']
+
+
+def test_quiet_listed_cursor_yields_nothing(stream):
+    reddit, monitor, now = stream(20)
+    posts = monitor.stream_posts(before='t3_p0019', before_created=now - 3600 + 19)
+    assert take(posts, 12) == []
+
+
+def test_removed_cursor_falls_back_to_time(stream):
+    reddit, monitor, now = stream(20)
+    reddit.remove('p0014')
+    posts = monitor.stream_posts(before='t3_p0014', before_created=now - 3600 + 14)
+    assert take(posts, 6) == ['p0015', 'p0016', 'p0017', 'p0018', 'p0019']
+
+
+def test_cursor_pushed_out_of_listing_does_not_stall(stream):
+    reddit, monitor, now = stream(20, window=50)
+    # A long outage: 60 newer posts push the (still existing) cursor out of the listing
+    for i in range(20, 80):
+        reddit.publish('startups', submission(i, now))
+    posts = monitor.stream_posts(before='t3_p0019', before_created=now - 3600 + 19)
+    # Only the 50 newest are still listed; they come in order, then the stream keeps up
+    assert take(posts, 6) == [f"p{i:04d}" for i in range(30, 80)]
+    reddit.publish('startups', submission(80, now))
+    assert take(posts, 1) == ['p0080']
@@ -0,0 +1,40 @@
+from arango_manager import rollup_buckets
+from config import Config
+from replay import InMemoryArango
+
+DAY = 86400
+
+
+def test_rollup_buckets_keeps_newest_per_bucket():
+    keep, drop = rollup_buckets([
+        [{'_key': 'a', 'ts': 3}, {'_key': 'b', 'ts': 9}, {'_key': 'c', 'ts': 5}],
+        [{'_key': 'd', 'ts': 1}],
+    ])
+    assert keep == ['b', 'd']
+    assert sorted(drop) == ['a', 'c']
+
+
+def test_rollup_buckets_empty():
+    assert rollup_buckets([]) == ([], [])
+
+
+def test_downsample_leaves_one_doc_per_bucket_across_runs(monkeypatch):
+    monkeypatch.setattr(Config, 'SNAPSHOT_RAW_DAYS', 2)
+    arango = InMemoryArango()
+    now = 100 * DAY + DAY / 2
+    # A snapshot every 6 hours over the last 10 days
+    for i in range(40):
+        arango.weekly_col.docs[f"s{i}"] = {'_key': f"s{i}", 'ts': now - i * DAY / 4, 'resolution': 'snapshot'}
+    # Run every 6 hours: the cutoff moves through a bucket over several runs
+    for step in range(8):
+        arango.downsample_weekly_trends(now + step * DAY / 4)
+
+    daily = {}
+    for doc in arango.weekly_col.docs.values():
+        if doc['resolution'] == 'daily':
+            daily.setdefault(doc['ts'] // DAY, []).append(doc['ts'])
+    assert daily and all(len(ts) == 1 for ts in daily.values())
+    # The kept doc is the last snapshot of its day, and only complete days were rolled up
+    assert all(ts[0] % DAY == 3 * DAY / 4 for ts in daily.values())
+    cutoff = now + 7 * DAY / 4 - Config.SNAPSHOT_RAW_DAYS * DAY
+    assert max(daily) * DAY + DAY <= cutoff
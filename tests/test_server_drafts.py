@@ -0,0 +1,60 @@
+import threading
+import time
+
+import pytest
+
+server = pytest.importorskip('server')
+from models import Engagement
+from replay import InMemoryArango
+
+
+class SlowDrafts:
+    """EngagementGenerator stand-in that takes a while and counts its calls"""
+
+    def __init__(self):
+        self.calls = 0
+
+    def generate_for_document(self, doc):
+        self.calls += 1
+        time.sleep(0.05)
+        return Engagement('comment', 'dm', 'strategy', 'medium')
+
+
+@pytest.fixture
+def pending(monkeypatch):
+    arango = InMemoryArango()
+    arango.col.docs['p1'] = {'_key': 'p1', 'post_id': 'p1', 'post_title': 'Customer churn',
+                             'post_body': 'body', 'draft_status': 'pending'}
+    drafts = SlowDrafts()
+    monkeypatch.setattr(server, '_arango', arango)
+    monkeypatch.setattr(server, '_engagement_gen', drafts)
+    return arango, drafts
+
+
+def test_concurrent_first_views_draft_once(pending):
+    arango, drafts = pending
+    responses = []
+
+    def view():
+        responses.append(server.post_draft('p1'))
+
+    threads = [threading.Thread(target=view) for _ in range(6)]
+    for thread in threads:
+        thread.start()
+        time.sleep(0.01)
+    for thread in threads:
+        thread.join()
+
+    assert drafts.calls == 1
+    assert [r['draft_status'] for r in responses] == ['ready'] * 6
+    assert 'post_body' not in arango.col.docs['p1']
+    assert server._draft_locks == {}
+
+
+def test_failed_save_returns_500_and_keeps_pending(pending, monkeypatch):
+    arango, drafts = pending
+    monkeypatch.setattr(arango, 'save_draft', lambda post_id, fields: None)
+    response = server.post_draft('p1')
+    assert response.status_code == 500
+    assert arango.col.docs['p1']['draft_status'] == 'pending'
+    assert server._draft_locks == {}
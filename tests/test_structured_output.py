@@ -0,0 +1,50 @@
+from structured_output import _INVALID, SCHEMAS, _coerce, validate
+
+
+def test_coerce_numbers():
+    spec = SCHEMAS['classify']['relevance_score']
+    assert _coerce('0.75', spec) == 0.75
+    assert _coerce(' 1 ', spec) == 1.0
+    assert _coerce(1.5, spec) is _INVALID
+    assert _coerce(True, spec) is _INVALID
+    assert _coerce('high', spec) is _INVALID
+
+
+def test_coerce_integer_rounds_and_checks_range():
+    spec = SCHEMAS['sentiment']['sentiment_level']
+    assert _coerce('6.6', spec) == 7
+    assert _coerce('7%', spec) == 7
+    assert _coerce(11, spec) is _INVALID
+
+
+def test_coerce_booleans():
+    spec = SCHEMAS['classify']['is_relevant']
+    assert _coerce('Yes', spec) is True
+    assert _coerce(0, spec) is False
+    assert _coerce('maybe', spec) is _INVALID
+
+
+def test_coerce_enum_normalizes():
+    spec = SCHEMAS['classify']['intent']
+    assert _coerce('Vendor Search', spec) == 'vendor_search'
+    assert _coerce('advice-seeking', spec) == 'advice_seeking'
+    assert _coerce('spam', spec) is _INVALID
+
+
+def test_coerce_null():
+    assert _coerce('null', SCHEMAS['engagement']['dm_draft']) is None
+    assert _coerce(None, SCHEMAS['engagement']['comment_draft']) is _INVALID
+    assert _coerce('  ', SCHEMAS['summary']['summary']) is _INVALID
+
+
+def test_validate_reports_missing_and_invalid_fields():
+    values, invalid = validate('classify', {
+        'relevance_score': '0.9', 'is_relevant': 'true', 'intent': 'Question', 'intent_score': 2,
+    })
+    assert values == {'relevance_score': 0.9, 'is_relevant': True, 'intent': 'question'}
+    assert invalid == ['intent_score', 'reasoning']
+
+
+def test_validate_limited_fields():
+    values, invalid = validate('sentiment', {'sentiment': 'Negative'}, fields=['sentiment'])
+    assert (values, invalid) == ({'sentiment': 'negative'}, [])
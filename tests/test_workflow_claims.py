@@ -0,0 +1,85 @@
+import pytest
+
+from config import Config
+from replay import build_replay_workflow, synthetic_fixtures
+
+
+class FakeCoordinator:
+    """LeaseCoordinator stand-in: owns every shard, gives up every third post to another worker"""
+
+    def __init__(self, shards):
+        self.shards = list(shards)
+        self.claimed = []
+        self.completed = []
+
+    def owned_shards(self):
+        return self.shards
+
+    def claim(self, post_ids):
+        self.claimed = [pid for i, pid in enumerate(post_ids) if i % 3]
+        return self.claimed
+
+    def complete(self, post_ids):
+        self.completed.extend(post_ids)
+
+
+def reject(collection, keys):
+    """
+    Make import_bulk reject the docs with these keys, reporting their positions like ArangoDB
+
+    Returns:
+        Set that collects the keys actually rejected (irrelevant posts are never written)
+    """
+    import_bulk = collection.import_bulk
+    rejected = set()
+
+    def flaky(documents, **kwargs):
+        bad = [i for i, doc in enumerate(documents) if doc['_key'] in keys]
+        rejected.update(documents[i]['_key'] for i in bad)
+        result = import_bulk([doc for doc in documents if doc['_key'] not in keys], **kwargs)
+        result.update(errors=len(bad), details=[f"at position {i}: unique constraint violated" for i in bad])
+        return result
+
+    collection.import_bulk = flaky
+    return rejected
+
+
+@pytest.fixture
+def workflow(monkeypatch):
+    monkeypatch.setattr(Config, 'REQUEST_DELAY_SECONDS', 0)
+    monkeypatch.setattr(Config, 'ARANGO_WRITE_RETRIES', 0)
+    workflow, reddit, llm = build_replay_workflow(synthetic_fixtures(6))
+    workflow.coordinator = FakeCoordinator(workflow.monitor.subreddits)
+    return workflow
+
+
+def test_claims_completed_only_for_stored_or_irrelevant_posts(workflow):
+    arango = workflow.arango
+    posts = workflow.monitor.search_posts(subreddits=workflow.coordinator.owned_shards())
+    failed = reject(arango.col, {p.post_id for p in posts[1::3] + posts[2::3]})
+
+    summary = workflow.process_posts(posts)
+    coordinator = workflow.coordinator
+    stored = set(arango.col.docs)
+
+    assert summary['new_posts'] == len(coordinator.claimed)
+    assert failed
+    # Only claimed posts are scored
+    assert stored <= set(coordinator.claimed)
+    # Failed imports keep their claim, so it expires and another worker retries them
+    assert not failed & set(coordinator.completed)
+    assert not failed & workflow.processed_post_ids
+    # Everything else that was claimed is completed: stored posts and irrelevant ones
+    assert set(coordinator.completed) == set(coordinator.claimed) - failed
+    assert stored == {pid for pid in coordinator.completed if pid in stored}
+    assert len(stored) < len(coordinator.completed)
+
+
+def test_unclaimed_posts_are_left_to_other_workers(workflow):
+    posts = workflow.monitor.search_posts(subreddits=workflow.coordinator.owned_shards())
+    workflow.process_posts(posts)
+    others = {p.post_id for p in posts} - set(workflow.coordinator.claimed)
+    assert others
+    assert not others & set(workflow.arango.col.docs)
+    assert not others & set(workflow.coordinator.completed)
+    assert not others & workflow.processed_post_ids
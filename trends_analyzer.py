@@ -1,23 +1,70 @@
-import json
+from array import array
 
+import numpy as np
 import pandas as pd
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 from typing import Dict, List, Optional
 
 from pandas.core.indexes.base import str_t
 
-from sheets_manager import SheetsManager
 from config import Config
 from arango_manager import ArangoManager
+from parquet_export import read_export
+from profiling import span
+
+# Columns read by the weekly job; everything else (drafts, reasoning, summaries) stays in Arango
+CATEGORY_COLUMNS = ['subreddit', 'intent', 'sentiment', 'priority']
+
+
+def load_posts_frame(arango: ArangoManager, since: Optional[datetime] = None) -> pd.DataFrame:
+    """
+    Load the columns the weekly job needs into a typed DataFrame
+
+    Rows are streamed from an AQL projection straight into arrays: category
+    columns are dictionary-encoded as they arrive, relevance_score is float64
+    and timestamp is parsed once by Arango into datetime64.
+
+    Args:
+        arango: Source of the posts
+        since: Only posts at or after this time
+    """
+    fields = ['timestamp_ms', 'relevance_score'] + CATEGORY_COLUMNS
+    timestamps = array('q')
+    relevance = array('d')
+    codes = [array('i') for _ in CATEGORY_COLUMNS]
+    categories = [{} for _ in CATEGORY_COLUMNS]
+    nat = np.iinfo(np.int64).min
+    nan = float('nan')
+
+    for row in arango.iter_post_rows(fields, since.isoformat() if since else None):
+        timestamps.append(nat if row[0] is None else int(row[0]))
+        relevance.append(nan if row[1] is None else float(row[1]))
+        for i, value in enumerate(row[2:]):
+            codes[i].append(-1 if value is None else categories[i].setdefault(value, len(categories[i])))
+
+    frame = {
+        'timestamp': np.frombuffer(timestamps, dtype=np.int64).view('datetime64[ms]'),
+        'relevance_score': np.frombuffer(relevance, dtype=np.float64),
+    }
+    for name, column_codes, column_categories in zip(CATEGORY_COLUMNS, codes, categories):
+        frame[name] = pd.Categorical.from_codes(np.frombuffer(column_codes, dtype=np.int32),
+                                                categories=list(column_categories))
+    return pd.DataFrame(frame)
 
 
 class TrendsAnalyzer:
     """Analyze trends in relevant posts over time"""
     
-    def __init__(self):
-        """Initialize with sheets manager"""
-        self.sheets = SheetsManager()
-        self.arango=ArangoManager()
+    def __init__(self, arango: Optional[ArangoManager] = None, export_dir: Optional[str] = None):
+        """
+        Initialize with Arango manager
+
+        Args:
+            export_dir: Read posts from this Parquet export instead of ArangoDB
+                (defaults to EXPORT_DIR when TRENDS_FROM_EXPORT is set)
+        """
+        self.arango = arango or ArangoManager()
+        self.export_dir = export_dir or (Config.EXPORT_DIR if Config.TRENDS_FROM_EXPORT else None)
     
     def get_weekly_stats(self, weeks: int = 4) -> Dict:
         """
@@ -30,10 +77,16 @@ class TrendsAnalyzer:
             Dictionary with weekly statistics
         """
         try:
-            # Read all data from sheet
-            data = self.arango.get_existing_posts()
+            # Filter to last N weeks (in the query, so older posts are never read)
+            cutoff_date = datetime.now() - timedelta(weeks=weeks)
+            with span('trends.load', source='export' if self.export_dir else 'arango'):
+                if self.export_dir:
+                    df = read_export(self.export_dir, ['timestamp', 'relevance_score'] + CATEGORY_COLUMNS,
+                                     since=cutoff_date, categories=CATEGORY_COLUMNS)
+                else:
+                    df = load_posts_frame(self.arango, since=cutoff_date)
             
-            if not data:
+            if df.empty:
                 return {
                     'total_posts': 0,
                     'weeks': [],
@@ -42,29 +95,14 @@ class TrendsAnalyzer:
                     'trend': 'insufficient_data'
                 }
             
-            # Convert to DataFrame
-            df = pd.DataFrame(data)
-            
-            # Parse timestamps
-            df['timestamp'] = pd.to_datetime(df['timestamp'])
-            
-            # Filter to last N weeks
-            cutoff_date = datetime.now() - timedelta(weeks=weeks)
-            df = df[df['timestamp'] >= cutoff_date]
-            
             # Calculate weekly stats
             df['Week'] = df['timestamp'].dt.to_period('W')
-            weekly_stats = df.groupby('Week').agg({
-                'post_link': 'count',
-                'relevance_score': 'mean',
-                'intent': lambda x: x.value_counts().to_dict()
-            }).to_dict()
             
-            # Get intent distribution
-            intent_dist = df['intent'].value_counts().to_dict()
+            # Get intent distribution (categories with no posts are left out)
+            intent_dist = {k: int(v) for k, v in df['intent'].value_counts().items() if v}
             
             # Get subreddit distribution
-            subreddit_dist = df['subreddit'].value_counts().to_dict()
+            subreddit_dist = {k: int(v) for k, v in df['subreddit'].value_counts().items() if v}
             
             # Calculate trend
             if len(df) >= 2:
@@ -88,11 +126,11 @@ class TrendsAnalyzer:
                     str(week): count for week, count in 
                     df.groupby('Week').size().items()
                 },
-                'average_relevance': df['relevance_score'].mean(),
+                'average_relevance': float(df['relevance_score'].mean()),
                 'by_intent': intent_dist,
                 'by_subreddit': subreddit_dist,
                 'trend': trend,
-                'high_priority_count': len(df[df['Priority'] == 'high']) if 'Priority' in df.columns else 0
+                'high_priority_count': int((df['priority'] == 'high').sum())
             }
         
         except Exception as e:
@@ -140,12 +178,14 @@ class TrendsAnalyzer:
             analysis_id: Optional custom ID for the document
 
         Returns:
-            Document key of the saved record
+            [stored document], or a dict with an error
         """
 
-        # Prepare document
+        # Prepare document; ts (epoch seconds) is the indexed time used for history reads
+        now = datetime.utcnow()
         document = {
-            'timestamp': datetime.utcnow().isoformat(),
+            'timestamp': now.isoformat(),
+            'ts': now.replace(tzinfo=timezone.utc).timestamp(),
             'total_posts': stats.get('total_posts', 0),
             'average_relevance': stats.get('average_relevance', 0),
             'trend': stats.get('trend', 'unknown'),
@@ -155,18 +195,22 @@ class TrendsAnalyzer:
             'by_subreddit': stats.get('by_subreddit', {}),
             'error': stats.get('error')
         }
-        try:
-            res = self.arango.insert_weekly_trends(json.dumps(document, indent=2))
-            return res
-        except Exception as e:
-            return {"error":e}
+        stored = self.arango.insert_weekly_trends(document)
+        if not stored:
+            return {"error": "Failed to store weekly analysis"}
+        return stored
 
     def run(self):
         """Run trends analysis"""
-        analyzer = TrendsAnalyzer()
-        stats = analyzer.get_weekly_stats(weeks=4)
-        analyzer.print_summary(stats)
-        return analyzer.save_trends_analysis(stats)
+        with span('trends.weekly_stats'):
+            stats = self.get_weekly_stats(weeks=4)
+        self.print_summary(stats)
+        with span('trends.save'):
+            result = self.save_trends_analysis(stats)
+        # Keep history bounded: older snapshots are rolled up to daily/weekly/monthly
+        with span('trends.downsample'):
+            self.arango.downsample_weekly_trends()
+        return result
 
 
 
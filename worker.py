@@ -0,0 +1,164 @@
+"""
+Horizontal worker mode: several workflow processes split the subreddits between them
+
+Each worker holds expiring leases on a fair share of Config.SUBREDDITS in the
+ArangoDB coordination collection, renews them on a heartbeat, and claims every
+post before scoring it so a post is analyzed once no matter how many workers run.
+
+Usage:
+    python worker.py               # start one worker; run more for more capacity
+    python worker.py --once        # one coordinated pass, then exit
+"""
+import math
+import os
+import socket
+import threading
+import time
+import uuid
+import zlib
+from typing import List, Optional
+from config import Config
+from arango_manager import ArangoManager
+from campaigns import CampaignMatcher, load_campaigns
+
+
+class LeaseCoordinator:
+    """Hold a fair share of subreddit leases and claim posts before scoring them"""
+
+    def __init__(self, arango: ArangoManager, shards: Optional[List[str]] = None,
+                 worker_id: Optional[str] = None, lease_seconds: Optional[float] = None,
+                 heartbeat_seconds: Optional[float] = None):
+        """
+        Args:
+            arango: ArangoManager holding the coordination collection
+            shards: Subreddits to split between workers (defaults to those of all campaigns)
+            worker_id: Unique id of this worker (defaults to host-pid-random)
+            lease_seconds: Lease and heartbeat lifetime (defaults to config value)
+            heartbeat_seconds: Renew/rebalance interval (defaults to config value)
+        """
+        self.arango = arango
+        self.shards = list(shards if shards is not None else CampaignMatcher(load_campaigns()).subreddits)
+        self.worker_id = worker_id or f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:6]}"
+        self.lease_seconds = lease_seconds or Config.WORKER_LEASE_SECONDS
+        self.heartbeat_seconds = heartbeat_seconds or Config.WORKER_HEARTBEAT_SECONDS
+
+        self._owned = set()
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._thread = None
+
+    def start(self):
+        """Announce this worker, take an initial share and keep it renewed in the background"""
+        self.arango.heartbeat(self.worker_id, self.lease_seconds)
+        self.rebalance()
+        self._thread = threading.Thread(target=self._heartbeat_loop, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop heartbeating and hand every lease back so other workers take over at once"""
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join()
+        with self._lock:
+            owned, self._owned = self._owned, set()
+        for shard in owned:
+            self.arango.release_lease(f"lease:{shard}", self.worker_id)
+        self.arango.release_lease(f"worker:{self.worker_id}", self.worker_id)
+
+    def owned_shards(self) -> List[str]:
+        with self._lock:
+            return sorted(self._owned)
+
+    def _heartbeat_loop(self):
+        while not self._stopped.wait(self.heartbeat_seconds):
+            try:
+                self.arango.heartbeat(self.worker_id, self.lease_seconds)
+                self.rebalance()
+            except Exception as e:
+                print(f"Error in worker heartbeat: {str(e)}")
+
+    def rebalance(self):
+        """
+        Renew held leases and move towards a fair share
+
+        A worker holding more than ceil(shards / live workers) releases the extra
+        leases so a newly started worker can take them; a worker below its share
+        takes free or expired leases (the leases of a dead worker expire after
+        lease_seconds and are stolen here).
+        """
+        if not self.shards:
+            return
+        workers = set(self.arango.live_workers()) | {self.worker_id}
+        fair = math.ceil(len(self.shards) / len(workers))
+
+        # A failed renewal means we stalled past expiry and the lease was stolen
+        kept = [s for s in self.owned_shards()
+                if s in self.shards and self._take(s)]
+        for shard in kept[fair:]:
+            self.arango.release_lease(f"lease:{shard}", self.worker_id)
+        kept = kept[:fair]
+
+        if len(kept) < fair:
+            held = self.arango.get_leases()
+            # Start at a per-worker offset so concurrent workers rarely race for the same shard
+            start = zlib.crc32(self.worker_id.encode()) % len(self.shards)
+            for shard in self.shards[start:] + self.shards[:start]:
+                if len(kept) >= fair:
+                    break
+                if shard in kept or held.get(shard, self.worker_id) != self.worker_id:
+                    continue
+                if self._take(shard):
+                    kept.append(shard)
+
+        with self._lock:
+            gained = set(kept) - self._owned
+            lost = self._owned - set(kept)
+            self._owned = set(kept)
+        if gained or lost:
+            print(f"[worker {self.worker_id}] leases: {sorted(kept)} "
+                  f"(+{sorted(gained)} -{sorted(lost)}, {len(workers)} workers)")
+
+    def _take(self, shard: str) -> bool:
+        return self.arango.try_lease(f"lease:{shard}", self.worker_id, self.lease_seconds,
+                                     kind='lease', shard=shard)
+
+    def claim(self, post_ids: List[str]) -> List[str]:
+        """Claim posts before scoring; returns the ids this worker should score"""
+        return self.arango.claim_posts(post_ids, self.worker_id, Config.WORKER_CLAIM_SECONDS)
+
+    def complete(self, post_ids: List[str]):
+        """Mark scored posts done so their claims are never taken over"""
+        self.arango.complete_claims(post_ids, self.worker_id)
+
+
+def main():
+    """Main entry point"""
+    import argparse
+    from workflow import GTMAutomationWorkflow
+
+    parser = argparse.ArgumentParser(description='GTM horizontal worker')
+    parser.add_argument('--once', action='store_true', help='Run one coordinated pass and exit')
+    parser.add_argument('--poll-seconds', type=float, default=Config.WORKER_POLL_SECONDS,
+                        help='Pause between runs')
+    args = parser.parse_args()
+
+    arango = ArangoManager()
+    coordinator = LeaseCoordinator(arango)
+    workflow = GTMAutomationWorkflow(arango=arango, coordinator=coordinator)
+    coordinator.start()
+    print(f"Worker {coordinator.worker_id} started with {len(coordinator.shards)} subreddits to share")
+
+    try:
+        while True:
+            workflow.run()
+            if args.once:
+                break
+            time.sleep(args.poll_seconds)
+    except KeyboardInterrupt:
+        print("\nStopping worker...")
+    finally:
+        coordinator.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -8,41 +8,100 @@ from ai_scorer import AIScorer
 from engagement_generator import EngagementGenerator
 from arango_manager import ArangoManager
 from slack_notifier import SlackNotifier
-from typing import List, Dict
+from comment_ingestor import CommentIngestor
+from campaigns import Campaign
+from models import AnalysisResult, Classification, Post
+from prompt_builder import token_usage
+from structured_output import parse_stats
+from llm_router import tier_stats
+from calibration import apply_calibration
+from profiling import Profiler, span
+from typing import List, Dict, Optional
 import time
 from datetime import datetime
+from config import Config
 
 
 class GTMAutomationWorkflow:
     """Main workflow orchestrator"""
     
-    def __init__(self, dry_run: bool = False):
-        """Initialize all components"""
+    def __init__(self, dry_run: bool = False, monitor: Optional[RedditMonitor] = None,
+                 scorer: Optional[AIScorer] = None,
+                 engagement_gen: Optional[EngagementGenerator] = None,
+                 arango: Optional[ArangoManager] = None,
+                 slack: Optional[SlackNotifier] = None,
+                 coordinator=None, lazy_drafts: Optional[bool] = None):
+        """
+        Initialize all components (pre-built ones can be passed in, e.g. for replay)
+
+        Args:
+            coordinator: worker.LeaseCoordinator; when set, only leased subreddits
+                are scanned and posts are claimed before scoring
+            lazy_drafts: Store posts as draft pending and write engagement drafts
+                only for high-priority posts (defaults to config value)
+        """
         self.dry_run = dry_run
-        self.monitor = RedditMonitor()
-        self.scorer = AIScorer()
-        self.engagement_gen = EngagementGenerator()
+        self.coordinator = coordinator
+        self.lazy_drafts = Config.LAZY_DRAFTS if lazy_drafts is None else lazy_drafts
+        self.monitor = monitor or RedditMonitor()
+        self.scorer = scorer or AIScorer()
+        self.engagement_gen = engagement_gen or EngagementGenerator()
         
         # Initialize Arango/Slack only if not in dry-run
         if not self.dry_run:
             print("arango manager")
-            self.arango = ArangoManager()
-            self.slack = SlackNotifier()
+            self.arango = arango or ArangoManager()
+            self.slack = slack or SlackNotifier()
+            self.comments = CommentIngestor(self.monitor, self.arango)
+            if apply_calibration(self.arango):
+                print(f"Using calibrated thresholds: relevance >= {Config.RELEVANCE_THRESHOLD}, "
+                      f"alert >= {Config.ALERT_RELEVANCE_THRESHOLD}")
             # Track processed posts to avoid duplicates using DB
             self.processed_post_ids = self.arango.get_existing_post_ids()
             print(f"Loaded {len(self.processed_post_ids)} existing post IDs for deduplication")
         else:
             self.arango = None
             self.slack = None
+            self.comments = None
             self.processed_post_ids = set()
             print("Dry-run mode: Skipping ArangoDB/Slack initialization")
     
-    def run(self, dry_run: bool = False) -> Dict:
+    def _relevant_campaigns(self, post: Post, classification: Classification) -> Optional[List[Campaign]]:
+        """
+        Campaigns the post is relevant for, each by its own threshold
+
+        None when the post matches no campaign (e.g. a backfilled post); the
+        config thresholds apply to it then.
+        """
+        matcher = self.monitor.matcher
+        names = post.campaigns or matcher.match_post(post)
+        if not names:
+            return None
+        return [c for c in matcher.get(names) if c.is_relevant(classification)]
+
+    def _alerting_campaigns(self, result: AnalysisResult) -> List[Campaign]:
+        return [c for c in self.monitor.matcher.get(result.campaigns) if c.is_high_priority(result)]
+
+    @staticmethod
+    def _stored(post_ids: List[str], writer) -> List[str]:
+        """The post ids not left unstored by the writer (irrelevant posts need no write)"""
+        if writer is None:
+            return list(post_ids)
+        return [pid for pid in post_ids if pid not in writer.failed_keys]
+
+    def _is_high_priority(self, result: AnalysisResult) -> bool:
+        if not result.campaigns:
+            return result.is_high_priority
+        return bool(self._alerting_campaigns(result))
+
+    def run(self, dry_run: bool = False, subreddits: Optional[List[str]] = None) -> Dict:
         """
         Execute the complete workflow
         
         Args:
             dry_run: If True, don't write to sheets or send notifications
+            subreddits: Only scan these subreddits (defaults to all monitored ones,
+                or to the leased ones in worker mode)
             
         Returns:
             Dictionary with execution summary
@@ -54,12 +113,41 @@ class GTMAutomationWorkflow:
         print("started")
         # Step 1: Monitor Reddit for posts
         print("\n[Step 1] Monitoring Reddit for posts...")
-        posts = self.monitor.search_posts()
+        if self.coordinator is not None:
+            owned = self.coordinator.owned_shards()
+            subreddits = owned if subreddits is None else [s for s in subreddits if s in owned]
+            print(f"Leased subreddits: {', '.join(subreddits) or 'none'}")
+        with span('reddit.search'):
+            posts = self.monitor.search_posts(subreddits=subreddits)
         print(f"Found {len(posts)} posts matching keywords")
-        
+        return self.process_posts(posts, dry_run=dry_run)
+
+    def process_posts(self, posts: List[Post], dry_run: bool = False) -> Dict:
+        """
+        Score, store and notify for posts that were already fetched (Steps 2-4)
+
+        Args:
+            posts: Posts matching keywords, from run() or the submission stream;
+                already processed ones are skipped
+            dry_run: If True, don't write to sheets or send notifications
+
+        Returns:
+            Dictionary with execution summary
+        """
+        token_usage.reset()
+        parse_stats.reset()
+        tier_stats.reset()
+        self.scorer.client.reset_hedge_stats()
+
         # Filter out already processed posts
-        new_posts = [p for p in posts if p['post_id'] not in self.processed_post_ids]
+        new_posts = [p for p in posts if p.post_id not in self.processed_post_ids]
         print(f"Found {len(new_posts)} new posts (after deduplication)")
+
+        # Claim before scoring: when a lease moves, the old and new owner may list the same posts
+        if self.coordinator is not None and new_posts:
+            claimed = set(self.coordinator.claim([p.post_id for p in new_posts]))
+            print(f"Claimed {len(claimed)} posts ({len(new_posts) - len(claimed)} taken by other workers)")
+            new_posts = [p for p in new_posts if p.post_id in claimed]
         
         if not new_posts:
             print("No new posts to process")
@@ -77,70 +165,116 @@ class GTMAutomationWorkflow:
         relevant_count = 0
         high_priority_count = 0
         
-        for i, post in enumerate(new_posts, 1):
-            print(f"Processing post {i}/{len(new_posts)}: {post['title'][:50]}...")
+        # Step 3 runs alongside Step 2: results are buffered and bulk-imported in the background
+        writer = None
+        if not dry_run and self.arango is not None:
+            writer = self.arango.writer()
+        scored_ids = []
+        # Deferred drafts are written by server.py on first view, so only when results are stored
+        lazy = self.lazy_drafts and writer is not None
+        deferred_count = 0
+        campaign_counts = {c.name: {'relevant': 0, 'high_priority': 0} for c in self.monitor.campaigns}
+
+        try:
+            for i, post in enumerate(new_posts, 1):
+                print(f"Processing post {i}/{len(new_posts)}: {post.title[:50]}...")
             
-            # Classify post
-            classification = self.scorer.classify_and_score(post)
+                # Classify post
+                with span('classify', post_id=post.post_id):
+                    classification = self.scorer.classify_and_score(post)
             
-            # Only process relevant posts further
-            if classification.get('is_relevant', False):
-                relevant_count += 1
+                # Only process posts relevant for at least one campaign further
+                campaigns = self._relevant_campaigns(post, classification)
+                is_relevant = classification.is_relevant if campaigns is None else bool(campaigns)
+                if is_relevant:
+                    relevant_count += 1
                 
-                # Generate summary
-                summary = self.scorer.generate_summary(post)
+                    # Generate summary
+                    with span('summary', post_id=post.post_id):
+                        summary = self.scorer.generate_summary(post)
                 
-                # Generate engagement suggestion
-                engagement = self.engagement_gen.generate_suggestion(post, classification)
+                    with span('sentiment', post_id=post.post_id):
+                        sentiment=self.scorer.generate_sentiment(post)
 
-                sentiment=self.scorer.generate_sentiment(post)
-                
-                result = {
-                    'post_data': post,
-                    'classification': classification,
-                    'engagement': engagement,
-                    'summary': summary,
-                    'sentiment':sentiment
-                }
+                    # Generate engagement suggestion (deferred unless the post will trigger an alert)
+                    engagement = self.engagement_gen.deferred(classification) if lazy else None
+                    result = AnalysisResult(post, classification, engagement, summary, sentiment,
+                                            tuple(c.name for c in campaigns or ()))
+                    if engagement is None or self._is_high_priority(result):
+                        with span('engagement', post_id=post.post_id):
+                            result.engagement = self.engagement_gen.generate_suggestion(post, classification)
+                    else:
+                        deferred_count += 1
                 
-                results.append(result)
+                    results.append(result)
+
+                    # Write-behind: the doc is stored while later posts are scored
+                    if writer is not None:
+                        writer.add(result.to_document())
                 
-                # Check if high priority
-                if classification.get('relevance_score', 0.0) >= 0.85 or \
-                   engagement.get('priority') == 'high':
-                    high_priority_count += 1
-                    print(f"  ⚠️  High-priority post detected!")
+                    # Check if high priority
+                    for campaign in campaigns or ():
+                        campaign_counts[campaign.name]['relevant'] += 1
+                    alerting = self._alerting_campaigns(result)
+                    for campaign in alerting:
+                        campaign_counts[campaign.name]['high_priority'] += 1
+                    if alerting or (campaigns is None and result.is_high_priority):
+                        high_priority_count += 1
+                        print(f"  ⚠️  High-priority post detected!")
                 
-                # Rate limiting
-                time.sleep(1)  # Be respectful to APIs
-        
+                    # Rate limiting
+                    time.sleep(Config.REQUEST_DELAY_SECONDS)  # Be respectful to APIs
+
+                scored_ids.append(post.post_id)
+        finally:
+            if writer is not None:
+                print("\n[Step 3] Flushing results to ArangoDB...")
+                with span('arango.flush'):
+                    writer.close()
+                print(f"Stored {writer.stats['written']} results ({writer.stats['failed']} failed)")
+            # Unfinished claims, and those of posts whose import failed, expire
+            # and are picked up by another worker
+            if self.coordinator is not None:
+                self.coordinator.complete(self._stored(scored_ids, writer))
+
         print(f"\n[Step 2 Complete] {relevant_count} relevant posts found")
         print(f"  - High priority: {high_priority_count}")
-        
-        # Step 3: Store results in ArangoDB
-        if results and not dry_run and self.arango is not None:
-            print("\n[Step 3] Storing results in ArangoDB...")
-            self.arango.add_results(results)
-            print(f"Stored {len(results)} results")
+        if deferred_count:
+            print(f"  - Drafts deferred until viewed: {deferred_count}")
+
+        # Step 3b: Pull comment threads for relevant posts
+        if results and not dry_run and self.comments is not None:
+            print("\n[Step 3b] Ingesting comments for relevant posts...")
+            with span('comments.ingest', posts=len(results)):
+                comment_summary = self.comments.ingest([r.post.post_id for r in results])
+            print(f"Stored {comment_summary['new_comments']} new comments "
+                  f"({comment_summary['keyword_hits']} keyword hits)")
         
         # Step 4: Send Slack notifications for high-priority posts
         if results and not dry_run and self.slack is not None:
             print("\n[Step 4] Sending Slack notifications...")
             notification_count = 0
             for result in results:
-                classification = result.get('classification', {})
-                engagement = result.get('engagement', {})
-                
-                if classification.get('relevance_score', 0.0) >= 0.85 or \
-                   engagement.get('priority') == 'high':
-                    self.slack.notify_high_priority_post(result)
+                if not self._is_high_priority(result):
+                    continue
+                if not result.campaigns:
+                    with span('slack.notify', post_id=result.post.post_id):
+                        self.slack.notify_high_priority_post(result)
+                    notification_count += 1
+                    continue
+                # One message per Slack target, naming every campaign that alerts on it there
+                targets = {}
+                for campaign in self._alerting_campaigns(result):
+                    targets.setdefault(campaign.webhook_url, []).append(campaign.name)
+                for webhook_url, names in targets.items():
+                    with span('slack.notify', post_id=result.post.post_id):
+                        self.slack.notify_high_priority_post(result, webhook_url=webhook_url, campaigns=names)
                     notification_count += 1
             
             print(f"Sent {notification_count} Slack notifications")
         
-        # Update processed post IDs
-        for post in new_posts:
-            self.processed_post_ids.add(post['post_id'])
+        # Update processed post IDs (failed imports are retried on a later run)
+        self.processed_post_ids.update(self._stored([p.post_id for p in new_posts], writer))
         
         # Summary
         print("\n" + "=" * 60)
@@ -150,6 +284,33 @@ class GTMAutomationWorkflow:
         print(f"New posts: {len(new_posts)}")
         print(f"Relevant posts: {relevant_count}")
         print(f"High-priority posts: {high_priority_count}")
+        if len(campaign_counts) > 1:
+            for name, counts in campaign_counts.items():
+                print(f"Campaign {name}: {counts['relevant']} relevant, {counts['high_priority']} high priority")
+        usage = token_usage.summary()
+        for kind, stats in usage.items():
+            print(f"Tokens ({kind}): {stats['input_tokens']} in / {stats['output_tokens']} out "
+                  f"over {stats['calls']} calls")
+        parse = parse_stats.summary()
+        for kind, stats in parse.items():
+            if stats['parse_failures'] or stats['invalid_fields']:
+                print(f"Parse problems ({kind}): {stats['parse_failures']} unparseable, "
+                      f"{stats['invalid_fields']} invalid fields, {stats['field_retries']} retries")
+        tiers = tier_stats.summary()
+        for kind, stats in tiers.items():
+            if stats['escalations']:
+                print(f"Escalated ({kind}): {stats['escalations']} of {stats['requests']} "
+                      f"({stats['escalation_rate']:.0%}) to the strong model tier")
+        providers = self.scorer.client.summary()
+        for name, kinds in providers.items():
+            errors = sum(stats['errors'] for stats in kinds.values())
+            if errors or len(providers) > 1:
+                print(f"LLM provider {name}: {sum(stats['calls'] for stats in kinds.values())} calls, "
+                      f"{errors} errors")
+        hedging = self.scorer.client.hedge_summary()
+        if hedging['hedged']:
+            print(f"LLM hedging: {hedging['hedge_rate']:.1%} of calls hedged, {hedging['hedge_wins']} won, "
+                  f"{hedging['saved_ms_per_win']:.0f} ms saved per win")
         print("=" * 60)
         
         return {
@@ -157,7 +318,14 @@ class GTMAutomationWorkflow:
             'new_posts': len(new_posts),
             'processed': len(results),
             'relevant_posts': relevant_count,
-            'high_priority': high_priority_count
+            'high_priority': high_priority_count,
+            'drafts_deferred': deferred_count,
+            'campaigns': campaign_counts,
+            'token_usage': usage,
+            'parse_stats': parse,
+            'llm_providers': providers,
+            'llm_hedging': hedging,
+            'llm_tiers': tiers
         }
 
 
@@ -168,10 +336,17 @@ def main():
     parser = argparse.ArgumentParser(description='GTM Automation Workflow')
     parser.add_argument('--dry-run', action='store_true', 
                        help='Run without writing to sheets or sending notifications')
+    parser.add_argument('--profile', action='store_true',
+                        help='Write a sampling flamegraph and a span trace of the run to PROFILE_DIR')
     args = parser.parse_args()
     
     workflow = GTMAutomationWorkflow(dry_run=args.dry_run)
-    summary = workflow.run(dry_run=args.dry_run)
+    if args.profile:
+        with Profiler('workflow') as profiler:
+            summary = workflow.run(dry_run=args.dry_run)
+        summary['profile'] = profiler.report()
+    else:
+        summary = workflow.run(dry_run=args.dry_run)
     
     print("\nExecution Summary:")
     for key, value in summary.items():